@@ -77,6 +77,12 @@ mkdir testdir1
 mkdir testdir4
 PYTHONDONTWRITEBYTECODE=1 python3 "$(which pytest)" --cov=../src/ --cov-report=xml --cov-fail-under=$COVERAGE_THRESHOLD -vv .
 
+# the same test suite has to pass with every license analysis backend
+for backend in bitset vectorized
+do
+    LIC_ANALYSIS_BACKEND=$backend PYTHONDONTWRITEBYTECODE=1 python3 "$(which pytest)" -q .
+done
+
 printf "%stests passed%s\n\n" "${GREEN}" "${NORMAL}"
 
 popd > /dev/null
@@ -0,0 +1,257 @@
+"""Backends implementing the graph algorithms used by the license analysis."""
+
+import itertools
+
+from src.directed_graph import DirectedGraph
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
+
+class AnalysisBackend(object):
+    """Interface of the license analysis backends.
+
+    A backend answers reachability, join ( common reachable vertices ),
+    compatibility class and conflict queries over one license graph. All
+    the backends must give the same output, they differ in speed and memory
+    footprint only.
+    """
+
+    name = None
+
+    def __init__(self, g, dict_compatibility_classes):
+        """Initialize the backend.
+
+        :param g: license graph
+        :param dict_compatibility_classes: class representative license -> member licenses
+        """
+        self.g = g
+        self.dict_compatibility_classes = dict_compatibility_classes
+
+    def get_reachable_licenses(self, license_vertex):
+        """Get frozenset of licenses reachable from the given license vertex, including its own."""
+        raise NotImplementedError()
+
+    def find_common_reachable_vertices(self, license_vertices):
+        """Find vertices reachable from all the given license vertices.
+
+        The vertices are returned in the same order as by
+        DirectedGraph.find_common_reachable_vertices().
+        """
+        raise NotImplementedError()
+
+    def get_compatibility_classes(self, lic):
+        """Get representative licenses of the compatibility classes the license falls into."""
+        raise NotImplementedError()
+
+    def find_conflict_licenses(self, license_vertices):
+        """Identify conflicting licenses among the given list.
+
+        Note that this method assumes that there is a conflict in the input licenses.
+
+        When there is a conflict in the given list of licenses then it is
+        guaranteed that all of them cannot be members of the same compatibility class.
+        Otherwise, there would have been a representative license identified.
+
+        This method distributes the given licenses into their respective compatibility
+        classes and then prepares output with each pair of conflicting licenses.
+
+        :param license_vertices: license vertices that have some conflicting licenses
+        :return: list of pairs of conflicting licenses
+        """
+        # first, let us find out compatibility classes for each vertex
+        vertex2groups = {}
+        for v in license_vertices:
+            vertex_groups = self.get_compatibility_classes(v.get_prop_value('license'))
+            if vertex_groups:
+                vertex2groups[v] = vertex_groups
+
+        # also, we need to gather total unique classes for input vertices
+        list_groups = []
+        for v in license_vertices:
+            vertex_groups = vertex2groups.get(v)
+            if vertex_groups:
+                list_groups += vertex_groups
+
+        # create a dictionary to store vertex licenses per compatibility class
+        list_groups = list(set(list_groups))
+        assert len(list_groups) > 1
+
+        list_items = [(x, []) for x in list_groups]
+        map_groups = dict(list_items)
+        # insert each vertex license into appropriate class
+        for v in license_vertices:
+            license = v.get_prop_value('license')
+            vertex_groups = vertex2groups.get(v, [])
+            # ignore vertex if it falls into every class
+            if set(vertex_groups) != set(list_groups):
+                for g in vertex_groups:
+                    map_groups[g].append(license)
+
+        # prepare output i.e. list of tuples with two conflicting licenses
+        output = []
+        for c1, c2 in itertools.combinations(list_groups, 2):  # nC2
+            list1 = map_groups[c1]  # list of licenses in one class
+            list2 = map_groups[c2]  # list of licenses in the other class
+            common = set(list1).intersection(set(list2))
+            list1 = list(set(list1) - common)
+            list2 = list(set(list2) - common)
+            for l1 in list1:
+                for l2 in list2:
+                    output.append(tuple(sorted((l1, l2))))
+
+        # deduplicate the output tuples
+        output = list(set(output))
+        return output
+
+
+class PythonBackend(AnalysisBackend):
+    """Backend that traverses the graph objects on every query.
+
+    It keeps no data of its own, so it has the smallest memory footprint.
+    """
+
+    name = 'python'
+
+    def get_reachable_licenses(self, license_vertex):
+        """Get frozenset of licenses reachable from the given license vertex, including its own."""
+        return frozenset(x.get_prop_value('license')
+                         for x in license_vertex.get_reachable_vertices())
+
+    def find_common_reachable_vertices(self, license_vertices):
+        """Find vertices reachable from all the given license vertices."""
+        return DirectedGraph.find_common_reachable_vertices(license_vertices)
+
+    def get_compatibility_classes(self, lic):
+        """Get representative licenses of the compatibility classes the license falls into."""
+        list_comp_classes = []
+        for comp_class, comp_licenses in self.dict_compatibility_classes.items():
+            if lic in comp_licenses:
+                list_comp_classes.append(comp_class)
+        return list_comp_classes
+
+
+class BitsetBackend(AnalysisBackend):
+    """Backend that answers the queries from precomputed bitsets.
+
+    Each vertex gets a bit, vertices reachable from a vertex are kept as an
+    integer bitmask together with their traversal order, so the join of any
+    number of vertices is a bitwise AND followed by a single filtering pass.
+    """
+
+    name = 'bitset'
+
+    def __init__(self, g, dict_compatibility_classes):
+        """Initialize the backend and precompute reachability bitsets."""
+        super().__init__(g, dict_compatibility_classes)
+        self._vertex_bits = {v.id: 1 << i for i, v in enumerate(g.get_vertices())}
+        # vertex ID -> ( bitmask of reachable vertices, reachable vertices in traversal order )
+        self._reachable = {}
+        for v in g.get_vertices():
+            list_reachable = tuple(v.get_reachable_vertices())
+            mask = 0
+            for x in list_reachable:
+                mask |= self._vertex_bits[x.id]
+            self._reachable[v.id] = (mask, list_reachable)
+
+        # license -> compatibility classes, in the order of dict_compatibility_classes
+        self._license_classes = {}
+        for comp_class, comp_licenses in dict_compatibility_classes.items():
+            for lic in comp_licenses:
+                self._license_classes.setdefault(lic, []).append(comp_class)
+
+    def get_reachable_licenses(self, license_vertex):
+        """Get frozenset of licenses reachable from the given license vertex, including its own."""
+        return frozenset(x.get_prop_value('license')
+                         for x in self._reachable[license_vertex.id][1])
+
+    def find_common_reachable_vertices(self, license_vertices):
+        """Find vertices reachable from all the given license vertices."""
+        if not license_vertices:
+            return None
+        mask = -1
+        for v in license_vertices:
+            mask &= self._reachable[v.id][0]
+        first_reachable = self._reachable[license_vertices[0].id][1]
+        return [x for x in first_reachable if mask & self._vertex_bits[x.id]]
+
+    def get_compatibility_classes(self, lic):
+        """Get representative licenses of the compatibility classes the license falls into."""
+        return list(self._license_classes.get(lic, []))
+
+
+class VectorizedBackend(AnalysisBackend):
+    """Backend that keeps reachability as a boolean matrix and joins with numpy.
+
+    The join of many vertices is a single vectorized reduction, which pays
+    off for batch jobs with large stacks. It needs numpy to be installed.
+    """
+
+    name = 'vectorized'
+
+    def __init__(self, g, dict_compatibility_classes):
+        """Initialize the backend and precompute reachability matrix."""
+        if numpy is None:
+            raise ImportError("The vectorized analysis backend requires numpy")
+        super().__init__(g, dict_compatibility_classes)
+        vertices = g.get_vertices()
+        self._vertex_index = {v.id: i for i, v in enumerate(vertices)}
+        self._reachable_order = {}
+        self._reachable_matrix = numpy.zeros((len(vertices), len(vertices)), dtype=bool)
+        for v in vertices:
+            list_reachable = tuple(v.get_reachable_vertices())
+            self._reachable_order[v.id] = list_reachable
+            self._reachable_matrix[self._vertex_index[v.id],
+                                   [self._vertex_index[x.id] for x in list_reachable]] = True
+
+        # compatibility classes x licenses membership matrix
+        self._classes = list(dict_compatibility_classes.keys())
+        self._class_licenses = sorted(set(itertools.chain.from_iterable(
+            dict_compatibility_classes.values())))
+        self._class_license_index = {lic: i for i, lic in enumerate(self._class_licenses)}
+        self._membership_matrix = numpy.zeros((len(self._classes), len(self._class_licenses)),
+                                              dtype=bool)
+        for i, comp_class in enumerate(self._classes):
+            for lic in dict_compatibility_classes[comp_class]:
+                self._membership_matrix[i, self._class_license_index[lic]] = True
+
+    def get_reachable_licenses(self, license_vertex):
+        """Get frozenset of licenses reachable from the given license vertex, including its own."""
+        return frozenset(x.get_prop_value('license')
+                         for x in self._reachable_order[license_vertex.id])
+
+    def find_common_reachable_vertices(self, license_vertices):
+        """Find vertices reachable from all the given license vertices."""
+        if not license_vertices:
+            return None
+        rows = [self._vertex_index[v.id] for v in license_vertices]
+        common = self._reachable_matrix[rows].all(axis=0)
+        first_reachable = self._reachable_order[license_vertices[0].id]
+        return [x for x in first_reachable if common[self._vertex_index[x.id]]]
+
+    def get_compatibility_classes(self, lic):
+        """Get representative licenses of the compatibility classes the license falls into."""
+        j = self._class_license_index.get(lic)
+        if j is None:
+            return []
+        return [self._classes[i] for i in numpy.flatnonzero(self._membership_matrix[:, j])]
+
+
+BACKENDS = {backend.name: backend
+            for backend in (PythonBackend, BitsetBackend, VectorizedBackend)}
+
+
+def get_backend_class(name):
+    """Get analysis backend class by its name.
+
+    :param name: backend name, one of BACKENDS keys
+    :return: backend class
+    :raises ValueError: if there is no backend of given name
+    """
+    backend = BACKENDS.get(name)
+    if backend is None:
+        raise ValueError("Unknown license analysis backend '{}', use one of: {}"
+                         .format(name, ', '.join(sorted(BACKENDS))))
+    return backend
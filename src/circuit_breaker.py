@@ -0,0 +1,78 @@
+"""Circuit breaker guarding calls of a remote service."""
+
+import threading
+import time
+
+
+class CircuitBreaker(object):
+    """Circuit breaker guarding calls of a remote service.
+
+    The breaker opens after the given number of consecutive failures and
+    then rejects the calls, so a degraded service is not loaded any further.
+    Once the reset timeout passes, one trial call is let through: its
+    success closes the breaker, its failure opens it again.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold, reset_timeout):
+        """Initialize closed breaker.
+
+        :param failure_threshold: number of consecutive failures opening the breaker,
+                                  0 disables the breaker
+        :param reset_timeout: number of seconds the breaker stays open
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = None
+        self._lock = threading.Lock()
+        self._stats = {'failures': 0, 'rejections': 0, 'openings': 0}
+
+    @property
+    def state(self):
+        """Get state of the breaker."""
+        with self._lock:
+            return self._state
+
+    def allow_request(self):
+        """Check whether a call may be made now."""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN and \
+                    time.monotonic() - self._opened_at >= self.reset_timeout:
+                # let one trial call through
+                self._state = self.HALF_OPEN
+                return True
+            self._stats['rejections'] += 1
+            return False
+
+    def record_success(self):
+        """Record successful call."""
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+
+    def record_failure(self):
+        """Record failed call."""
+        with self._lock:
+            self._stats['failures'] += 1
+            self._failures += 1
+            if self.failure_threshold <= 0:
+                return
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self._stats['openings'] += 1
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def get_stats(self):
+        """Get state of the breaker and number of failures, rejections and openings."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['state'] = self._state
+        return stats
@@ -0,0 +1,43 @@
+import os
+
+TESTING = False
+DEBUG = True
+LOGFILE_PATH = os.environ.get("LOGFILE_PATH", "/tmp/error.log")
+SERVICE_PORT = os.environ.get("SERVICE_PORT", "")
+DATA_DIR = os.environ.get("DATA_DIR", "/")
+MAJORITY_THRESHOLD = os.environ.get("MAJORITY_THRESHOLD", "")
+BAYESIAN_JWT_AUDIENCE = os.environ.get("BAYESIAN_JWT_AUDIENCE", "")
+BAYESIAN_FETCH_PUBLIC_KEY = os.environ.get("BAYESIAN_FETCH_PUBLIC_KEY", "")
+DISABLE_AUTHENTICATION = os.environ.get("DISABLE_AUTHENTICATION", "")
+LIC_DATA_DIR = os.environ.get("LIC_DATA_DIR", "src")
+LIC_ANALYSIS_BACKEND = os.environ.get("LIC_ANALYSIS_BACKEND", "python")
+LIC_DATA_RELOAD_INTERVAL = int(os.environ.get("LIC_DATA_RELOAD_INTERVAL", "60"))
+LIC_DATA_VERSIONS_DIR = os.environ.get("LIC_DATA_VERSIONS_DIR",
+                                       os.path.join(LIC_DATA_DIR, "versions"))
+LIC_DATA_VERSIONS_MEMORY_MB = int(os.environ.get("LIC_DATA_VERSIONS_MEMORY_MB", "16"))
+CONFLICT_REMOVAL_TIME_BUDGET = float(os.environ.get("CONFLICT_REMOVAL_TIME_BUDGET", "0.05"))
+RESULT_CACHE_SIZE = int(os.environ.get("RESULT_CACHE_SIZE", "1024"))
+RESULT_CACHE_TTL = float(os.environ.get("RESULT_CACHE_TTL", "3600"))
+PACKAGE_CACHE_PATH = os.environ.get("PACKAGE_CACHE_PATH",
+                                    "/tmp/license-analysis/package_cache.sqlite")
+PACKAGE_CACHE_TTL = float(os.environ.get("PACKAGE_CACHE_TTL", str(7 * 24 * 3600)))
+PACKAGE_CACHE_NEGATIVE_TTL = float(os.environ.get("PACKAGE_CACHE_NEGATIVE_TTL", "3600"))
+PACKAGE_CACHE_MAX_ENTRIES = int(os.environ.get("PACKAGE_CACHE_MAX_ENTRIES", "100000"))
+GREMLIN_MAX_IN_FLIGHT = int(os.environ.get("GREMLIN_MAX_IN_FLIGHT", "16"))
+GREMLIN_BATCH_SIZE = int(os.environ.get("GREMLIN_BATCH_SIZE", "0"))
+GREMLIN_POOL_SIZE = int(os.environ.get("GREMLIN_POOL_SIZE", "32"))
+GREMLIN_CONNECT_TIMEOUT = float(os.environ.get("GREMLIN_CONNECT_TIMEOUT", "3.05"))
+GREMLIN_READ_TIMEOUT = float(os.environ.get("GREMLIN_READ_TIMEOUT", "30"))
+GREMLIN_RETRIES = int(os.environ.get("GREMLIN_RETRIES", "3"))
+GREMLIN_RETRY_BACKOFF = float(os.environ.get("GREMLIN_RETRY_BACKOFF", "0.2"))
+GREMLIN_DEADLINE = float(os.environ.get("GREMLIN_DEADLINE", "10"))
+GREMLIN_BREAKER_THRESHOLD = int(os.environ.get("GREMLIN_BREAKER_THRESHOLD", "5"))
+GREMLIN_BREAKER_RESET_TIMEOUT = float(os.environ.get("GREMLIN_BREAKER_RESET_TIMEOUT", "30"))
+GREMLIN_HEDGE_PERCENTILE = float(os.environ.get("GREMLIN_HEDGE_PERCENTILE", "0"))
+GREMLIN_HEDGE_MIN_DELAY = float(os.environ.get("GREMLIN_HEDGE_MIN_DELAY", "0.05"))
+GREMLIN_HEDGE_MAX_IN_FLIGHT = int(os.environ.get("GREMLIN_HEDGE_MAX_IN_FLIGHT", "4"))
+GREMLIN_MICRO_BATCH_WINDOW = float(os.environ.get("GREMLIN_MICRO_BATCH_WINDOW", "0"))
+GREMLIN_MICRO_BATCH_SIZE = int(os.environ.get("GREMLIN_MICRO_BATCH_SIZE", "100"))
+GREMLIN_MICRO_BATCH_MAX_QUEUED = int(os.environ.get("GREMLIN_MICRO_BATCH_MAX_QUEUED", "16"))
+ANALYSIS_STATE_CACHE_SIZE = int(os.environ.get("ANALYSIS_STATE_CACHE_SIZE", "256"))
+ANALYSIS_STATE_CACHE_TTL = float(os.environ.get("ANALYSIS_STATE_CACHE_TTL", "86400"))
@@ -0,0 +1,42 @@
+"""Tracker of recent call latencies."""
+
+import math
+import threading
+from collections import deque
+
+
+class LatencyTracker(object):
+    """Tracker of recent call latencies.
+
+    Only the latest latencies are kept, so percentiles follow the current
+    behaviour of the called service.
+    """
+
+    def __init__(self, window=1000, min_samples=20):
+        """Initialize empty tracker.
+
+        :param window: number of latest latencies kept
+        :param min_samples: number of latencies needed to compute percentiles
+        """
+        self.min_samples = min_samples
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        """Record latency of one call."""
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def get_percentile(self, percentile):
+        """Get percentile of the recent latencies.
+
+        :param percentile: percentile in (0, 100]
+        :return: latency in seconds or None if there are not enough latencies
+        """
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return None
+            latencies = sorted(self._latencies)
+        # nearest-rank method
+        rank = max(int(math.ceil(percentile / 100.0 * len(latencies))), 1)
+        return latencies[rank - 1]
@@ -2,10 +2,16 @@
 
 from math import ceil
 
-import itertools
+import hashlib
+import threading
+import time
+from collections import Counter
 
+from src.analysis_backends import get_backend_class
 from src.directed_graph import DirectedGraph
-from src.config import MAJORITY_THRESHOLD
+from src.license_policy import LicensePolicy
+from src.synonym_registry import synonym_registry
+from src.config import MAJORITY_THRESHOLD, LIC_ANALYSIS_BACKEND
 
 
 class LicenseAnalyzer(object):
@@ -16,13 +22,33 @@ class LicenseAnalyzer(object):
     - finds conflicting licenses
     - locates outlier licenses
     - flags unknown licenses
+
+    An analyzer instance is a snapshot of the license data it was built from:
+    nothing but the hit counters is modified after construction, so a single
+    instance can be shared by concurrent requests and replaced as a whole when
+    the data changes. Type-compatibility-classes, which are needed for outliers
+    only, are computed on their first use.
     """
 
-    def __init__(self, graph_store, synonyms_store):
-        """Initialize the analyzer and read known synonyms."""
+    # tiers of compute_representative_license(), the fast ones come first
+    ANALYSIS_PATHS = ('single', 'identical', 'type_class', 'full')
+
+    def __init__(self, graph_store, synonyms_store, policies_store=None,
+                 backend=LIC_ANALYSIS_BACKEND):
+        """Initialize the analyzer, read known synonyms and compile license policies.
+
+        :param graph_store: data store with the license graph
+        :param synonyms_store: data store with the license synonyms
+        :param policies_store: optional data store with the license policies
+        :param backend: name of the backend for graph algorithms, see src.analysis_backends
+        """
+        # version is computed before reading the data, so any change made while
+        # loading is going to be noticed by the next version check
+        self.data_version = self.get_data_version(graph_store, synonyms_store, policies_store)
+
         # load graph from given data store
         self.g = DirectedGraph.read_from_json(graph_store)
-        self.known_licenses = [
+        self.known_licenses = (
             'public domain',
             'mit',
             'bsd-new',
@@ -56,23 +82,67 @@ class LicenseAnalyzer(object):
             'zpl 2.1',
             'zpl 2.0',
             'jquery'
-        ]
+        )
 
         # IMPORTANT: Order matters in the following tuple
         self.license_type_tuple = ('P', 'WP', 'SP', 'NP')
 
-        # read the json that contains known synonyms
-        list_synonym_jsons = synonyms_store.list_files()
-        for synonym_json in list_synonym_jsons:
-            self.syn = synonyms_store.read_json_file(synonym_json)
-            break  # currently only one synonym json is supported
+        # default share of licenses that makes majority when looking for outliers
+        self.majority_threshold = float(MAJORITY_THRESHOLD) if MAJORITY_THRESHOLD else None
+
+        # known synonyms are shared with other analyzers built from the same data store
+        self.synonyms_version, self.syn = synonym_registry.get_synonyms(synonyms_store)
 
         # identify compatibility classes among the licenses in graph
         self.dict_compatibility_classes = {}
-        self.dict_type_compatibility_classes = {}
-
         self._find_compatibility_classes()
-        self._find_type_compatibility_classes()
+
+        # reachability, join, compatibility classes and conflicts are answered by the backend
+        self.backend = get_backend_class(backend)(self.g, self.dict_compatibility_classes)
+
+        # type-compatibility-classes are computed on first use, see the properties below
+        self._dict_type_compatibility_classes = None
+        self._dict_license_type_compatibility_classes = None
+        self._lazy_data_lock = threading.Lock()
+
+        # identify type of each license and licenses reachable from it
+        self.dict_license_types = {}
+        self.dict_reachable_licenses = {}
+        self._find_reachable_licenses()
+
+        # intern licenses i.e. give each license a bit in bitmasks
+        self.list_mask_licenses = sorted(self.dict_license_types.keys())
+        self.dict_license_masks = {}
+        self.dict_reachable_masks = {}
+        self._find_license_masks()
+
+        # number of analyses answered by each tier of compute_representative_license(),
+        # the lock is held for an increment only, which is negligible next to an analysis
+        self._path_counts = Counter()
+        self._path_counts_lock = threading.Lock()
+
+        # compile license policies, if there are any
+        self.policies = {}
+        if policies_store is not None:
+            for policy_json in policies_store.list_files():
+                policy = LicensePolicy.compile(self, policies_store.read_json_file(policy_json))
+                self.policies[policy.name] = policy
+
+    @staticmethod
+    def get_data_version(graph_store, synonyms_store, policies_store=None):
+        """Compute version identifier of the license data held by given data stores.
+
+        :param graph_store: data store with the license graph
+        :param synonyms_store: data store with the license synonyms
+        :param policies_store: optional data store with the license policies
+        :return: version identifier as a short hexadecimal string
+        """
+        digest = hashlib.sha1()
+        digest.update(graph_store.get_fingerprint().encode("utf-8"))
+        digest.update(synonyms_store.get_fingerprint().encode("utf-8"))
+        if policies_store is not None:
+            digest.update(policies_store.get_fingerprint().encode("utf-8"))
+        return digest.hexdigest()[:12]
 
     def graph_node_identifier(self, lic):
         """Provide the graph node identifier if a node exists for multiple licenses."""
@@ -160,7 +230,34 @@ class LicenseAnalyzer(object):
             v = self.g.find_vertex(prop_name='license', prop_value=lic)
             self._print_license_vertex(v)
 
-    def _find_walks_within_type(self, v, lic_type, current_walk):
+    def _ensure_type_compatibility_classes(self):
+        """Compute type-compatibility-classes unless it has been done already."""
+        if self._dict_license_type_compatibility_classes is not None:
+            return
+        with self._lazy_data_lock:
+            # another thread might have computed them while we were waiting
+            if self._dict_license_type_compatibility_classes is not None:
+                return
+            dict_type_compatibility_classes = self._find_type_compatibility_classes()
+
+            # license -> classes it falls into, in the order of the classes above
+            dict_license_classes = {}
+            for t, dict_compatibles in dict_type_compatibility_classes.items():
+                for tcc_lic, list_compatibles in dict_compatibles.items():
+                    for lic in list_compatibles:
+                        dict_license_classes.setdefault(lic, []).append((tcc_lic, t))
+
+            self._dict_type_compatibility_classes = dict_type_compatibility_classes
+            # assigned last as it marks the computation as done
+            self._dict_license_type_compatibility_classes = dict_license_classes
+
+    @property
+    def dict_type_compatibility_classes(self):
+        """Get type-compatibility-classes, see _find_type_compatibility_classes()."""
+        self._ensure_type_compatibility_classes()
+        return self._dict_type_compatibility_classes
+
+    def _find_walks_within_type(self, v, lic_type, current_walk, dict_type_compatibility_classes):
         """Find all possible walks of license vertices within the scope of given license-type.
 
         These walks will help identify compatibility classes
@@ -169,11 +266,12 @@ class LicenseAnalyzer(object):
         IMPORTANT: It is assumed that license graph is a DAG i.e. no cycles.
 
         Please note that this function has a side effect i.e. its output is
-        stored in the object variable 'dict_type_compatibility_classes'.
+        stored in the given 'dict_type_compatibility_classes'.
 
         :param v: root vertex from where walks will start
         :param lic_type: type of license that defines scope for walks
         :param current_walk: book keeping variable
+        :param dict_type_compatibility_classes: type-compatibility-classes found so far
         :return: None
         """
         current_walk.append(v)
@@ -186,14 +284,15 @@ class LicenseAnalyzer(object):
             # print(', '.join(lic_walk))
 
             v_license = v.get_prop_value('license')
-            dict_compatibles = self.dict_type_compatibility_classes.get(lic_type, {})
+            dict_compatibles = dict_type_compatibility_classes.get(lic_type, {})
             list_compatibles = dict_compatibles.get(v_license, [])
             list_compatibles += lic_walk
             dict_compatibles[v_license] = list_compatibles
-            self.dict_type_compatibility_classes[lic_type] = dict_compatibles
+            dict_type_compatibility_classes[lic_type] = dict_compatibles
         else:
             for n in neighbours:
-                self._find_walks_within_type(n, lic_type, current_walk)
+                self._find_walks_within_type(n, lic_type, current_walk,
+                                             dict_type_compatibility_classes)
         current_walk.pop()
 
     def _find_type_compatibility_classes(self):
@@ -230,19 +329,21 @@ class LicenseAnalyzer(object):
         Note: type compatible classes are useful for identifying license based
         outlier packages.
 
-        :return: None
+        :return: dict with type compatible classes
         """
+        dict_type_compatibility_classes = {}
         for v in self.g.get_vertices():
             lic_type = v.get_prop_value('type')
-            self._find_walks_within_type(v, lic_type, [])
+            self._find_walks_within_type(v, lic_type, [], dict_type_compatibility_classes)
 
         # deduplicate the member licenses of each type compatibility class
-        for t in self.dict_type_compatibility_classes.keys():
-            dict_compatibles = self.dict_type_compatibility_classes.get(t, {})
+        for t in dict_type_compatibility_classes.keys():
+            dict_compatibles = dict_type_compatibility_classes.get(t, {})
             for lic in dict_compatibles.keys():
                 list_compatibles = dict_compatibles.get(lic, [])
                 list_compatibles = list(set(list_compatibles))
                 dict_compatibles[lic] = list_compatibles
+        return dict_type_compatibility_classes
 
     def _find_walks(self, v, current_walk):
         """Find all possible walks of license vertices.
@@ -311,68 +412,164 @@ class LicenseAnalyzer(object):
             list_compatibles = list(set(list_compatibles))
             self.dict_compatibility_classes[lic] = list_compatibles
 
-    def _find_conflict_licenses(self, license_vertices):
-        """Identify conflicting licenses among the given list.
+    def _find_reachable_licenses(self):
+        """Identify licenses reachable from each license vertex.
 
-        Note that this method assumes that there is a conflict in the input licenses.
+        A license is reachable from another one if it can be used as the
+        representative license for both of them. Reachable licenses of each
+        vertex are kept in dict_reachable_licenses as follows:
+          dict_reachable_licenses:
+            license: frozenset of reachable licenses ( including itself )
 
-        When there is a conflict in the given list of licenses then it is
-        guaranteed that all of them cannot be members of the same compatibility class.
-        Otherwise, there would have been a representative license identified.
+        :return: None
+        """
+        for v in self.g.get_vertices():
+            reachable_licenses = self.backend.get_reachable_licenses(v)
+            self.dict_license_types[v.get_prop_value('license')] = v.get_prop_value('type')
+            self.dict_reachable_licenses[v.get_prop_value('license')] = reachable_licenses
 
-        This method distributes the given licenses into their respective compatibility
-        classes and then prepares output with each pair of conflicting licenses.
+    def _find_license_masks(self):
+        """Assign a bit to each license and compute bitmasks of reachable licenses.
 
-        :param license_vertices: license vertices that have some conflicting licenses
-        :return: list of pairs of conflicting licenses
+        :return: None
         """
-        # first, let us find out compatibility classes for each vertex
-        vertex2groups = {}
-        for v in license_vertices:
-            for item in self.dict_compatibility_classes.items():
-                if v.get_prop_value('license') in item[1]:
-                    vertex_groups = vertex2groups.get(v, [])
-                    vertex_groups.append(item[0])
-                    vertex2groups[v] = vertex_groups
-
-        # also, we need to gather total unique classes for input vertices
-        list_groups = []
-        for v in license_vertices:
-            vertex_groups = vertex2groups.get(v)
-            if vertex_groups:
-                list_groups += vertex_groups
+        for i, lic in enumerate(self.list_mask_licenses):
+            self.dict_license_masks[lic] = 1 << i
 
-        # create a dictionary to store vertex licenses per compatibility class
-        list_groups = list(set(list_groups))
-        assert len(list_groups) > 1
+        for lic, reachable_licenses in self.dict_reachable_licenses.items():
+            mask = 0
+            for reachable_lic in reachable_licenses:
+                mask |= self.dict_license_masks[reachable_lic]
+            self.dict_reachable_masks[lic] = mask
 
-        list_items = [(x, []) for x in list_groups]
-        map_groups = dict(list_items)
-        # insert each vertex license into appropriate class
-        for v in license_vertices:
-            license = v.get_prop_value('license')
-            vertex_groups = vertex2groups.get(v, [])
-            # ignore vertex if it falls into every class
-            if set(vertex_groups) != set(list_groups):
-                for g in vertex_groups:
-                    map_groups[g].append(license)
-
-        # prepare output i.e. list of tuples with two conflicting licenses
-        output = []
-        for c1, c2 in itertools.combinations(list_groups, 2):  # nC2
-            list1 = map_groups[c1]  # list of licenses in one class
-            list2 = map_groups[c2]  # list of licenses in the other class
-            common = set(list1).intersection(set(list2))
-            list1 = list(set(list1) - common)
-            list2 = list(set(list2) - common)
-            for l1 in list1:
-                for l2 in list2:
-                    output.append(tuple(sorted((l1, l2))))
-
-        # deduplicate the output tuples
-        output = list(set(output))
+    def get_licenses_from_mask(self, mask):
+        """Get names of the licenses whose bits are set in the given bitmask."""
+        return [lic for i, lic in enumerate(self.list_mask_licenses) if mask >> i & 1]
+
+    def get_policy(self, policy):
+        """Get compiled license policy.
+
+        :param policy: name of the policy loaded with license data or policy definition
+        :return: compiled policy or None if there is no policy with given name
+        :raises ValueError: if the policy definition is not valid
+        """
+        if isinstance(policy, dict):
+            return LicensePolicy.compile(self, policy)
+        return self.policies.get(policy)
+
+    def find_blocking_licenses(self, input_licenses, target_license):
+        """Find licenses that prevent the target license from being the stack license.
+
+        A license blocks the target license if the target cannot be reached from
+        it in the license graph i.e. the target cannot represent it. Unknown
+        licenses are always blocking.
+
+        :param input_licenses: list of known license names e.g. representative licenses
+        :param target_license: known license name of the desired stack license
+        :return: list of blocking licenses in the input order
+        """
+        return [lic for lic in input_licenses
+                if target_license not in self.dict_reachable_licenses.get(lic, ())]
+
+    def _get_license_type_index(self, lic):
+        return self.license_type_tuple.index(self.dict_license_types[lic])
+
+    def select_license_choices(self, list_license_choices):
+        """Pick one license of each package so that the stack license is the least restrictive.
+
+        Licenses of each package are treated as alternatives ( e.g. "MIT or GPL" )
+        instead of a conjunction. Trying all combinations would be exponential
+        in the number of packages. Instead, each license vertex is tried as the
+        stack license, starting from the least restrictive license type: the
+        first one that can be reached from at least one alternative of every
+        package wins and for each package its least restrictive alternative
+        reaching it is selected. Thus the cost is linear in the number of license
+        vertices times the total number of alternatives.
+
+        Unknown alternatives are ignored. If no stack license is possible at
+        all, the least restrictive alternative of each package is selected.
+
+        :param list_license_choices: list with alternative licenses of each package
+        :return: list with the selected license of each package ( as given in the input ),
+                 None for packages without any known license
+        """
+        list_known_choices = []
+        for choices in list_license_choices:
+            known_choices = [(lic, self.find_synonym(lic)) for lic in choices or []]
+            known_choices = [x for x in known_choices if x[1] in self.dict_license_types]
+            # least restrictive alternatives go first
+            known_choices.sort(key=lambda x: self._get_license_type_index(x[1]))
+            list_known_choices.append(known_choices)
+
+        destinations = sorted(self.dict_license_types.keys(),
+                              key=lambda x: (self._get_license_type_index(x), x))
+        for destination in destinations:
+            selected_licenses = []
+            for known_choices in list_known_choices:
+                selected = next((lic for lic, synonym in known_choices
+                                 if destination in self.dict_reachable_licenses[synonym]), None)
+                if selected is None and known_choices:
+                    break  # prune, this destination is not reachable from the package
+                selected_licenses.append(selected)
+            else:
+                return selected_licenses
+
+        return [x[0][0] if x else None for x in list_known_choices]
+
+    def find_minimal_conflict_removal(self, license_weights, time_budget=None):
+        """Find the cheapest set of licenses whose removal resolves a conflict.
+
+        A representative license exists if and only if all the licenses can
+        reach a common license vertex. So each license vertex is tried as such
+        common destination: the licenses that cannot reach it are the ones that
+        have to be removed. The destination with the lowest total weight of
+        removed licenses wins, ties are broken by the number of removed
+        licenses and then by the license type of the destination.
+
+        This search is exact and linear in the number of license vertices for
+        each input license. When the time budget runs out, the best removal
+        found so far is returned and marked as incomplete.
+
+        :param license_weights: dict mapping known license to its weight e.g. number of packages
+        :param time_budget: maximum number of seconds to spend, None means no limit
+        :return: dict with removed licenses, their total weight and completeness flag
+        """
+        deadline = None if time_budget is None else time.monotonic() + time_budget
+        best = None
+        complete = True
+        for v in self.g.get_vertices():
+            if deadline is not None and time.monotonic() > deadline:
+                complete = False
+                break
+
+            destination = v.get_prop_value('license')
+            removed_licenses = sorted(
+                lic for lic in license_weights
+                if destination not in self.dict_reachable_licenses[lic])
+            weight = sum(license_weights[lic] for lic in removed_licenses)
+            key = (weight, len(removed_licenses),
+                   self.license_type_tuple.index(v.get_prop_value('type')), destination)
+            if best is None or key < best[0]:
+                best = (key, removed_licenses)
+
+        output = {
+            'removed_licenses': best[1] if best is not None else [],
+            'weight': best[0][0] if best is not None else 0,
+            'complete': complete
+        }
         return output
 
+    def _find_conflict_licenses(self, license_vertices):
+        """Identify conflicting licenses among the given list.
+
+        Note that this method assumes that there is a conflict in the input licenses,
+        see AnalysisBackend.find_conflict_licenses() for details.
+
+        :param license_vertices: license vertices that have some conflicting licenses
+        :return: list of pairs of conflicting licenses
+        """
+        return self.backend.find_conflict_licenses(license_vertices)
+
     def _is_license_stricter(self, lic_type_a, lic_type_b):
         return self.license_type_tuple.index(lic_type_a) > \
                self.license_type_tuple.index(lic_type_b)
@@ -381,49 +578,70 @@ class LicenseAnalyzer(object):
         return self.license_type_tuple.index(lic_type_a) >= \
                self.license_type_tuple.index(lic_type_b)
 
-    def _find_outlier_licenses(self, license_vertices, stack_license_type):
-        """Identify outlier packages based on licenses.
-
-        A package is license based outlier, if
-          - its license is in minority
-          - it is not type-compatible with the licenses in majority.
-          - its license is not less restrictive than licenses in majority
+    def _get_type_compatibility_classes(self, lic):
+        """Get type-compatibility-classes the given license falls into.
 
-        Algorithm is as follows:
-          for each type-compatible class, count how many input licenses fall there
-
-          find the type-compatible class that has majority ( e.g. 60% ) of input licenses
+        :param lic: license name
+        :return: list of tuples ( class representative license, license type )
+        """
+        self._ensure_type_compatibility_classes()
+        return self._dict_license_type_compatibility_classes.get(lic, [])
 
-          if stack license type is stricter than major type compatibility class then
-            find all those licenses those fall into same or stricter type
-            return them outlier licenses
+    def _count_type_compatibility_classes(self, license_vertices):
+        """Count how many of the given license vertices fall into each type-compatibility-class.
 
-        :param license_vertices: license vertices that have some conflicting licenses
-        :param stack_license_type: stack license type
-        :return:
+        :param license_vertices: license vertices
+        :return: tuple of dicts keyed by class representative license: count of
+                 licenses, license type and list of licenses in the class
         """
-        # first, find how many vertices fall into each type-compatibility-class
         dict_tcc_count = {}
         dict_tcc_type = {}
         dict_tcc_licenses = {}
         for v in license_vertices:
-            for t in self.dict_type_compatibility_classes.keys():
-                dict_compatibles = self.dict_type_compatibility_classes.get(t, {
-                })
-                for item in dict_compatibles.items():
-                    if v.get_prop_value('license') in item[1]:
-                        dict_tcc_type[item[0]] = t
-
-                        cnt = dict_tcc_count.get(item[0], 0)
-                        cnt += 1
-                        dict_tcc_count[item[0]] = cnt
-
-                        list_licenses = dict_tcc_licenses.get(item[0], [])
-                        list_licenses.append(v.get_prop_value('license'))
-                        dict_tcc_licenses[item[0]] = list_licenses
+            v_license = v.get_prop_value('license')
+            for tcc_lic, t in self._get_type_compatibility_classes(v_license):
+                dict_tcc_type[tcc_lic] = t
+
+                cnt = dict_tcc_count.get(tcc_lic, 0)
+                cnt += 1
+                dict_tcc_count[tcc_lic] = cnt
+
+                list_licenses = dict_tcc_licenses.get(tcc_lic, [])
+                list_licenses.append(v_license)
+                dict_tcc_licenses[tcc_lic] = list_licenses
+        return dict_tcc_count, dict_tcc_type, dict_tcc_licenses
+
+    def get_majority_threshold(self, majority_threshold=None):
+        """Get majority threshold to be used for outlier detection.
+
+        :param majority_threshold: threshold requested by the caller, None for the default one
+        :return: threshold as a float
+        :raises ValueError: if the threshold is not a number in (0, 1] or it is not configured
+        """
+        if majority_threshold is None:
+            majority_threshold = self.majority_threshold
+            if majority_threshold is None:
+                raise ValueError("MAJORITY_THRESHOLD is not configured")
+        majority_threshold = float(majority_threshold)
+        if not 0 < majority_threshold <= 1:
+            raise ValueError("Majority threshold must be in (0, 1]: {}".format(majority_threshold))
+        return majority_threshold
+
+    def _find_outliers_in_type_compatibility_classes(self, tcc_counts, num_licenses,
+                                                     stack_license_type, majority_threshold=None):
+        """Identify outlier licenses from the counts of type-compatibility-classes.
+
+        :param tcc_counts: output of _count_type_compatibility_classes()
+        :param num_licenses: total number of counted licenses
+        :param stack_license_type: stack license type
+        :param majority_threshold: share of licenses that makes majority, None for the default
+        :return: list of outlier licenses
+        """
+        dict_tcc_count, dict_tcc_type, dict_tcc_licenses = tcc_counts
+
         # check if there is a type-compatibility-class with majority
-        majority = ceil(len(license_vertices) *
-                        float(MAJORITY_THRESHOLD))
+        majority = ceil(num_licenses *
+                        self.get_majority_threshold(majority_threshold))
         major_tcc_lic = None
         for lic in dict_tcc_count.keys():
             if dict_tcc_count[lic] >= majority:
@@ -445,8 +663,110 @@ class LicenseAnalyzer(object):
 
         return []
 
+    def _find_outlier_licenses(self, license_vertices, stack_license_type,
+                               majority_threshold=None):
+        """Identify outlier packages based on licenses.
+
+        A package is license based outlier, if
+          - its license is in minority
+          - it is not type-compatible with the licenses in majority.
+          - its license is not less restrictive than licenses in majority
+
+        Algorithm is as follows:
+          for each type-compatible class, count how many input licenses fall there
+
+          find the type-compatible class that has majority ( e.g. 60% ) of input licenses
+
+          if stack license type is stricter than major type compatibility class then
+            find all those licenses those fall into same or stricter type
+            return them outlier licenses
+
+        :param license_vertices: license vertices that have some conflicting licenses
+        :param stack_license_type: stack license type
+        :param majority_threshold: share of licenses that makes majority, None for the default
+        :return:
+        """
+        # first, find how many vertices fall into each type-compatibility-class
+        tcc_counts = self._count_type_compatibility_classes(license_vertices)
+        return self._find_outliers_in_type_compatibility_classes(
+            tcc_counts, len(license_vertices), stack_license_type, majority_threshold)
+
+    def _select_representative_license(self, reachable_vertices, license_vertex_ids):
+        """Select representative license among the common reachable vertices.
+
+        If one of the input licenses is among them, it is the representative
+        one. Otherwise, the least restrictive one is picked up.
+
+        :param reachable_vertices: vertices reachable from all the input license vertices
+        :param license_vertex_ids: IDs of the input license vertices
+        :return: representative license or None if it cannot be selected
+        """
+        # Check if one of the input licenses is the representative one
+        common_destination = None
+        for v in reachable_vertices:
+            if v.id in license_vertex_ids:
+                common_destination = v  # TODO: should we break after this ?
+
+        if common_destination is not None:
+            return common_destination.get_prop_value(prop_name='license')
+
+        # If one of the input licenses is NOT the representative one, then
+        # let us pick up the least restrictive one
+        for license_type in self.license_type_tuple:
+            list_common_destinations = [
+                x
+                for x in reachable_vertices
+                if x.get_prop_value(prop_name='type') == license_type
+            ]
+            if len(list_common_destinations) > 0:
+                return list_common_destinations[0].get_prop_value(prop_name='license')
+
+        return None
+
+    def _find_fast_path_license(self, input_lic_synonyms):
+        """Find representative license without graph traversal, if it is possible.
+
+        The following tiers are tried:
+        - 'single': there is just one input license
+        - 'identical': all the input licenses are the same
+        - 'type_class': all the input licenses are of the same type and one of
+          them is reachable from all the others
+
+        In each case one of the input licenses is the representative one and
+        every type-compatibility-class of the input licenses is of the same
+        type as the representative license, so there can be no outliers.
+
+        :param input_lic_synonyms: list of known input licenses
+        :return: tuple (tier, representative license) or (None, None)
+        """
+        distinct_licenses = set(input_lic_synonyms)
+        if not distinct_licenses.issubset(self.dict_license_types):
+            return None, None
+
+        if len(input_lic_synonyms) == 1:
+            return 'single', input_lic_synonyms[0]
+        if len(distinct_licenses) == 1:
+            return 'identical', input_lic_synonyms[0]
+
+        if len(set(self.dict_license_types[x] for x in distinct_licenses)) == 1:
+            for lic in distinct_licenses:
+                if all(lic in self.dict_reachable_licenses[x] for x in distinct_licenses):
+                    return 'type_class', lic
+
+        return None, None
+
+    def _count_path(self, path):
+        with self._path_counts_lock:
+            self._path_counts[path] += 1
+
+    def get_path_counts(self):
+        """Get number of analyses answered by each tier of compute_representative_license()."""
+        with self._path_counts_lock:
+            return {path: self._path_counts[path] for path in self.ANALYSIS_PATHS}
+
     # TODO: needs refactoring
-    def compute_representative_license(self, input_licenses):
+    def compute_representative_license(self, input_licenses, find_outliers=True,
+                                       majority_threshold=None):
         """Compute representative license for given list of licenses.
 
         First, it tries to identify the input licenses by using known synonyms.
@@ -464,11 +784,22 @@ class LicenseAnalyzer(object):
         representative license. Note that we also try to find outlier
         licenses when representative license is available.
 
+        Inputs whose representative license is one of the input licenses and
+        that cannot have outliers skip the graph traversal altogether, see
+        _find_fast_path_license().
+
         [1] https://www.dwheeler.com/essays/floss-license-slide.html
 
         :param input_licenses: list of input licenses
+        :param find_outliers: False to skip the outliers, 'outlier_licenses' is left empty then
+        :param majority_threshold: share of licenses that makes majority when looking for
+                                   outliers, None for MAJORITY_THRESHOLD
         :return: representative license with supporting information
+        :raises ValueError: if the majority threshold is invalid
         """
+        if majority_threshold is not None:
+            majority_threshold = self.get_majority_threshold(majority_threshold)
+
         output = {
             'status': 'Failure',
             'reason': 'Input is invalid',
@@ -496,6 +827,15 @@ class LicenseAnalyzer(object):
             output['representative_license'] = None
             return output
 
+        # Most of the inputs can be answered without graph traversal
+        path, representative_license = self._find_fast_path_license(input_lic_synonyms)
+        self._count_path(path or 'full')
+        if representative_license is not None:
+            output['status'] = 'Successful'
+            output['reason'] = 'Representative license found'
+            output['representative_license'] = representative_license
+            return output
+
         # Let's try to find a representative license
         # First, we need to find vertices for input licenses
         license_vertices = []
@@ -506,7 +846,7 @@ class LicenseAnalyzer(object):
         assert len(license_vertices) == len(input_lic_synonyms)
 
         # Find common reachable vertices from input license vertices
-        reachable_vertices = DirectedGraph.find_common_reachable_vertices(license_vertices)
+        reachable_vertices = self.backend.find_common_reachable_vertices(license_vertices)
         if len(reachable_vertices) == 0:  # i.e. conflict
             output['status'] = 'Conflict'
             output['reason'] = 'Some licenses are in conflict'
@@ -515,43 +855,21 @@ class LicenseAnalyzer(object):
             return output
 
         # Some representative license is possible :)
-        # Check if one of the input licenses is the representative one
-        common_destination = None
         license_vertex_ids = [x.id for x in license_vertices]
-        for v in reachable_vertices:
-            if v.id in license_vertex_ids:
-                common_destination = v  # TODO: should we break after this ?
-
-        if common_destination is not None:
+        representative_license = self._select_representative_license(reachable_vertices,
+                                                                     license_vertex_ids)
+        if representative_license is not None:
             output['status'] = 'Successful'
             output['reason'] = 'Representative license found'
-            output['representative_license'] = \
-                common_destination.get_prop_value(prop_name='license')
-
-            rep_lic_vertex = self.g.find_vertex('license', output['representative_license'])
-            rep_lic_type = rep_lic_vertex.get_prop_value('type')
-            output['outlier_licenses'] = self._find_outlier_licenses(license_vertices, rep_lic_type)
-            return output
-
-        # If one of the input licenses is NOT the representative one, then
-        # let us pick up the least restrictive one
-        for license_type in self.license_type_tuple:
-            list_common_destinations = [
-                x
-                for x in reachable_vertices
-                if x.get_prop_value(prop_name='type') == license_type
-            ]
-            if len(list_common_destinations) > 0:
-                output['status'] = 'Successful'
-                output['reason'] = 'Representative license found'
-                output['representative_license'] = \
-                    list_common_destinations[0].get_prop_value(prop_name='license')
+            output['representative_license'] = representative_license
 
+            if find_outliers:
                 rep_lic_vertex = self.g.find_vertex('license', output['representative_license'])
                 rep_lic_type = rep_lic_vertex.get_prop_value('type')
                 output['outlier_licenses'] = self._find_outlier_licenses(license_vertices,
-                                                                         rep_lic_type)
-                return output
+                                                                         rep_lic_type,
+                                                                         majority_threshold)
+            return output
 
         # We should have returned by now ! Returning from here is unexpected !
         output['status'] = 'Failure'
@@ -559,13 +877,36 @@ class LicenseAnalyzer(object):
         output['representative_license'] = None
         return output
 
-    def _get_compatibility_classes(self, input_license):
-        list_comp_classes = []
-        for comp_class, comp_licenses in self.dict_compatibility_classes.items():
-            if input_license in comp_licenses:
-                list_comp_classes.append(comp_class)
+    def sweep_outlier_licenses(self, input_licenses, majority_thresholds):
+        """Find outlier licenses for each of the given majority thresholds.
+
+        The representative license and the counts of type-compatibility-classes
+        are computed just once, then only the majority check is repeated for
+        each threshold. It is meant for tuning the outlier sensitivity.
 
-        return list_comp_classes
+        :param input_licenses: list of input licenses
+        :param majority_thresholds: list of majority thresholds to evaluate
+        :return: dict threshold -> list of outlier licenses, empty if there is no
+                 representative license
+        :raises ValueError: if some of the majority thresholds is invalid
+        """
+        majority_thresholds = [self.get_majority_threshold(x) for x in majority_thresholds]
+        output = self.compute_representative_license(input_licenses, find_outliers=False)
+        if output['status'] != 'Successful':
+            return {}
+
+        license_vertices = [self.g.find_vertex('license', self.find_synonym(x))
+                            for x in input_licenses]
+        tcc_counts = self._count_type_compatibility_classes(license_vertices)
+        rep_lic_type = self.dict_license_types[output['representative_license']]
+        return {
+            t: self._find_outliers_in_type_compatibility_classes(
+                tcc_counts, len(license_vertices), rep_lic_type, t)
+            for t in majority_thresholds
+        }
+
+    def _get_compatibility_classes(self, input_license):
+        return self.backend.get_compatibility_classes(input_license)
 
     def check_compatibility(self, lic_a, list_lic_b):
         """Check the compatibility of two licenses."""
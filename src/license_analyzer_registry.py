@@ -0,0 +1,173 @@
+"""Class that serves license analyzers for several versions of the license data."""
+
+import logging
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+from src.license_analysis import LicenseAnalyzer
+from src.util.data_store.local_filesystem import LocalFileSystem
+from src.config import LIC_DATA_VERSIONS_DIR, LIC_DATA_VERSIONS_MEMORY_MB
+
+_logger = logging.getLogger(__name__)
+
+
+def _estimate_size(obj):
+    """Estimate memory occupied by given object including all objects it refers to."""
+    seen = set()
+    stack = [obj]
+    total_size = 0
+    while stack:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        total_size += sys.getsizeof(item)
+
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            stack.extend(item)
+        elif hasattr(item, '__dict__'):
+            stack.append(vars(item))
+    return total_size
+
+
+class LicenseAnalyzerRegistry(object):
+    """Class that serves license analyzers for several versions of the license data.
+
+    The latest license data is provided by the data reloader. Older releases
+    are kept in LIC_DATA_VERSIONS_DIR, one subdirectory per version, each with
+    its own 'license_graph', 'synonyms' and optional 'policies' directories:
+
+      LIC_DATA_VERSIONS_DIR/
+        <version>/license_graph/*.json
+        <version>/synonyms/*.json
+        <version>/policies/*.json
+
+    Analyzers for older releases are loaded lazily on the first request that
+    pins them. A release can be pinned by its name or by its data version,
+    the hash returned in the responses. Analyzers replaced by a reload of
+    the latest license data stay pinnable by their data version as well.
+    Loaded analyzers are kept in LRU order and the least recently used ones
+    are evicted once their estimated size exceeds the memory budget.
+    """
+
+    def __init__(self, data_reloader, versions_dir=LIC_DATA_VERSIONS_DIR,
+                 memory_budget=LIC_DATA_VERSIONS_MEMORY_MB * 1024 * 1024):
+        """Initialize the registry.
+
+        :param data_reloader: reloader providing analyzer for the latest license data
+        :param versions_dir: directory with older releases of the license data
+        :param memory_budget: maximum number of bytes occupied by analyzers of older releases
+        """
+        self.data_reloader = data_reloader
+        self.versions_dir = versions_dir
+        self.memory_budget = memory_budget
+
+        # version -> (analyzer, estimated size in bytes), least recently used first
+        self._analyzers = OrderedDict()
+        # release name -> its data version
+        self._release_data_versions = {}
+        self._latest_analyzer = data_reloader.analyzer
+        self._used_memory = 0
+        self._lock = threading.Lock()
+        # loading is serialized so the same version is never loaded twice
+        self._load_lock = threading.Lock()
+
+    def list_versions(self):
+        """Return names of all releases of license data available in the versions directory."""
+        if not os.path.isdir(self.versions_dir):
+            return []
+        return sorted(
+            x for x in os.listdir(self.versions_dir)
+            if os.path.isdir(os.path.join(self.versions_dir, x, "license_graph")) and
+            os.path.isdir(os.path.join(self.versions_dir, x, "synonyms")))
+
+    def get_used_memory(self):
+        """Return estimated number of bytes occupied by loaded analyzers of older releases."""
+        return self._used_memory
+
+    def _get_loaded_analyzer(self, version):
+        with self._lock:
+            item = self._analyzers.get(version)
+            if item is None:
+                return None
+            self._analyzers.move_to_end(version)
+            return item[0]
+
+    def _get_release_stores(self, version):
+        version_dir = os.path.join(self.versions_dir, version)
+        return (LocalFileSystem(src_dir=os.path.join(version_dir, "license_graph")),
+                LocalFileSystem(src_dir=os.path.join(version_dir, "synonyms")),
+                LocalFileSystem(src_dir=os.path.join(version_dir, "policies")))
+
+    def _find_release(self, data_version):
+        """Find name of the release with given data version, None if there is none."""
+        for version in self.list_versions():
+            if version not in self._release_data_versions:
+                self._release_data_versions[version] = LicenseAnalyzer.get_data_version(
+                    *self._get_release_stores(version))
+            if self._release_data_versions[version] == data_version:
+                return version
+        return None
+
+    def _keep_replaced_latest(self, latest_analyzer):
+        """Keep analyzer of the latest data replaced by a reload, under its data version."""
+        with self._load_lock:
+            replaced_analyzer = self._latest_analyzer
+            if replaced_analyzer is latest_analyzer:
+                return
+            self._latest_analyzer = latest_analyzer
+            if self._get_loaded_analyzer(replaced_analyzer.data_version) is None:
+                self._add_analyzer(replaced_analyzer.data_version, replaced_analyzer)
+
+    def _load_analyzer(self, version):
+        analyzer = LicenseAnalyzer(*self._get_release_stores(version))
+        self._add_analyzer(version, analyzer)
+        return analyzer
+
+    def _add_analyzer(self, version, analyzer):
+        size = _estimate_size(analyzer)
+
+        with self._lock:
+            self._analyzers[version] = (analyzer, size)
+            self._used_memory += size
+            # evict least recently used analyzers, but always keep the new one
+            while self._used_memory > self.memory_budget and len(self._analyzers) > 1:
+                evicted_version, (_, evicted_size) = self._analyzers.popitem(last=False)
+                self._used_memory -= evicted_size
+                _logger.info("Evicted analyzer for license data version {}"
+                             .format(evicted_version))
+
+    def get_analyzer(self, version=None):
+        """Return license analyzer for given version of the license data.
+
+        :param version: name of the release in the versions directory or data version
+                        of a release or of the latest data, None stands for the latest data
+        :return: license analyzer or None if the version is not known
+        :raises Exception: if the license data of the release cannot be loaded
+        """
+        latest_analyzer = self.data_reloader.analyzer
+        if latest_analyzer is not self._latest_analyzer:
+            self._keep_replaced_latest(latest_analyzer)
+        if version is None or version == latest_analyzer.data_version:
+            return latest_analyzer
+
+        analyzer = self._get_loaded_analyzer(version)
+        if analyzer is not None:
+            return analyzer
+
+        # version comes from the request, so it must name one of the known releases
+        if version not in self.list_versions():
+            version = self._find_release(version)
+            if version is None:
+                return None
+
+        with self._load_lock:
+            analyzer = self._get_loaded_analyzer(version)
+            if analyzer is None:
+                analyzer = self._load_analyzer(version)
+        return analyzer
@@ -0,0 +1,104 @@
+"""Class that keeps the license analyzer in sync with the license data."""
+
+import logging
+import os
+import threading
+
+from src.license_analysis import LicenseAnalyzer
+from src.util.data_store.local_filesystem import LocalFileSystem
+from src.config import LIC_DATA_DIR, LIC_DATA_RELOAD_INTERVAL
+
+_logger = logging.getLogger(__name__)
+
+
+class LicenseDataReloader(object):
+    """Class that keeps the license analyzer in sync with the license data.
+
+    It holds the current LicenseAnalyzer snapshot and watches the data stores
+    with license graph, synonyms and license policies. When their fingerprint
+    changes, a new snapshot is built in the background and swapped in by a
+    single attribute assignment. Readers therefore never need a lock: each request takes the
+    snapshot that is current when it starts and keeps using it till the end,
+    even if a newer one is swapped in meanwhile.
+    """
+
+    def __init__(self, graph_store=None, synonyms_store=None, policies_store=None,
+                 poll_interval=LIC_DATA_RELOAD_INTERVAL):
+        """Initialize the reloader and build the first analyzer snapshot.
+
+        :param graph_store: data store with the license graph, LIC_DATA_DIR is used by default
+        :param synonyms_store: data store with the synonyms, LIC_DATA_DIR is used by default
+        :param policies_store: data store with the policies, LIC_DATA_DIR is used by default
+        :param poll_interval: number of seconds between data checks, 0 disables polling
+        """
+        self.graph_store = graph_store or LocalFileSystem(
+            src_dir=os.path.join(LIC_DATA_DIR, "license_graph"))
+        self.synonyms_store = synonyms_store or LocalFileSystem(
+            src_dir=os.path.join(LIC_DATA_DIR, "synonyms"))
+        self.policies_store = policies_store or LocalFileSystem(
+            src_dir=os.path.join(LIC_DATA_DIR, "policies"))
+        self.poll_interval = poll_interval
+
+        self._analyzer = self._build_analyzer()
+        # serializes the writers only, readers never touch it
+        self._reload_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def _build_analyzer(self):
+        return LicenseAnalyzer(self.graph_store, self.synonyms_store, self.policies_store)
+
+    @property
+    def analyzer(self):
+        """Return the current license analyzer snapshot."""
+        return self._analyzer
+
+    def reload_if_changed(self):
+        """Build and swap in a new analyzer snapshot if the license data changed.
+
+        When the new data cannot be loaded, the current snapshot is kept and the
+        load is attempted again by the next check.
+
+        :return: True if a new snapshot was swapped in, False otherwise
+        """
+        with self._reload_lock:
+            data_version = LicenseAnalyzer.get_data_version(self.graph_store,
+                                                            self.synonyms_store,
+                                                            self.policies_store)
+            if data_version == self._analyzer.data_version:
+                return False
+
+            try:
+                analyzer = self._build_analyzer()
+            except Exception:
+                _logger.exception("Cannot load license data, keeping version {}"
+                                  .format(self._analyzer.data_version))
+                return False
+
+            _logger.info("License data changed, switching from version {} to {}"
+                         .format(self._analyzer.data_version, analyzer.data_version))
+            self._analyzer = analyzer
+            return True
+
+    def _poll(self):
+        while not self._stop_event.wait(self.poll_interval):
+            try:
+                self.reload_if_changed()
+            except Exception:
+                _logger.exception("Error checking the license data for changes!")
+
+    def start(self):
+        """Start watching the license data in a background thread."""
+        if self._thread is not None or self.poll_interval <= 0:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._poll, name="license-data-reloader")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Stop watching the license data."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
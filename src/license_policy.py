@@ -0,0 +1,91 @@
+"""Class representing compiled license policy."""
+
+
+class LicensePolicy(object):
+    """Class representing compiled license policy.
+
+    A policy consists of three lists of rules:
+    - 'allow': licenses that may be used, anything else is not allowed
+               ( an empty or missing list allows every license )
+    - 'deny': licenses that must not be used
+    - 'review': licenses that need to be reviewed before they are used
+
+    Each rule is one of:
+    - license name, synonyms are understood e.g. "Apache License, Version 2.0"
+    - {"reachable_from": license name}: the license and all the licenses
+      reachable from it in the license graph
+    - {"type": license type}: all licenses of given type e.g. "NP"
+
+    Rules are compiled into bitmasks over the license IDs of one analyzer
+    snapshot, so evaluation of a stack is just a few bit operations. Deny
+    takes precedence over review, which takes precedence over allow.
+    """
+
+    def __init__(self, name, allow_mask, deny_mask, review_mask, all_mask):
+        """Initialize the compiled policy, use LicensePolicy.compile() instead."""
+        self.name = name
+        self.allow_mask = allow_mask
+        self.deny_mask = deny_mask
+        self.review_mask = review_mask
+        self.all_mask = all_mask
+
+    @staticmethod
+    def _compile_rule(license_analyzer, rule):
+        if isinstance(rule, dict):
+            if 'reachable_from' in rule:
+                lic = license_analyzer.find_synonym(rule['reachable_from'])
+                if lic not in license_analyzer.dict_reachable_masks:
+                    raise ValueError("Unknown license in policy rule: {}".format(rule))
+                return license_analyzer.dict_reachable_masks[lic]
+            if 'type' in rule:
+                if rule['type'] not in license_analyzer.license_type_tuple:
+                    raise ValueError("Unknown license type in policy rule: {}".format(rule))
+                mask = 0
+                for lic, lic_type in license_analyzer.dict_license_types.items():
+                    if lic_type == rule['type']:
+                        mask |= license_analyzer.dict_license_masks[lic]
+                return mask
+            raise ValueError("Unsupported policy rule: {}".format(rule))
+
+        if not isinstance(rule, str):
+            raise ValueError("Unsupported policy rule: {}".format(rule))
+        lic = license_analyzer.find_synonym(rule)
+        if lic not in license_analyzer.dict_license_masks:
+            raise ValueError("Unknown license in policy rule: {}".format(rule))
+        return license_analyzer.dict_license_masks[lic]
+
+    @classmethod
+    def compile(cls, license_analyzer, policy):
+        """Compile the policy for given analyzer snapshot.
+
+        :param license_analyzer: analyzer snapshot that defines license IDs
+        :param policy: dict with 'name' and 'allow', 'deny' and 'review' lists of rules
+        :return: compiled policy
+        :raises ValueError: if the policy refers to unknown license or contains invalid rule
+        """
+        masks = {}
+        for list_name in ('allow', 'deny', 'review'):
+            mask = 0
+            for rule in policy.get(list_name) or []:
+                mask |= cls._compile_rule(license_analyzer, rule)
+            masks[list_name] = mask
+
+        all_mask = 0
+        for mask in license_analyzer.dict_license_masks.values():
+            all_mask |= mask
+
+        # no allow list means that every license is allowed
+        allow_mask = masks['allow'] if policy.get('allow') else all_mask
+        return cls(policy.get('name', 'unnamed'), allow_mask, masks['deny'], masks['review'],
+                   all_mask)
+
+    def evaluate(self, licenses_mask):
+        """Evaluate the policy for the licenses given by their bitmask.
+
+        :param licenses_mask: bitwise OR of the masks of all licenses in use
+        :return: tuple of bitmasks with denied, review and not allowed licenses
+        """
+        denied = licenses_mask & self.deny_mask
+        review = licenses_mask & self.review_mask & ~self.deny_mask
+        not_allowed = licenses_mask & ~self.allow_mask & ~self.deny_mask & ~self.review_mask
+        return denied, review, not_allowed
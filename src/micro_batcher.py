@@ -0,0 +1,166 @@
+"""Batching of calls made by concurrent requests."""
+
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+class _Batch(object):
+    """Keys collected into one batch together with their futures."""
+
+    def __init__(self):
+        self.created = time.monotonic()
+        # key -> future of its result, in the order of submission
+        self.futures = {}
+        # key -> latest deadline of its submitters, None for no deadline
+        self.deadlines = {}
+
+
+class MicroBatcher(object):
+    """Batching of calls made by concurrent requests.
+
+    Keys submitted by any thread are collected for up to `window` seconds
+    or until there are `max_size` of them, then the whole batch is passed to
+    the batch function at once and its results are routed back to the
+    submitters. A key submitted again while its batch is open shares the
+    future of the first submission. Batches run in a thread pool, so a slow
+    batch does not hold the following ones back.
+
+    Keys whose submitters have all passed their deadlines by the time the
+    batch runs are dropped, as are batches finding `max_queued` batches
+    waiting for the pool already. Futures of dropped keys are cancelled.
+    """
+
+    def __init__(self, fn, window, max_size, max_workers=4, max_queued=None):
+        """Initialize the batcher.
+
+        :param fn: function taking list of keys and the latest deadline of their submitters,
+                   None for no deadline, and returning list of their results
+        :param window: number of seconds a batch is open for
+        :param max_size: maximum number of keys in a batch
+        :param max_workers: maximum number of batches running concurrently
+        :param max_queued: maximum number of batches waiting for the pool, None for no limit
+        """
+        self.fn = fn
+        self.window = window
+        self.max_size = max_size
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self._pid = None
+        self._start_lock = threading.Lock()
+        self._queued = 0
+        self._queued_lock = threading.Lock()
+        self._stats = {'batches': 0, 'keys': 0, 'dropped_keys': 0}
+        self._stats_lock = threading.Lock()
+
+    def _start(self):
+        """Start the flusher thread, also in a forked worker process."""
+        self._cond = threading.Condition()
+        self._batch = None
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        flusher = threading.Thread(target=self._flush_expired, name='micro-batcher', daemon=True)
+        flusher.start()
+        self._pid = os.getpid()
+
+    def submit(self, key, deadline=None):
+        """Add the key to the open batch.
+
+        :param key: hashable key passed to the batch function
+        :param deadline: time.monotonic() after which the submitter does not wait for the result,
+                         None for no deadline
+        :return: future of the key result
+        """
+        if self._pid != os.getpid():
+            with self._start_lock:
+                if self._pid != os.getpid():
+                    self._start()
+        with self._cond:
+            if self._batch is None:
+                self._batch = _Batch()
+                self._cond.notify()
+            batch = self._batch
+            future = batch.futures.get(key)
+            if future is None:
+                future = Future()
+                batch.futures[key] = future
+                batch.deadlines[key] = deadline
+            elif deadline is None or batch.deadlines[key] is None:
+                batch.deadlines[key] = None
+            else:
+                batch.deadlines[key] = max(batch.deadlines[key], deadline)
+            is_full = len(batch.futures) >= self.max_size
+            if is_full:
+                self._batch = None
+        if is_full:
+            self._enqueue(batch)
+        return future
+
+    def _flush_expired(self):
+        """Run the open batch once its window passes."""
+        cond = self._cond
+        while True:
+            with cond:
+                while self._batch is None:
+                    cond.wait()
+                batch = self._batch
+                remaining = batch.created + self.window - time.monotonic()
+                while self._batch is batch and remaining > 0:
+                    cond.wait(remaining)
+                    remaining = batch.created + self.window - time.monotonic()
+                if self._batch is not batch:
+                    # the batch got full and is running already
+                    continue
+                self._batch = None
+            self._enqueue(batch)
+
+    def _enqueue(self, batch):
+        """Pass the batch to the pool unless there are too many batches waiting for it."""
+        with self._queued_lock:
+            is_dropped = self.max_queued is not None and self._queued >= self.max_queued
+            if not is_dropped:
+                self._queued += 1
+        if is_dropped:
+            self._drop(list(batch.futures.values()))
+        else:
+            self._executor.submit(self._run, batch)
+
+    def _drop(self, futures):
+        """Cancel futures of keys which are not passed to the batch function."""
+        for future in futures:
+            future.cancel()
+        with self._stats_lock:
+            self._stats['dropped_keys'] += len(futures)
+
+    def _run(self, batch):
+        """Call the batch function and set results of the batch futures."""
+        with self._queued_lock:
+            self._queued -= 1
+        # nobody waits for the keys whose submitters are past their deadlines
+        now = time.monotonic()
+        keys = [key for key, deadline in batch.deadlines.items()
+                if deadline is None or deadline > now]
+        if len(keys) < len(batch.futures):
+            live_keys = set(keys)
+            self._drop([future for key, future in batch.futures.items()
+                        if key not in live_keys])
+        if not keys:
+            return
+        deadlines = [batch.deadlines[key] for key in keys]
+        deadline = None if None in deadlines else max(deadlines)
+        with self._stats_lock:
+            self._stats['batches'] += 1
+            self._stats['keys'] += len(keys)
+        try:
+            results = self.fn(keys, deadline)
+        except Exception as e:
+            for key in keys:
+                batch.futures[key].set_exception(e)
+            return
+        for key, result in zip(keys, results):
+            batch.futures[key].set_result(result)
+
+    def get_stats(self):
+        """Get number of batches run, keys looked up by them and keys dropped."""
+        with self._stats_lock:
+            return dict(self._stats)
@@ -0,0 +1,44 @@
+"""Ecosystem aware identity of packages."""
+
+import re
+from urllib.parse import unquote
+
+# runs of separators that PyPI treats as equal, see PEP 503
+_PYPI_SEPARATORS = re.compile(r'[-_.]+')
+
+
+def normalize_package_name(ecosystem, name):
+    """Normalize package name the way its ecosystem compares the names.
+
+    - maven: group:artifact, extra coordinates ( packaging, classifier ) are dropped
+    - npm: lower case, URL encoded scopes ( %40scope%2Fname ) are decoded
+    - pypi: lower case with runs of '-', '_' and '.' replaced by single '-'
+
+    :param ecosystem: package ecosystem
+    :param name: package name
+    :return: normalized name, None for missing name
+    """
+    if name is None:
+        return None
+    name = name.strip()
+    ecosystem = (ecosystem or '').strip().lower()
+    if ecosystem == 'maven':
+        return ':'.join(part.strip() for part in name.split(':')[:2])
+    if ecosystem == 'npm':
+        return unquote(name).lower()
+    if ecosystem == 'pypi':
+        return _PYPI_SEPARATORS.sub('-', name).lower()
+    return name
+
+
+def get_package_identity(ecosystem, name, version):
+    """Get key identifying the package version across spellings of its name.
+
+    :param ecosystem: package ecosystem
+    :param name: package name
+    :param version: package version
+    :return: tuple ( ecosystem, normalized name, version )
+    """
+    if version is not None:
+        version = str(version).strip()
+    return ((ecosystem or '').strip().lower(), normalize_package_name(ecosystem, name), version)
@@ -0,0 +1,146 @@
+"""Persistent cache of package data looked up in the graph DB."""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+_logger = logging.getLogger(__name__)
+
+
+class PackageLicenseCache(object):
+    """Persistent cache of package data looked up in the graph DB.
+
+    Results of the graph DB lookups are stored in a SQLite database in WAL
+    mode, keyed by ( ecosystem, package, version ). The database file
+    survives restarts and is shared by all the worker processes on the host.
+    Packages unknown to the graph DB are cached as negative entries with
+    a shorter TTL. Once there are more entries than allowed, expired ones
+    and then the oldest ones are removed. Errors of the database are
+    counted and logged only, packages are then looked up in the graph DB.
+    """
+
+    # the size bound is enforced after this many writes
+    CLEANUP_INTERVAL = 100
+
+    def __init__(self, path, ttl=7 * 24 * 3600, negative_ttl=3600, max_entries=100000):
+        """Initialize the cache.
+
+        :param path: path to the database file, empty path disables the cache
+        :param ttl: number of seconds package data is served for
+        :param negative_ttl: number of seconds the packages unknown to graph DB are remembered
+        :param max_entries: maximum number of cached packages
+        """
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        # connections cannot be shared by threads, nor inherited by forked workers
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._stats = {'hits': 0, 'negative_hits': 0, 'misses': 0, 'errors': 0}
+
+    @property
+    def enabled(self):
+        """Check whether the cache is enabled."""
+        return bool(self.path)
+
+    def _get_connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None and self._local.pid == os.getpid():
+            return connection
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS package_data ("
+            " ecosystem TEXT NOT NULL, package TEXT NOT NULL, version TEXT NOT NULL,"
+            " data TEXT, stored_at REAL NOT NULL, expires_at REAL NOT NULL,"
+            " PRIMARY KEY (ecosystem, package, version))")
+        connection.execute(
+            "CREATE INDEX IF NOT EXISTS package_data_stored_at ON package_data (stored_at)")
+        self._local.connection = connection
+        self._local.pid = os.getpid()
+        return connection
+
+    def _count(self, stat):
+        with self._lock:
+            self._stats[stat] += 1
+
+    def get(self, ecosystem, package, version):
+        """Get cached data of the package.
+
+        :return: tuple ( True if the package is cached, its data or None for negative entry )
+        """
+        if not self.enabled:
+            return False, None
+        try:
+            row = self._get_connection().execute(
+                "SELECT data FROM package_data"
+                " WHERE ecosystem = ? AND package = ? AND version = ? AND expires_at > ?",
+                (ecosystem, package, version, time.time())).fetchone()
+        except (sqlite3.Error, OSError):
+            _logger.exception("Cannot read from package cache {}".format(self.path))
+            self._count('errors')
+            return False, None
+
+        if row is None:
+            self._count('misses')
+            return False, None
+        if row[0] is None:
+            self._count('negative_hits')
+            return True, None
+        self._count('hits')
+        return True, json.loads(row[0])
+
+    def put(self, ecosystem, package, version, data):
+        """Store data of the package.
+
+        :param data: JSON serializable package data, None if the package is not known
+        """
+        if not self.enabled:
+            return
+        now = time.time()
+        ttl = self.negative_ttl if data is None else self.ttl
+        try:
+            self._get_connection().execute(
+                "INSERT OR REPLACE INTO package_data VALUES (?, ?, ?, ?, ?, ?)",
+                (ecosystem, package, version, None if data is None else json.dumps(data),
+                 now, now + ttl))
+        except (sqlite3.Error, OSError):
+            _logger.exception("Cannot write into package cache {}".format(self.path))
+            self._count('errors')
+            return
+
+        with self._lock:
+            self._writes += 1
+            cleanup = self._writes % self.CLEANUP_INTERVAL == 0
+        if cleanup:
+            self.cleanup()
+
+    def cleanup(self):
+        """Remove expired entries and then the oldest ones above the size bound."""
+        if not self.enabled:
+            return
+        try:
+            connection = self._get_connection()
+            connection.execute("DELETE FROM package_data WHERE expires_at <= ?", (time.time(),))
+            connection.execute(
+                "DELETE FROM package_data WHERE rowid IN ("
+                " SELECT rowid FROM package_data ORDER BY stored_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,))
+        except (sqlite3.Error, OSError):
+            _logger.exception("Cannot clean up package cache {}".format(self.path))
+            self._count('errors')
+
+    def get_stats(self):
+        """Get number of hits, negative hits, misses and errors of this process."""
+        with self._lock:
+            return dict(self._stats)
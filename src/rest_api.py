@@ -27,6 +27,8 @@ app.logger.info('App initialized, ready to roll...')
 def load_model():
     """Initialize the stack license analyzer before the first request."""
     app.stack_license_analyzer = StackLicenseAnalyzer()
+    # pick up changes of the license data without restarting the service
+    app.stack_license_analyzer.data_reloader.start()
 
 
 @app.route('/')
@@ -59,6 +61,12 @@ def stack_license_api():
     return response
 
 
+@app.route('/api/v1/metrics', methods=['GET'])
+def metrics():
+    """Handle the REST API endpoint /api/v1/metrics."""
+    return flask.jsonify(app.stack_license_analyzer.get_metrics())
+
+
 @app.errorhandler(AuthError)
 def api_401_handler(err):
     """Handle AuthError exceptions."""
@@ -0,0 +1,89 @@
+"""Bounded in-memory cache of analysis results."""
+
+import copy
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+
+class ResultCache(object):
+    """Bounded in-memory cache of analysis results.
+
+    Entries are kept in LRU order: the least recently used entry is evicted
+    when the cache is full and entries older than the TTL are never served.
+    Results are deep-copied when they are stored and when they are served,
+    so callers are free to modify them, unless copying is turned off.
+    """
+
+    def __init__(self, max_entries, ttl, copy_results=True):
+        """Initialize empty cache.
+
+        :param max_entries: maximum number of cached results, 0 disables the cache
+        :param ttl: number of seconds a result is served for, 0 or less means forever
+        :param copy_results: False to store and serve the results themselves,
+                             which then must not be modified
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.copy_results = copy_results
+        # key -> ( time of insertion, result ), least recently used first
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0}
+
+    @staticmethod
+    def compute_key(*parts):
+        """Compute cache key from JSON serializable parts, order of dict keys does not matter."""
+        canonical = json.dumps(parts, sort_keys=True, separators=(',', ':'), default=str)
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """Get copy of the cached result.
+
+        :param key: cache key
+        :return: copy of the result or None if it is not cached
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and 0 < self.ttl <= time.monotonic() - entry[0]:
+                del self._entries[key]
+                self._stats['expirations'] += 1
+                entry = None
+            if entry is None:
+                self._stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            result = entry[1]
+        return copy.deepcopy(result) if self.copy_results else result
+
+    def put(self, key, result):
+        """Store copy of the result.
+
+        :param key: cache key
+        :param result: result to be cached
+        """
+        if self.max_entries <= 0:
+            return
+        if self.copy_results:
+            result = copy.deepcopy(result)
+        with self._lock:
+            self._entries[key] = (time.monotonic(), result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def clear(self):
+        """Remove all the cached results."""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self):
+        """Get number of hits, misses, evictions, expirations and cached entries."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+        return stats
@@ -0,0 +1,72 @@
+"""Coalescing of concurrent identical calls."""
+
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight(object):
+    """Coalescing of concurrent identical calls.
+
+    The first caller of a key makes the call, callers of the same key
+    arriving while it is in flight wait for it and get its result or
+    exception instead of making their own call. Nothing is remembered once
+    the call finishes, caching is left to the callers.
+    """
+
+    def __init__(self):
+        """Initialize with no calls in flight."""
+        # key -> future of the call in flight
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def join(self, key):
+        """Join the call of the key in flight, or lead a new one.
+
+        The leader must finish the call by finish(), the other callers wait
+        for the returned future.
+
+        :param key: hashable key identifying the call
+        :return: tuple ( future of the call, True if the caller leads the call )
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                return future, False
+            future = Future()
+            self._calls[key] = future
+            return future, True
+
+    def finish(self, key, result=None, exception=None):
+        """Finish the call led by the caller, its followers get the result or exception.
+
+        :param key: key of the call
+        :param result: result of the call
+        :param exception: exception raised by the call, None if it succeeded
+        """
+        with self._lock:
+            future = self._calls.pop(key)
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+
+    def do(self, key, fn, timeout=None):
+        """Call the function unless a call of the same key is in flight.
+
+        :param key: hashable key identifying the call
+        :param fn: function with no arguments making the call
+        :param timeout: number of seconds to wait for the call in flight, None for no limit
+        :return: tuple ( result of the call, True if the result is shared with other caller )
+        :raises concurrent.futures.TimeoutError: if the call in flight did not finish in time
+        """
+        future, is_leader = self.join(key)
+        if not is_leader:
+            return future.result(timeout), True
+
+        try:
+            result = fn()
+        except Exception as e:
+            self.finish(key, exception=e)
+            raise
+        self.finish(key, result)
+        return result, False
@@ -1,23 +1,69 @@
 """Class representing stack license analyzer."""
 
+import copy
 import os
 import requests
 import json
 import flask
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED, CancelledError, \
+    TimeoutError as FuturesTimeoutError
 
 from requests.adapters import HTTPAdapter
 from requests.packages.urllib3.util.retry import Retry
 
-from src.license_analysis import LicenseAnalyzer
+from src.license_data_reloader import LicenseDataReloader
+from src.license_analyzer_registry import LicenseAnalyzerRegistry
+from src.micro_batcher import MicroBatcher
+from src.circuit_breaker import CircuitBreaker
+from src.latency_tracker import LatencyTracker
+from src.package_identity import get_package_identity
+from src.package_license_cache import PackageLicenseCache
+from src.result_cache import ResultCache
+from src.single_flight import SingleFlight
+from src.stack_license_accumulator import StackLicenseAccumulator
 import logging
 import traceback
 import semantic_version as sv
 from src.utils import http_error
-from src.util.data_store.local_filesystem import LocalFileSystem
-from src.config import LIC_DATA_DIR
+from src.config import CONFLICT_REMOVAL_TIME_BUDGET, RESULT_CACHE_SIZE, RESULT_CACHE_TTL, \
+    PACKAGE_CACHE_PATH, PACKAGE_CACHE_TTL, PACKAGE_CACHE_NEGATIVE_TTL, PACKAGE_CACHE_MAX_ENTRIES, \
+    GREMLIN_MAX_IN_FLIGHT, GREMLIN_BATCH_SIZE, GREMLIN_POOL_SIZE, GREMLIN_CONNECT_TIMEOUT, \
+    GREMLIN_READ_TIMEOUT, GREMLIN_RETRIES, GREMLIN_RETRY_BACKOFF, GREMLIN_DEADLINE, \
+    GREMLIN_BREAKER_THRESHOLD, GREMLIN_BREAKER_RESET_TIMEOUT, GREMLIN_HEDGE_PERCENTILE, \
+    GREMLIN_HEDGE_MIN_DELAY, GREMLIN_HEDGE_MAX_IN_FLIGHT, GREMLIN_MICRO_BATCH_WINDOW, \
+    GREMLIN_MICRO_BATCH_SIZE, GREMLIN_MICRO_BATCH_MAX_QUEUED, ANALYSIS_STATE_CACHE_SIZE, \
+    ANALYSIS_STATE_CACHE_TTL
 
 _logger = logging.getLogger(__name__)
 
+# marks packages whose graph DB lookup was not made
+_NOT_LOOKED_UP = object()
+
+# state of a stack analysis kept for delta analyses, it must not be modified
+_AnalysisState = namedtuple('_AnalysisState', ['license_analyzer', 'majority_threshold',
+                                               'packages', 'accumulator'])
+
+# payload attributes of delta stack analysis
+DELTA_ATTRIBUTES = ('previous_analysis_fingerprint', 'added', 'removed', 'changed')
+
+# only the properties used by extract_component_details() are returned
+_PACKAGE_PROJECTION = \
+    ".as('version').in('has_version').as('package')" \
+    ".select('version','package')" \
+    ".by(valueMap('pecosystem', 'pname', 'version', 'declared_licenses'))" \
+    ".by(valueMap('ecosystem', 'name'));"
+
+# Gremlin scripts of package lookups, the values are bound by graph DB
+PACKAGE_QUERY = \
+    "g.V().has('pecosystem', ecosystem).has('pname', name).has('version', version)" + \
+    _PACKAGE_PROJECTION
+PACKAGES_QUERY = \
+    "g.V().has('pecosystem', ecosystem).has('pname', within(names))" \
+    ".has('version', within(versions))" + _PACKAGE_PROJECTION
+
 possible_affected_licenses = ["GNU Lesser General Public License", "Version 2.1", "Version 1.1",
                               "Apache Software License", "The Apache Software License",
                               "Eclipse Public License", "Version 1.0", "Version 2.0",
@@ -28,17 +74,87 @@ possible_affected_licenses = ["GNU Lesser General Public License", "Version 2.1"
                               "The GNU General Public License", "version 2", "version 2.1"]
 
 
-def get_session_retry(retries=3, backoff_factor=0.2, status_forcelist=(404, 500, 502, 504),
-                      session=None):
-    """Set HTTP Adapter with retries to session."""
+def get_session_retry(retries=3, backoff_factor=0.2, status_forcelist=(500, 502, 503, 504),
+                      session=None, pool_maxsize=10):
+    """Set HTTP Adapter with retries to session.
+
+    Responses like 404 are final answers, so only server errors are retried.
+    """
     session = session or requests.Session()
     retry = Retry(total=retries, read=retries, connect=retries,
                   backoff_factor=backoff_factor, status_forcelist=status_forcelist)
-    adapter = HTTPAdapter(max_retries=retry)
+    adapter = HTTPAdapter(max_retries=retry, pool_maxsize=pool_maxsize)
     session.mount('http://', adapter)
+    session.mount('https://', adapter)
     return session
 
 
+_graph_session = None
+_graph_session_pid = None
+_graph_session_lock = threading.Lock()
+
+# number of retries, hedged and coalesced calls to graph DB made by the process
+_graph_call_stats = {'retries': 0, 'hedges': 0, 'hedge_wins': 0, 'hedges_suppressed': 0,
+                     'coalesced': 0}
+_graph_call_stats_lock = threading.Lock()
+
+
+def _count_graph_call(stat):
+    with _graph_call_stats_lock:
+        _graph_call_stats[stat] += 1
+
+
+def get_graph_call_stats():
+    """Get number of retries, hedged and coalesced calls to graph DB made by the process."""
+    with _graph_call_stats_lock:
+        return dict(_graph_call_stats)
+
+
+def get_graph_session():
+    """Get HTTP session shared by all the graph DB calls of the process.
+
+    Connections are kept alive in a pool of GREMLIN_POOL_SIZE connections,
+    so the lookups do not pay TCP and TLS setup every time. Forked worker
+    processes create their own session. The session does not retry, the
+    calls are retried by StackLicenseAnalyzer within their time budget.
+    """
+    global _graph_session, _graph_session_pid
+    with _graph_session_lock:
+        if _graph_session is None or _graph_session_pid != os.getpid():
+            _graph_session = get_session_retry(retries=0, status_forcelist=(),
+                                               pool_maxsize=GREMLIN_POOL_SIZE)
+            _graph_session_pid = os.getpid()
+        return _graph_session
+
+
+_graph_executor = None
+_graph_executor_pid = None
+_graph_executor_lock = threading.Lock()
+
+
+def get_graph_executor():
+    """Get thread pool running the graph DB lookups of all the requests of the process.
+
+    There are GREMLIN_POOL_SIZE threads at most, as many as pooled connections,
+    and they are reused by the requests together with their package cache
+    connections. Forked worker processes create their own pool.
+    """
+    global _graph_executor, _graph_executor_pid
+    with _graph_executor_lock:
+        if _graph_executor is None or _graph_executor_pid != os.getpid():
+            _graph_executor = ThreadPoolExecutor(max_workers=GREMLIN_POOL_SIZE)
+            _graph_executor_pid = os.getpid()
+        return _graph_executor
+
+
+def get_graph_url():
+    """Get URL of graph DB HTTP endpoint."""
+    return "{scheme}://{host}:{port}".format(
+        scheme=os.environ.get("BAYESIAN_GREMLIN_HTTP_SERVICE_SCHEME", "http"),
+        host=os.environ.get("BAYESIAN_GREMLIN_HTTP_SERVICE_HOST", "localhost"),
+        port=os.environ.get("BAYESIAN_GREMLIN_HTTP_SERVICE_PORT", "8182"))
+
+
 def convert_version_to_proper_semantic(version):
     """Needed for maven version correction."""
     version = version.replace('.', '-', 3)
@@ -83,24 +199,66 @@ def select_latest_version(input_version='0.0.0', libio='0.0.0', anitya='0.0.0'):
 class StackLicenseAnalyzer(object):
     """Class representing stack license analyzer."""
 
-    def __init__(self):
+    def __init__(self, data_reloader=None, analyzer_registry=None, result_cache=None,
+                 package_cache=None, graph_circuit_breaker=None):
         """Initialize stack license analyzer."""
-        # Data store where license graph is available
-        src_dir = os.path.join(LIC_DATA_DIR, "license_graph")
-        graph_store = LocalFileSystem(src_dir=src_dir)
-        synonyms_dir = os.path.join(LIC_DATA_DIR, "synonyms")
-        synonyms_store = LocalFileSystem(src_dir=synonyms_dir)
-
-        self.license_analyzer = LicenseAnalyzer(graph_store, synonyms_store)
+        # License graph and synonyms are held by the reloader, which swaps in
+        # a new analyzer snapshot whenever the license data changes
+        self.data_reloader = data_reloader or LicenseDataReloader()
+        # older releases of the license data can be pinned by the requests
+        self.analyzer_registry = analyzer_registry or \
+            LicenseAnalyzerRegistry(self.data_reloader)
+        # results of repeated requests are served from the cache
+        self.result_cache = result_cache or ResultCache(RESULT_CACHE_SIZE, RESULT_CACHE_TTL)
+        # per-package state of recent stack analyses, delta analyses start from it
+        self.analysis_states = ResultCache(ANALYSIS_STATE_CACHE_SIZE, ANALYSIS_STATE_CACHE_TTL,
+                                           copy_results=False)
+        # package data from graph DB is cached on disk and shared by the workers
+        self.package_cache = package_cache or PackageLicenseCache(
+            PACKAGE_CACHE_PATH, PACKAGE_CACHE_TTL, PACKAGE_CACHE_NEGATIVE_TTL,
+            PACKAGE_CACHE_MAX_ENTRIES)
+        self.graph_circuit_breaker = graph_circuit_breaker or CircuitBreaker(
+            GREMLIN_BREAKER_THRESHOLD, GREMLIN_BREAKER_RESET_TIMEOUT)
+        self.graph_latency = LatencyTracker()
+        self.graph_single_flight = SingleFlight()
+        self.graph_micro_batcher = MicroBatcher(
+            self._lookup_micro_batch, GREMLIN_MICRO_BATCH_WINDOW, GREMLIN_MICRO_BATCH_SIZE,
+            max_workers=GREMLIN_MAX_IN_FLIGHT, max_queued=GREMLIN_MICRO_BATCH_MAX_QUEUED)
+        # hedged calls run here, threads are started on demand
+        self._hedge_executor = ThreadPoolExecutor(max_workers=GREMLIN_POOL_SIZE)
+        # duplicate calls in flight are limited, so hedging cannot double the load
+        self._hedge_slots = threading.BoundedSemaphore(GREMLIN_HEDGE_MAX_IN_FLIGHT)
+
+    @property
+    def license_analyzer(self):
+        """Return the license analyzer snapshot that is current right now."""
+        return self.data_reloader.analyzer
+
+    def get_metrics(self):
+        """Get runtime metrics of the stack license analyzer."""
+        license_analyzer = self.license_analyzer
+        return {
+            'license_data_version': license_analyzer.data_version,
+            'synonyms_version': license_analyzer.synonyms_version,
+            # counters belong to the analyzer snapshot, so they restart on data reload
+            'analysis_paths': license_analyzer.get_path_counts(),
+            'result_cache': self.result_cache.get_stats(),
+            'package_cache': self.package_cache.get_stats(),
+            'graph_circuit_breaker': self.graph_circuit_breaker.get_stats(),
+            'graph_calls': dict(get_graph_call_stats(),
+                                latency_p95=self.graph_latency.get_percentile(95)),
+            'graph_micro_batches': self.graph_micro_batcher.get_stats()
+        }
 
-    def _check_compatibility(self, stack_license, other_packages):
+    def _check_compatibility(self, stack_license, other_packages, license_analyzer=None):
+        license_analyzer = license_analyzer or self.license_analyzer
         list_comp_rep_licenses = []
         map_lic2pkg = {}
         unknown_license_packages = []
         conflict_packages = []
         compatible_packages = []
         for pkg in other_packages:
-            la_output = self.license_analyzer.compute_representative_license(
+            la_output = license_analyzer.compute_representative_license(
                 pkg.get('licenses', []))
 
             pkg['license_analysis'] = {
@@ -128,7 +286,7 @@ class StackLicenseAnalyzer(object):
         for k, v in map_lic2pkg.items():
             map_lic2pkg[k] = list(set(v))
 
-        compatibility_output = self.license_analyzer.check_compatibility(
+        compatibility_output = license_analyzer.check_compatibility(
             lic_a=stack_license, list_lic_b=list_comp_rep_licenses)
 
         # now, map license to packages
@@ -175,6 +333,174 @@ class StackLicenseAnalyzer(object):
                     list_conflict_pkg.append(pkg_group)
         return list_conflict_pkg
 
+    @staticmethod
+    def _get_replaced_packages(candidate):
+        """Get names of the packages that given alternate package replaces."""
+        replaced_packages = []
+        for replaced in candidate.get('replaces', []):
+            if isinstance(replaced, dict):
+                replaced = replaced.get('package', replaced.get('name'))
+            if replaced is not None:
+                replaced_packages.append(replaced)
+        return replaced_packages
+
+    def get_remediation(self, target_license, packages, alternate_packages,
+                        license_analyzer=None):
+        """Find packages blocking the target stack license and substitutions unblocking it.
+
+        A package is blocking when its representative license cannot be
+        represented by the target license ( or it has no representative
+        license at all ). An alternate package unblocks the packages it
+        replaces ( see its 'replaces' attribute ) as long as its own license can
+        be represented by the target license. The substitutions are ranked by
+        the number of blocking packages they resolve, so each candidate is
+        checked by one pass over its replaced packages instead of re-running
+        the whole stack analysis.
+
+        :param target_license: desired stack license
+        :param packages: stack packages with 'license_analysis' already filled in
+        :param alternate_packages: candidate packages that can substitute stack packages
+        :return: remediation output
+        """
+        license_analyzer = license_analyzer or self.license_analyzer
+        output = {
+            'status': 'Unknown',
+            'target_license': license_analyzer.find_synonym(target_license),
+            'blocking_packages': {},
+            'substitutions': [],
+            'unresolved_packages': []
+        }
+        target_license = output['target_license']
+        if target_license not in license_analyzer.known_licenses:
+            output['message'] = 'Target license is unknown'
+            return output
+
+        blocking_packages = {}
+        for pkg in packages:
+            pkg_license = pkg.get('license_analysis', {}).get('_representative_licenses')
+            if pkg_license is None or \
+                    license_analyzer.find_blocking_licenses([pkg_license], target_license):
+                blocking_packages[pkg.get('package', 'unknown_package')] = pkg_license
+
+        substitutions = []
+        for candidate in alternate_packages:
+            resolved_packages = [x for x in self._get_replaced_packages(candidate)
+                                 if x in blocking_packages]
+            if not resolved_packages:
+                continue
+
+            la_output = license_analyzer.compute_representative_license(
+                candidate.get('licenses', []), find_outliers=False)
+            candidate_license = la_output['representative_license']
+            if candidate_license is None or \
+                    license_analyzer.find_blocking_licenses([candidate_license], target_license):
+                continue
+
+            substitutions.append({
+                'package': candidate.get('package', 'unknown_package'),
+                'version': candidate.get('version'),
+                'license': candidate_license,
+                'resolves': sorted(resolved_packages)
+            })
+
+        # the more blocking packages resolved, the better
+        substitutions.sort(key=lambda x: (-len(x['resolves']), x['package']))
+        resolved = set()
+        for substitution in substitutions:
+            resolved.update(substitution['resolves'])
+
+        output['status'] = 'Successful'
+        output['blocking_packages'] = blocking_packages
+        output['substitutions'] = substitutions
+        output['unresolved_packages'] = sorted(set(blocking_packages.keys()) - resolved)
+        return output
+
+    def check_license_policy(self, policy, packages, license_analyzer=None):
+        """Check licenses of the stack packages against the license policy.
+
+        Licenses of the packages are collected into one bitmask, so the policy
+        itself is evaluated by a few bit operations. Only the violating licenses
+        are then mapped back to their packages.
+
+        :param policy: name of the policy loaded with license data or policy definition
+        :param packages: stack packages with 'license_analysis' already filled in
+        :return: policy evaluation output
+        """
+        license_analyzer = license_analyzer or self.license_analyzer
+        output = {
+            'status': 'Failure',
+            'policy': policy if not isinstance(policy, dict) else policy.get('name', 'unnamed'),
+            'denied': {},
+            'review': {},
+            'not_allowed': {}
+        }
+        try:
+            compiled_policy = license_analyzer.get_policy(policy)
+        except ValueError as e:
+            output['message'] = str(e)
+            return output
+        if compiled_policy is None:
+            output['message'] = 'Unknown license policy'
+            return output
+
+        stack_mask = 0
+        package_masks = []
+        for pkg in packages:
+            la = pkg.get('license_analysis', {})
+            if la.get('selected_license') is not None:
+                pkg_licenses = [license_analyzer.find_synonym(la['selected_license'])]
+            else:
+                pkg_licenses = la.get('synonyms', {}).values()
+            pkg_mask = 0
+            for lic in pkg_licenses:
+                pkg_mask |= license_analyzer.dict_license_masks.get(lic, 0)
+            stack_mask |= pkg_mask
+            package_masks.append((pkg.get('package', 'unknown_package'), pkg_mask))
+
+        violations = zip(('denied', 'review', 'not_allowed'),
+                         compiled_policy.evaluate(stack_mask))
+        for violation, mask in violations:
+            for lic in license_analyzer.get_licenses_from_mask(mask):
+                lic_mask = license_analyzer.dict_license_masks[lic]
+                output[violation][lic] = sorted(set(
+                    name for name, pkg_mask in package_masks if pkg_mask & lic_mask))
+
+        if output['denied'] or output['not_allowed']:
+            output['status'] = 'Violation'
+        elif output['review']:
+            output['status'] = 'Review'
+        else:
+            output['status'] = 'Compliant'
+        return output
+
+    def get_minimal_conflict_removal(self, dict_lic_pkgs, license_analyzer=None):
+        """Get the smallest set of packages whose removal resolves the stack conflict."""
+        license_analyzer = license_analyzer or self.license_analyzer
+        license_weights = {lic: len(pkgs) for lic, pkgs in dict_lic_pkgs.items()}
+        removal = license_analyzer.find_minimal_conflict_removal(
+            license_weights, time_budget=CONFLICT_REMOVAL_TIME_BUDGET)
+
+        removed_licenses = removal['removed_licenses']
+        removed_packages = []
+        for lic in removed_licenses:
+            removed_packages += dict_lic_pkgs[lic]
+
+        # stack license that would be computed once the packages are removed
+        stack_license = None
+        if removed_licenses:
+            remaining_licenses = [x for x in dict_lic_pkgs.keys() if x not in removed_licenses]
+            la_output = license_analyzer.compute_representative_license(remaining_licenses,
+                                                                        find_outliers=False)
+            stack_license = la_output['representative_license']
+
+        output = {
+            'packages': sorted(set(removed_packages)),
+            'licenses': removed_licenses,
+            'stack_license': stack_license,
+            'complete': removal['complete']
+        }
+        return output
+
     def _is_improper_payload_for_stack_analysis(self, payload):
         """Check if the payload sent to stack analysis has correct content."""
         return not payload or not payload.get('packages') or type(payload.get('packages')) != list
@@ -198,9 +524,56 @@ class StackLicenseAnalyzer(object):
         If a representative stack-license is possible, then it tries to identify
         license based outlier packages.
 
+        If the payload sets 'license_semantics' to 'or', then licenses of each
+        package are treated as alternatives and the one leading to the least
+        restrictive stack license is selected.
+
+        If the payload names 'license_policy', then licenses of the packages are
+        checked against the policy and violations are reported.
+
+        If the payload names 'target_stack_license', then it also finds packages
+        blocking that license and 'alternate_packages' that would unblock them.
+
+        The payload can set 'majority_threshold' used to find outliers, and ask
+        for outlier packages under several thresholds by 'majority_threshold_sweep'.
+
+        Results are cached by the hash of the payload and the version of the
+        license data, so a repeated request is served from the cache. Requests
+        keeping the analysis state are not, as the state may be gone by then.
+
+        If the payload sets 'keep_analysis_state', the per-package analysis is
+        kept and the output gets 'analysis_fingerprint'. A later payload can
+        then pass it as 'previous_analysis_fingerprint' together with 'added',
+        'removed' and 'changed' packages instead of 'packages', see
+        _compute_stack_license_delta().
+
         :param payload: Input list of package information
         :return: Detailed license analysis output
         """
+        if self._is_improper_payload_for_stack_analysis(payload) or \
+                payload.get('keep_analysis_state'):
+            return self._compute_stack_license(payload)
+
+        # the key must be computed before the payload is turned into the output
+        payload_key = ResultCache.compute_key(payload)
+        data_version = payload.get('license_data_version') or self.license_analyzer.data_version
+        output = self.result_cache.get(
+            ResultCache.compute_key('stack_license', data_version, payload_key))
+        if output is not None:
+            return output
+
+        output = self._compute_stack_license(payload)
+        # failures may be transient, they are not cached
+        if output.get('status') != 'Failure':
+            self.result_cache.put(ResultCache.compute_key(
+                'stack_license', output['license_data_version'], payload_key), output)
+        return output
+
+    def _compute_stack_license(self, payload):
+        """Perform the license analysis for the payload, see compute_stack_license()."""
+        if payload and payload.get('previous_analysis_fingerprint'):
+            return self._compute_stack_license_delta(payload)
+
         # check input
         if self._is_improper_payload_for_stack_analysis(payload):
             output = {
@@ -218,19 +591,50 @@ class StackLicenseAnalyzer(object):
                 }
                 return output
 
+        # the whole request is served by one snapshot: either the pinned version
+        # of license data or the one that is current right now
+        data_version = payload.get('license_data_version')
+        try:
+            license_analyzer = self.analyzer_registry.get_analyzer(data_version)
+        except Exception:
+            logging.exception("Cannot load license data version {}".format(data_version))
+            output = {
+                'status': 'Failure',
+                'message': 'Cannot load license data version {}'.format(data_version)
+            }
+            return output
+        if license_analyzer is None:
+            output = {
+                'status': 'Failure',
+                'message': 'Unknown license data version {}'.format(data_version)
+            }
+            return output
+
+        # outlier sensitivity can be tuned per request
+        majority_threshold = payload.get('majority_threshold')
+        majority_threshold_sweep = payload.get('majority_threshold_sweep') or []
+        try:
+            if majority_threshold is not None:
+                majority_threshold = license_analyzer.get_majority_threshold(majority_threshold)
+            for threshold in majority_threshold_sweep:
+                license_analyzer.get_majority_threshold(threshold)
+        except (TypeError, ValueError):
+            output = {
+                'status': 'Failure',
+                'message': 'Majority threshold must be a number in (0, 1]'
+            }
+            return output
+
         # payload = filter_incorrect_splitting(payload)
         output = payload  # output info will be inserted inside payload structure
         count_comp_no_license = 0  # keep track of number of component with no license
         output['conflict_packages'] = []
         output['outlier_packages'] = {}
         output['distinct_licenses'] = []
+        output['license_data_version'] = data_version or license_analyzer.data_version
 
-        synonyms_dir = os.path.join(LIC_DATA_DIR, "synonyms")
-        synonyms_store = LocalFileSystem(src_dir=synonyms_dir)
-        list_synonym_jsons = synonyms_store.list_files()
-        for synonym_json in list_synonym_jsons:
-            syn = synonyms_store.read_json_file(synonym_json)
-            break
+        # synonyms must come from the same version of license data as the graph
+        syn = license_analyzer.syn
         for pkg in output['packages']:
             if not pkg['licenses'] or pkg['licenses'] is None:
                 output['packages'].remove(pkg)
@@ -240,47 +644,28 @@ class StackLicenseAnalyzer(object):
             distinct_licenses = set()
             is_stack_license_possible = True
             for pkg in output['packages']:
-                list_of_licenses = []
-                for license in pkg.get('licenses', []):
-                    if license.startswith('version') or license.startswith('Version'):
-                        pkg['licenses'] = filter_incorrect_splitting(pkg['licenses'])
-                        break
-                la_output = self.license_analyzer.compute_representative_license(
-                    pkg.get('licenses', []))
-                for lic in pkg.get('licenses', []):
-                    s = syn.get(lic)
-                    if s:
-                        list_of_licenses.append(s)
-                        distinct_licenses.add(s)
-                    else:
-                        list_of_licenses.append(lic)
-                        distinct_licenses.add(lic)
-
-                pkg['license_analysis'] = {
-                    'status': la_output['status'],
-                    '_representative_licenses': la_output['representative_license'],
-                    'conflict_licenses': la_output['conflict_licenses'],
-                    'unknown_licenses': la_output['unknown_licenses'],
-                    'outlier_licenses': la_output['outlier_licenses'],
-                    'synonyms': la_output['synonyms'],
-                    '_message': la_output['reason']
-                }
+                self._fix_incorrect_splitting(pkg)
+
+            # With dual licensing, licenses of each package are alternatives and
+            # the one leading to the least restrictive stack license is selected
+            selected_licenses = None
+            if output.get('license_semantics') == 'or':
+                selected_licenses = license_analyzer.select_license_choices(
+                    [pkg.get('licenses', []) for pkg in output['packages']])
+
+            for i, pkg in enumerate(output['packages']):
+                pkg_licenses = None
+                if selected_licenses is not None and selected_licenses[i] is not None:
+                    pkg_licenses = [selected_licenses[i]]
+                la_output = self._analyze_package(pkg, license_analyzer, majority_threshold,
+                                                  pkg_licenses)
+                distinct_licenses.update(syn.get(lic) or lic for lic in pkg.get('licenses', []))
+                if selected_licenses is not None:
+                    pkg['license_analysis']['selected_license'] = selected_licenses[i]
 
                 if la_output['status'] == 'Failure':
                     count_comp_no_license = count_comp_no_license + 1
-                    output['status'] = 'Failure'
-                    output['message'] = 'Cannot calculate stack license due to unknown' \
-                                        ' dependencies or license not supported.'
-                    is_stack_license_possible = False
-                elif la_output['status'] == 'Conflict':
-                    output['status'] = 'ComponentConflict'
-                    output['message'] = 'Cannot calculate stack license due to component' \
-                                        ' conflict.'
-                    is_stack_license_possible = False
-                elif la_output['status'] == 'Unknown':
-                    output['status'] = 'Unknown'
-                    output['message'] = 'Cannot calculate stack license due to unknown' \
-                                        ' dependencies or license not supported.'
+                if not self._set_package_status(output, la_output['status']):
                     is_stack_license_possible = False
 
                 if la_output['representative_license'] is None:
@@ -290,6 +675,13 @@ class StackLicenseAnalyzer(object):
                     list_comp_rep_licenses.append(la_output['representative_license'])
             output['distinct_licenses'] = output['distinct_licenses'] + \
                 list(distinct_licenses)
+
+            self._check_requested_licenses(output, license_analyzer)
+            # with dual licensing, the selection depends on the whole stack
+            if output.get('keep_analysis_state') and selected_licenses is None:
+                output['analysis_fingerprint'] = self._keep_analysis_state(
+                    output['packages'], license_analyzer, majority_threshold)
+
             # Return if we could not compute license for some component
             if is_stack_license_possible is False:
                 # output['status'] should have been set already
@@ -319,30 +711,166 @@ class StackLicenseAnalyzer(object):
                 dict_lic_pkgs[lic] = list(set(value_list))
 
             # If we reach here, then that means we are all set to compute stack license !
-            la_output = self.license_analyzer.compute_representative_license(list_comp_rep_licenses)
-            output['status'] = la_output['status']
-            output['stack_license'] = la_output['representative_license']
+            la_output = license_analyzer.compute_representative_license(
+                list_comp_rep_licenses, majority_threshold=majority_threshold)
+            self._complete_stack_analysis(output, la_output, dict_lic_pkgs, license_analyzer)
+            if majority_threshold_sweep:
+                dict_sweep = license_analyzer.sweep_outlier_licenses(list_comp_rep_licenses,
+                                                                     majority_threshold_sweep)
+                output['outlier_sweep'] = {
+                    str(threshold): self.get_outlier_packages({'outlier_licenses': lics},
+                                                              dict_lic_pkgs)
+                    for threshold, lics in dict_sweep.items()
+                }
 
-            if la_output['status'] == 'Conflict':
-                output['conflict_packages'] = self.get_conflict_packages(la_output, dict_lic_pkgs)
-                output['status'] = 'StackConflict'
-                output['message'] = 'Cannot calculate stack license due to stack conflict.'
+        except Exception:  # TODO custom exceptions
+            output['status'] = 'Failure'
+            output['stack_license'] = None
+            output['message'] = "Some unexpected exception happened!"
+            msg = traceback.format_exc()
+            logging.error("Unexpected error happened!\n{}".format(msg))
 
-            output['outlier_packages'] = self.get_outlier_packages(la_output, dict_lic_pkgs)
+        return output
 
-            # Analyze further and generate info for license filters
-            # let us try to compute representative license for each alternate component
-            if la_output['status'] == 'Successful':
-                lic_filter_for_alt = self._check_compatibility(output['stack_license'],
-                                                               output.get('alternate_packages', []))
+    def _keep_analysis_state(self, packages, license_analyzer, majority_threshold,
+                             accumulator=None):
+        """Keep per-package analysis of the stack for later delta analyses.
 
-                lic_filter_for_com = self._check_compatibility(output['stack_license'],
-                                                               output.get('companion_packages', []))
+        :param packages: stack packages with 'license_analysis' filled in
+        :param accumulator: accumulator holding the packages, None to build it
+        :return: fingerprint of the state, None if a package is in the stack twice
+        """
+        packages = copy.deepcopy(packages)
+        if accumulator is None:
+            accumulator = StackLicenseAccumulator(license_analyzer)
+            for pkg in packages:
+                la = pkg['license_analysis']
+                accumulator.add((pkg['package'], pkg['version']), pkg['licenses'], {
+                    'status': la['status'],
+                    'representative_license': la['_representative_licenses']
+                })
+            if len(accumulator) != len(packages):
+                return None
+        fingerprint = ResultCache.compute_key(
+            'analysis_state', license_analyzer.data_version, majority_threshold,
+            [(pkg['package'], pkg['version'], pkg['licenses']) for pkg in packages])
+        self.analysis_states.put(fingerprint, _AnalysisState(
+            license_analyzer, majority_threshold, packages, accumulator))
+        return fingerprint
+
+    def _compute_stack_license_delta(self, payload):
+        """Perform the license analysis of a stack changed since a previous analysis.
+
+        The stack is the one of the previous analysis without the 'removed'
+        packages ( all versions of a package if its version is not given ),
+        followed by the 'changed' packages, which replace all the versions of
+        the same package, and the 'added' ones. Only the changed and added
+        packages are analyzed, the stack license, conflicts and outliers are
+        updated incrementally. Requests asking for dual licensing, for outlier
+        sweeps, for other license data version or majority threshold than the
+        previous analysis are analyzed in full. The output is the same as the
+        full analysis of the stack would give, including new 'analysis_fingerprint'.
+
+        :param payload: delta of the stack and the analysis options
+        :return: Detailed license analysis output
+        """
+        state = self.analysis_states.get(payload['previous_analysis_fingerprint'])
+        if state is None:
+            output = {
+                'status': 'Failure',
+                'message': 'Unknown previous analysis, full analysis is needed'
+            }
+            return output
 
-                output['license_filter'] = {
-                    'alternate_packages': lic_filter_for_alt,
-                    'companion_packages': lic_filter_for_com
-                }
+        removed = payload.get('removed') or []
+        changed = payload.get('changed') or []
+        added = payload.get('added') or []
+        if any(self._missing_component_attribute(pkg) for pkg in changed + added) or \
+                any(pkg.get('package') is None for pkg in removed):
+            output = {
+                'status': 'Failure',
+                'message': 'Either component name or component version is missing'
+            }
+            return output
+
+        # package -> its removed versions, None for all of them
+        removed_versions = {}
+        for pkg in removed:
+            versions = removed_versions.setdefault(pkg['package'], set())
+            if versions is not None and pkg.get('version') is not None:
+                versions.add(pkg['version'])
+            else:
+                removed_versions[pkg['package']] = None
+        for pkg in changed:
+            removed_versions[pkg['package']] = None
+        # a package given twice is analyzed once, as it is in the accumulator
+        new_packages = OrderedDict(((pkg['package'], pkg['version']), pkg)
+                                   for pkg in changed + added if pkg.get('licenses'))
+
+        license_analyzer = state.license_analyzer
+        accumulator = state.accumulator.copy()
+        packages = []
+        for pkg in state.packages:
+            key = (pkg['package'], pkg['version'])
+            versions = removed_versions.get(pkg['package'], ())
+            if versions is None or pkg['version'] in versions or key in new_packages:
+                accumulator.remove(key)
+            else:
+                packages.append(pkg)
+
+        output = {k: v for k, v in payload.items() if k not in DELTA_ATTRIBUTES}
+        output['packages'] = copy.deepcopy(packages) + list(new_packages.values())
+        output['license_data_version'] = license_analyzer.data_version
+        output['keep_analysis_state'] = True
+
+        majority_threshold = payload.get('majority_threshold')
+        try:
+            if majority_threshold is not None:
+                majority_threshold = license_analyzer.get_majority_threshold(majority_threshold)
+        except (TypeError, ValueError):
+            # the full analysis reports it
+            majority_threshold = payload.get('majority_threshold')
+        if payload.get('license_semantics') == 'or' or \
+                payload.get('majority_threshold_sweep') or \
+                payload.get('license_data_version', output['license_data_version']) != \
+                output['license_data_version'] or \
+                majority_threshold != state.majority_threshold:
+            output['license_data_version'] = payload.get('license_data_version',
+                                                         output['license_data_version'])
+            return self._compute_stack_license(output)
+
+        output['conflict_packages'] = []
+        output['outlier_packages'] = {}
+        output['distinct_licenses'] = []
+        syn = license_analyzer.syn
+        try:
+            for pkg in output['packages'][len(packages):]:
+                self._fix_incorrect_splitting(pkg)
+                la_output = self._analyze_package(pkg, license_analyzer, majority_threshold)
+                accumulator.add((pkg['package'], pkg['version']), pkg['licenses'], la_output)
+
+            distinct_licenses = set()
+            is_stack_license_possible = True
+            for pkg in output['packages']:
+                la = pkg['license_analysis']
+                distinct_licenses.update(syn.get(lic) or lic for lic in pkg.get('licenses', []))
+                if not self._set_package_status(output, la['status']) or \
+                        la['_representative_licenses'] is None:
+                    is_stack_license_possible = False
+            output['distinct_licenses'] = list(distinct_licenses)
+
+            self._check_requested_licenses(output, license_analyzer)
+            output['analysis_fingerprint'] = self._keep_analysis_state(
+                output['packages'], license_analyzer, majority_threshold, accumulator)
+
+            if is_stack_license_possible is False:
+                output['stack_license'] = None
+                return output
+
+            dict_lic_pkgs = {lic: list(set(name for name, _ in keys))
+                             for lic, keys in accumulator.get_license_packages().items()}
+            la_output = accumulator.compute_stack_license(majority_threshold)
+            self._complete_stack_analysis(output, la_output, dict_lic_pkgs, license_analyzer)
 
         except Exception:  # TODO custom exceptions
             output['status'] = 'Failure'
@@ -353,6 +881,106 @@ class StackLicenseAnalyzer(object):
 
         return output
 
+    @staticmethod
+    def _fix_incorrect_splitting(pkg):
+        """Join license names split at their version, see filter_incorrect_splitting()."""
+        for license in pkg.get('licenses', []):
+            if license.startswith('version') or license.startswith('Version'):
+                pkg['licenses'] = filter_incorrect_splitting(pkg['licenses'])
+                break
+
+    @staticmethod
+    def _analyze_package(pkg, license_analyzer, majority_threshold=None, pkg_licenses=None):
+        """Compute representative license of the package and fill in its license analysis.
+
+        :param pkg_licenses: licenses to analyze, None for all the package licenses
+        :return: license analysis output
+        """
+        if pkg_licenses is None:
+            pkg_licenses = pkg.get('licenses', [])
+        la_output = license_analyzer.compute_representative_license(
+            pkg_licenses, majority_threshold=majority_threshold)
+        pkg['license_analysis'] = {
+            'status': la_output['status'],
+            '_representative_licenses': la_output['representative_license'],
+            'conflict_licenses': la_output['conflict_licenses'],
+            'unknown_licenses': la_output['unknown_licenses'],
+            'outlier_licenses': la_output['outlier_licenses'],
+            'synonyms': la_output['synonyms'],
+            '_message': la_output['reason']
+        }
+        return la_output
+
+    @staticmethod
+    def _set_package_status(output, status):
+        """Set stack status according to the analysis status of one of its packages.
+
+        :return: False if the package status does not allow to compute stack license
+        """
+        if status == 'Failure':
+            output['status'] = 'Failure'
+            output['message'] = 'Cannot calculate stack license due to unknown' \
+                                ' dependencies or license not supported.'
+            return False
+        elif status == 'Conflict':
+            output['status'] = 'ComponentConflict'
+            output['message'] = 'Cannot calculate stack license due to component' \
+                                ' conflict.'
+            return False
+        elif status == 'Unknown':
+            output['status'] = 'Unknown'
+            output['message'] = 'Cannot calculate stack license due to unknown' \
+                                ' dependencies or license not supported.'
+            return False
+        return True
+
+    def _check_requested_licenses(self, output, license_analyzer):
+        """Check the stack against the license policy and target license the caller asks for."""
+        # Check the stack against the license policy the caller asks for
+        if output.get('license_policy'):
+            output['policy_violations'] = self.check_license_policy(
+                output['license_policy'], output['packages'], license_analyzer)
+
+        # Find out how to reach the stack license the caller asks for
+        if output.get('target_stack_license'):
+            output['remediation'] = self.get_remediation(
+                output['target_stack_license'], output['packages'],
+                output.get('alternate_packages', []), license_analyzer)
+
+    def _complete_stack_analysis(self, output, la_output, dict_lic_pkgs, license_analyzer):
+        """Fill in the stack output from the analysis of representative licenses of its packages.
+
+        :param la_output: license analysis output for the representative licenses
+        :param dict_lic_pkgs: representative license -> names of its packages
+        """
+        output['status'] = la_output['status']
+        output['stack_license'] = la_output['representative_license']
+
+        if la_output['status'] == 'Conflict':
+            output['conflict_packages'] = self.get_conflict_packages(la_output, dict_lic_pkgs)
+            output['minimal_conflict_removal'] = self.get_minimal_conflict_removal(
+                dict_lic_pkgs, license_analyzer)
+            output['status'] = 'StackConflict'
+            output['message'] = 'Cannot calculate stack license due to stack conflict.'
+
+        output['outlier_packages'] = self.get_outlier_packages(la_output, dict_lic_pkgs)
+
+        # Analyze further and generate info for license filters
+        # let us try to compute representative license for each alternate component
+        if la_output['status'] == 'Successful':
+            lic_filter_for_alt = self._check_compatibility(output['stack_license'],
+                                                           output.get('alternate_packages', []),
+                                                           license_analyzer)
+
+            lic_filter_for_com = self._check_compatibility(output['stack_license'],
+                                                           output.get('companion_packages', []),
+                                                           license_analyzer)
+
+            output['license_filter'] = {
+                'alternate_packages': lic_filter_for_alt,
+                'companion_packages': lic_filter_for_com
+            }
+
     def extract_component_details(self, component):
         """Extract component details."""
         licenses = component.get("version", {}).get("declared_licenses", [])
@@ -368,68 +996,454 @@ class StackLicenseAnalyzer(object):
 
         return component_summary
 
-    def get_dependency_data(self, resolved, ecosystem):
-        """Get packages data form graph DB."""
-        result = []
-        URL = "http://{host}:{port}".format(
-            host=os.environ.get("BAYESIAN_GREMLIN_HTTP_SERVICE_HOST", "localhost"),
-            port=os.environ.get("BAYESIAN_GREMLIN_HTTP_SERVICE_PORT", "8182"))
+    def _post_gremlin(self, url, qstring, bindings, deadline=None):
+        """Post Gremlin script to graph DB and record the outcome in the circuit breaker.
+
+        Server errors, connection errors and timeouts are retried up to
+        GREMLIN_RETRIES times with exponential backoff, as long as the
+        deadline allows it and the circuit breaker stays closed.
+
+        :param qstring: Gremlin script, the values are passed as bindings so that
+                        graph DB compiles the script once
+        :param bindings: values of the script variables
+        :param deadline: time.monotonic() by which the call should finish, None for no deadline
+        :return: graph DB response, the last one if all the attempts failed
+        :raises requests.exceptions.RequestException: if the last attempt failed to get response
+        """
+        data = json.dumps({'gremlin': qstring, 'bindings': bindings})
+        attempt = 0
+        while True:
+            read_timeout = GREMLIN_READ_TIMEOUT
+            if deadline is not None:
+                read_timeout = max(min(read_timeout, deadline - time.monotonic()), 0.001)
+            started = time.monotonic()
+            try:
+                graph_req = self._post_hedged(url, data, (GREMLIN_CONNECT_TIMEOUT, read_timeout))
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                self.graph_circuit_breaker.record_failure()
+                if not self._should_retry(attempt, deadline):
+                    raise
+            except Exception:
+                self.graph_circuit_breaker.record_failure()
+                raise
+            else:
+                if graph_req.status_code < 500:
+                    self.graph_circuit_breaker.record_success()
+                    self.graph_latency.record(time.monotonic() - started)
+                    return graph_req
+                self.graph_circuit_breaker.record_failure()
+                if not self._should_retry(attempt, deadline):
+                    return graph_req
+            attempt += 1
+
+    def _should_retry(self, attempt, deadline):
+        """Wait before the next attempt of failed graph DB call if it can be made.
+
+        :param attempt: number of the failed attempt, starting with 0
+        :return: False if the call must not be retried
+        """
+        if attempt >= GREMLIN_RETRIES:
+            return False
+        backoff = GREMLIN_RETRY_BACKOFF * (2 ** attempt)
+        if deadline is not None and time.monotonic() + backoff >= deadline:
+            return False
+        time.sleep(backoff)
+        if not self.graph_circuit_breaker.allow_request():
+            return False
+        _count_graph_call('retries')
+        return True
+
+    def _get_hedge_delay(self):
+        """Get number of seconds after which a graph DB call is duplicated, None for never."""
+        if GREMLIN_HEDGE_PERCENTILE <= 0:
+            return None
+        latency = self.graph_latency.get_percentile(GREMLIN_HEDGE_PERCENTILE)
+        if latency is None:
+            return None
+        return max(latency, GREMLIN_HEDGE_MIN_DELAY)
+
+    def _post_hedged(self, url, data, timeout):
+        """Post to graph DB, duplicate the call if it takes longer than usual.
+
+        Once the call takes longer than GREMLIN_HEDGE_PERCENTILE of the recent
+        latencies since it was sent, the same call is made again and the
+        response that comes first is used. Either call failing makes the
+        other one count. No call is duplicated while there are
+        GREMLIN_HEDGE_MAX_IN_FLIGHT duplicate calls in flight already, nor
+        when no thread is free to send it before the hedge delay passes,
+        such call is sent by the calling thread.
+        """
+        delay = self._get_hedge_delay()
+        if delay is None:
+            return get_graph_session().post(url, data=data, timeout=timeout)
+
+        session = get_graph_session()
+        sent = threading.Event()
+
+        def post():
+            sent.set()
+            return session.post(url, data=data, timeout=timeout)
+
+        primary = self._hedge_executor.submit(post)
+        # time spent waiting for a free thread does not count into the delay
+        if not sent.wait(min(delay, timeout[1])) and primary.cancel():
+            # all the threads are busy, a duplicate call would wait as well
+            return session.post(url, data=data, timeout=timeout)
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+        if not self._hedge_slots.acquire(blocking=False):
+            _count_graph_call('hedges_suppressed')
+            return primary.result()
+
+        _count_graph_call('hedges')
+        hedge = self._hedge_executor.submit(session.post, url, data=data, timeout=timeout)
+        hedge.add_done_callback(lambda future: self._hedge_slots.release())
+        pending = {primary, hedge}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        _count_graph_call('hedge_wins')
+                    return future.result()
+        # both calls failed
+        return primary.result()
+
+    def _get_package_data(self, url, ecosystem, package, version, deadline=None):
+        """Get data of one package from graph DB.
+
+        :return: graph DB result of the package, None if it is not available
+                 and _NOT_LOOKED_UP if the lookup timed out
+        """
+        bindings = {'ecosystem': ecosystem, 'name': package, 'version': version}
+        try:
+            graph_req = self._post_gremlin(url, PACKAGE_QUERY, bindings, deadline)
+
+            if graph_req.status_code == 404:
+                # graph DB does not know the package
+                self.package_cache.put(ecosystem, package, version, None)
+                return None
+            if graph_req.status_code == 200:
+                graph_resp = graph_req.json()
+                if 'result' not in graph_resp:
+                    return None
+                if len(graph_resp['result']['data']) == 0:
+                    # remember that graph DB does not know the package
+                    self.package_cache.put(ecosystem, package, version, None)
+                    return None
+
+                self.package_cache.put(ecosystem, package, version, graph_resp["result"])
+                return graph_resp["result"]
+            else:
+                _logger.error("Failed retrieving dependency data.")
+        except requests.exceptions.Timeout:
+            _logger.warning("Graph DB lookup of {} {} timed out".format(package, version))
+            return _NOT_LOOKED_UP
+        except Exception:
+            _logger.exception("Error retrieving dependency data!")
+        return None
+
+    def _get_packages_data(self, url, ecosystem, packages, deadline=None):
+        """Get data of many packages from graph DB by one traversal.
+
+        Names and versions are matched by within() predicates, which also
+        matches other versions of the packages, so the rows are assigned to
+        the packages by their name and version.
+
+        :param packages: list of ( package, version ) tuples
+        :return: list of graph DB results of the packages, None if not available
+                 and _NOT_LOOKED_UP if the lookup timed out
+        """
+        bindings = {
+            'ecosystem': ecosystem,
+            'names': sorted(set(x[0] for x in packages)),
+            'versions': sorted(set(x[1] for x in packages))
+        }
+        try:
+            graph_req = self._post_gremlin(url, PACKAGES_QUERY, bindings, deadline)
+
+            if graph_req.status_code == 404:
+                # graph DB does not know any of the packages
+                for package, version in packages:
+                    self.package_cache.put(ecosystem, package, version, None)
+                return [None] * len(packages)
+            if graph_req.status_code != 200:
+                _logger.error("Failed retrieving dependency data.")
+                return [None] * len(packages)
+            graph_resp = graph_req.json()
+            if 'result' not in graph_resp:
+                return [None] * len(packages)
+
+            # ( package, version ) -> rows of the package
+            package_rows = {}
+            for row in graph_resp['result']['data']:
+                version_data = row.get('version', {})
+                key = (version_data.get('pname', [None])[0],
+                       version_data.get('version', [None])[0])
+                package_rows.setdefault(key, []).append(row)
+        except requests.exceptions.Timeout:
+            _logger.warning("Graph DB lookup of {} packages timed out".format(len(packages)))
+            return [_NOT_LOOKED_UP] * len(packages)
+        except Exception:
+            _logger.exception("Error retrieving dependency data!")
+            return [None] * len(packages)
+
+        results = []
+        for package, version in packages:
+            rows = package_rows.get((package, version))
+            if rows:
+                result = dict(graph_resp['result'], data=rows)
+                self.package_cache.put(ecosystem, package, version, result)
+                results.append(result)
+            else:
+                # remember that graph DB does not know the package
+                self.package_cache.put(ecosystem, package, version, None)
+                results.append(None)
+        return results
+
+    def _lookup_packages(self, url, ecosystem, packages, deadline=None, batched=None):
+        """Look up the packages in graph DB unless the circuit breaker is open.
+
+        :param packages: list of ( package, version ) tuples
+        :param batched: True to look them up by one traversal, None if GREMLIN_BATCH_SIZE is set
+        :return: list of graph DB results of the packages, None if not available
+                 and _NOT_LOOKED_UP if not looked up
+        """
+        if not self.graph_circuit_breaker.allow_request():
+            return [_NOT_LOOKED_UP] * len(packages)
+        if batched is None:
+            batched = GREMLIN_BATCH_SIZE > 0
+        if batched:
+            return self._get_packages_data(url, ecosystem, packages, deadline)
+        return [self._get_package_data(url, ecosystem, package, version, deadline=deadline)
+                for package, version in packages]
+
+    def _lookup_micro_batch(self, keys, deadline=None):
+        """Look up packages collected from concurrent requests, one traversal per ecosystem.
+
+        :param keys: list of ( ecosystem, package, version ) tuples
+        :param deadline: latest deadline of the requests waiting for the packages,
+                         None for GREMLIN_DEADLINE from now
+        :return: list of graph DB results as returned by _lookup_packages()
+        """
+        if deadline is None and GREMLIN_DEADLINE > 0:
+            deadline = time.monotonic() + GREMLIN_DEADLINE
+        url = get_graph_url()
+        ecosystem_packages = {}
+        for ecosystem, package, version in keys:
+            ecosystem_packages.setdefault(ecosystem, []).append((package, version))
+        results = {}
+        for ecosystem, packages in ecosystem_packages.items():
+            for package, result in zip(packages, self._lookup_packages(
+                    url, ecosystem, packages, deadline, batched=True)):
+                results[(ecosystem,) + package] = result
+        return [results[key] for key in keys]
+
+    def _get_micro_batched_data(self, ecosystem, packages, deadline=None):
+        """Get packages data by the micro-batcher shared with concurrent requests.
+
+        :param packages: list of ( package, version ) tuples
+        :return: list of graph DB results as returned by _lookup_packages()
+        """
+        futures = [self.graph_micro_batcher.submit((ecosystem, package, version), deadline)
+                   for package, version in packages]
+        results = []
+        for future in futures:
+            try:
+                result = future.result(
+                    None if deadline is None else max(deadline - time.monotonic(), 0))
+            except (FuturesTimeoutError, CancelledError):
+                # the batch did not finish in time or was dropped
+                result = _NOT_LOOKED_UP
+            # results are shared with other requests, each modifies its own copy
+            results.append(result if result is _NOT_LOOKED_UP else copy.deepcopy(result))
+        return results
+
+    def get_dependency_data(self, resolved, ecosystem, budget=None):
+        """Get packages data form graph DB, cached packages are not queried.
+
+        With GREMLIN_BATCH_SIZE set, the packages are looked up in chunks of
+        that size, one traversal per chunk, otherwise one by one. Up to
+        GREMLIN_MAX_IN_FLIGHT lookups run concurrently, the results are
+        returned in the order of the resolved packages.
+
+        No lookups are started once the time budget runs out or while the
+        circuit breaker is open, such packages are listed as not looked up.
+        Packages whose lookup is in flight for a concurrent request are not
+        looked up again, its results are shared. With GREMLIN_MICRO_BATCH_WINDOW set,
+        lookups of all the concurrent requests are batched together instead.
+
+        :param budget: number of seconds for all the lookups, None for GREMLIN_DEADLINE,
+                       0 or less for no limit
+        :return: dict with 'result' list and 'not_looked_up' list of packages
+        """
+        URL = get_graph_url()
+        if budget is None:
+            budget = GREMLIN_DEADLINE
+        deadline = time.monotonic() + budget if budget > 0 else None
+
+        packages = []
         for elem in resolved:
             if elem["package"] is None or elem["version"] is None:
                 _logger.warning("Either component name or component version is missing")
                 continue
-            qstring = \
-                "g.V().has('pecosystem', '{}').has('pname', '{}').has('version', '{}')"\
-                .format(ecosystem, elem["package"], elem["version"]) + \
-                ".as('version').in('has_version').as('package')" + \
-                ".select('version','package').by(valueMap());"
-
-            # qstring = \
-            #     "g.V().has('pecosystem', '{}').has('pname', '{}').has('version', '{}')" \
-            #         .format(ecosystem, elem["package"], elem["version"]) + \
-            #     ".valueMap('pecosystem', 'pname', 'version', 'declared_licenses')"
-            payload = {'gremlin': qstring}
+            packages.append((elem["package"], elem["version"]))
+
+        results = [None] * len(packages)
+        missing = []
+        for i, (package, version) in enumerate(packages):
+            is_cached, cached_result = self.package_cache.get(ecosystem, package, version)
+            if is_cached:
+                results[i] = cached_result
+            else:
+                missing.append(i)
 
-            try:
-                graph_req = get_session_retry().post(URL, data=json.dumps(payload))
+        if GREMLIN_MICRO_BATCH_WINDOW > 0:
+            lookups = zip(missing, self._get_micro_batched_data(
+                ecosystem, [packages[i] for i in missing], deadline))
+        else:
+            lookups = self._lookup_chunks(URL, ecosystem, packages, missing, deadline)
+        for i, result in lookups:
+            results[i] = result
+
+        if any(x is _NOT_LOOKED_UP for x in results):
+            _logger.warning("Graph DB lookups ran out of time or circuit breaker is open")
+        return {
+            "result": [x for x in results if x is not None and x is not _NOT_LOOKED_UP],
+            "not_looked_up": [{"package": package, "version": version}
+                              for (package, version), x in zip(packages, results)
+                              if x is _NOT_LOOKED_UP]
+        }
 
-                if graph_req.status_code == 200:
-                    graph_resp = graph_req.json()
-                    if 'result' not in graph_resp:
-                        continue
-                    if len(graph_resp['result']['data']) == 0:
-                        continue
+    def _lookup_chunks(self, url, ecosystem, packages, missing, deadline=None):
+        """Look up the missing packages in chunks of GREMLIN_BATCH_SIZE, concurrently.
 
-                    result.append(graph_resp["result"])
-                else:
-                    _logger.error("Failed retrieving dependency data.")
-                    continue
-            except Exception:
-                _logger.exception("Error retrieving dependency data!")
-                continue
+        Packages whose lookup is already in flight for a concurrent request
+        are not looked up again, their results are shared with this one.
+
+        :param packages: list of ( package, version ) tuples
+        :param missing: indices of the packages to look up
+        :return: list of ( index, graph DB result ) tuples
+        """
+        # ( index, single-flight key ) of the packages this request looks up and
+        # ( index, future ) of the packages looked up by concurrent requests
+        led, followed = [], []
+        for i in missing:
+            key = (ecosystem,) + tuple(packages[i])
+            future, is_leader = self.graph_single_flight.join(key)
+            if is_leader:
+                led.append((i, key))
+            else:
+                followed.append((i, future))
 
-        return {"result": result}
+        chunk_size = max(GREMLIN_BATCH_SIZE, 1)
+        chunks = [led[i:i + chunk_size] for i in range(0, len(led), chunk_size)]
+        not_looked_up = [_NOT_LOOKED_UP] * chunk_size
+
+        def finish(chunk, result=not_looked_up, exception=None):
+            # concurrent requests waiting for the packages get their results
+            for (_, key), x in zip(chunk, result):
+                self.graph_single_flight.finish(key, x, exception)
+
+        def lookup(chunk):
+            if deadline is not None and time.monotonic() >= deadline:
+                finish(chunk)
+                return not_looked_up
+            try:
+                result = self._lookup_packages(url, ecosystem,
+                                               [packages[i] for i, _ in chunk], deadline)
+            except Exception as e:
+                finish(chunk, exception=e)
+                raise
+            finish(chunk, result)
+            return result
+
+        chunk_results = [not_looked_up] * len(chunks)
+        next_chunks = iter(range(len(chunks)))
+        next_chunks_lock = threading.Lock()
+
+        def look_up_next_chunks():
+            while True:
+                with next_chunks_lock:
+                    j = next(next_chunks, None)
+                if j is None:
+                    return
+                chunk_results[j] = lookup(chunks[j])
+
+        # lookups are I/O bound, so threads overlap the round trips to graph DB;
+        # each of at most GREMLIN_MAX_IN_FLIGHT tasks looks up the chunks one by one
+        max_workers = min(GREMLIN_MAX_IN_FLIGHT, len(chunks))
+        if max_workers <= 1:
+            look_up_next_chunks()
+        else:
+            executor = get_graph_executor()
+            futures = [executor.submit(look_up_next_chunks) for _ in range(max_workers)]
+            wait(futures, timeout=None if deadline is None else
+                 max(deadline - time.monotonic(), 0))
+            # lookups still running after the deadline are not waited for
+            for future in futures:
+                future.cancel()
+            # chunks no task has started are not looked up
+            with next_chunks_lock:
+                for j in next_chunks:
+                    finish(chunks[j])
+        # lookups finishing from now on are not taken into account
+        finished_results = list(chunk_results)
+        lookups = [(i, result) for chunk, chunk_result in zip(chunks, finished_results)
+                   for (i, _), result in zip(chunk, chunk_result)]
+
+        for i, future in followed:
+            try:
+                result = future.result(
+                    None if deadline is None else max(deadline - time.monotonic(), 0))
+            except Exception:
+                # the lookup did not finish in time or failed
+                result = _NOT_LOOKED_UP
+            if result is not _NOT_LOOKED_UP:
+                _count_graph_call('coalesced')
+                # results are shared with other requests, each modifies its own copy
+                result = copy.deepcopy(result)
+            lookups.append((i, result))
+        return lookups
 
     def extract_user_stack_package_licenses(self, resolved, ecosystem):
         """Extract packages details from graph result."""
         user_stack = self.get_dependency_data(resolved, ecosystem)
+        return self._extract_package_licenses(user_stack, resolved, ecosystem)
+
+    def _extract_package_licenses(self, user_stack, resolved, ecosystem=None):
+        """Extract packages details from graph result, packages w/o data get no licenses.
+
+        Packages are matched by their ecosystem, normalized name and version,
+        see get_package_identity(), each package is listed once.
+        """
         list_package_licenses = []
+        # package identity -> its entry in list_package_licenses
+        package_index = {}
         if user_stack is not None:
             for component in user_stack.get('result', []):
                 data = component.get("data", None)
                 if data:
                     component_data = self.extract_component_details(data[0])
+                    identity = get_package_identity(component_data['ecosystem'] or ecosystem,
+                                                    component_data['name'],
+                                                    component_data['version'])
+                    if identity in package_index:
+                        continue
                     license_scoring_input = {
                         'package': component_data['name'],
                         'version': component_data['version'],
                         'licenses': component_data['licenses']
                     }
+                    package_index[identity] = license_scoring_input
                     list_package_licenses.append(license_scoring_input)
-        analyzed_pkg = [x.get('package') for x in list_package_licenses]
         for pk in resolved:
             if not pk.get('licenses'):
                 pk.update({'licenses': list()})
-            if pk.get('package') not in analyzed_pkg:
+            identity = get_package_identity(ecosystem, pk.get('package'), pk.get('version'))
+            if identity not in package_index:
+                package_index[identity] = pk
                 list_package_licenses.append(pk)
 
         return list_package_licenses
@@ -572,16 +1586,34 @@ class StackLicenseAnalyzer(object):
                 if pkg.get('package') is None or pkg.get('version') is None:
                     return http_error("Either component name or component version is missing "
                                       "from payload"), 400
+            # the whole response is cached, including the package data from graph DB
+            data_version = input.get('license_data_version') or \
+                self.license_analyzer.data_version
+            cache_key = ResultCache.compute_key('license_recommender', data_version, input)
+            output = self.result_cache.get(cache_key)
+            if output is not None:
+                return flask.jsonify(output)
+
             resolved = input['_resolved']
             ecosystem = input['ecosystem']
-            user_stack_packages = self.extract_user_stack_package_licenses(resolved, ecosystem)
+            user_stack = self.get_dependency_data(resolved, ecosystem)
+            user_stack_packages = self._extract_package_licenses(user_stack, resolved, ecosystem)
+            # packages w/o licenses might not have been found in graph DB just now
+            is_cacheable = all(pkg.get('licenses') for pkg in user_stack_packages) and \
+                not user_stack['not_looked_up']
             payload = {
                 "packages": user_stack_packages
             }
+            if input.get('license_data_version') is not None:
+                payload['license_data_version'] = input['license_data_version']
             resp = self.compute_stack_license(payload=payload)
             output = resp
             output['conflict_packages'] = self._extract_conflict_packages(resp)
             output['outlier_packages'] = self._extract_license_outliers(resp)
             output['unknown_licenses'] = self._extract_unknown_licenses(resp)
+            # packages skipped because graph DB was too slow or unavailable
+            output['not_looked_up_packages'] = user_stack['not_looked_up']
 
+            if is_cacheable and output.get('status') != 'Failure':
+                self.result_cache.put(cache_key, output)
             return flask.jsonify(output)
@@ -0,0 +1,227 @@
+"""Class that maintains license analysis of a stack incrementally."""
+
+from collections import OrderedDict
+
+
+class StackLicenseAccumulator(object):
+    """Class that maintains license analysis of a stack incrementally.
+
+    Packages can be added into the stack and removed from it one by one. For
+    each package, its representative license is computed once when it is
+    added. Then the following is kept up to date:
+    - for each license vertex, the number of packages that can reach it
+      ( the running join: vertices reachable from all packages are the
+        common reachable vertices of the stack )
+    - for each type-compatibility-class, the number of packages that fall
+      into it ( used to find outliers )
+    - packages of each representative license
+
+    Each update costs time proportional to the number of licenses reachable
+    from the package license, which does not depend on the stack size. The
+    stack license, conflicts and outliers are then derived from these counts
+    in the same way as LicenseAnalyzer.compute_representative_license() does
+    for the list of representative licenses of all the packages.
+    """
+
+    def __init__(self, license_analyzer):
+        """Initialize empty stack.
+
+        :param license_analyzer: license analyzer snapshot used for the analysis
+        """
+        self.license_analyzer = license_analyzer
+
+        # package -> representative license ( None if there is none ), in insertion order
+        self._package_licenses = OrderedDict()
+        self._unlicensed_packages = OrderedDict()
+        # representative license -> its packages
+        self._license_packages = {}
+        # license -> number of packages that can reach it
+        self._reach_counts = {}
+        # type-compatibility-class -> count, type and licenses of the packages falling there
+        self._tcc_count = {}
+        self._tcc_type = {}
+        self._tcc_licenses = {}
+
+    def __len__(self):
+        """Return number of packages in the stack."""
+        return len(self._package_licenses)
+
+    def __contains__(self, package):
+        """Check whether the package is in the stack."""
+        return package in self._package_licenses
+
+    @staticmethod
+    def _add_count(dict_counts, key, delta):
+        cnt = dict_counts.get(key, 0) + delta
+        if cnt:
+            dict_counts[key] = cnt
+        else:
+            del dict_counts[key]
+
+    def _update_counts(self, lic, delta):
+        for reachable_lic in self.license_analyzer.dict_reachable_licenses[lic]:
+            self._add_count(self._reach_counts, reachable_lic, delta)
+
+        for tcc_lic, t in self.license_analyzer._get_type_compatibility_classes(lic):
+            self._add_count(self._tcc_count, tcc_lic, delta)
+            dict_licenses = self._tcc_licenses.setdefault(tcc_lic, {})
+            self._add_count(dict_licenses, lic, delta)
+            if tcc_lic in self._tcc_count:
+                self._tcc_type[tcc_lic] = t
+            else:
+                del self._tcc_type[tcc_lic]
+                del self._tcc_licenses[tcc_lic]
+
+    def copy(self):
+        """Get copy of the stack that can be updated independently of this one."""
+        other = StackLicenseAccumulator(self.license_analyzer)
+        other._package_licenses = OrderedDict(self._package_licenses)
+        other._unlicensed_packages = OrderedDict(self._unlicensed_packages)
+        other._license_packages = {lic: OrderedDict(pkgs)
+                                   for lic, pkgs in self._license_packages.items()}
+        other._reach_counts = dict(self._reach_counts)
+        other._tcc_count = dict(self._tcc_count)
+        other._tcc_type = dict(self._tcc_type)
+        other._tcc_licenses = {tcc_lic: dict(lics) for tcc_lic, lics in self._tcc_licenses.items()}
+        return other
+
+    def add(self, package, licenses, la_output=None):
+        """Add package into the stack, the package is replaced if it is there already.
+
+        :param package: package identifier
+        :param licenses: list of package licenses
+        :param la_output: license analysis output for the licenses if computed already
+        :return: license analysis output for the package
+        """
+        self.remove(package)
+
+        if la_output is None:
+            la_output = self.license_analyzer.compute_representative_license(licenses)
+        lic = la_output['representative_license']
+        self._package_licenses[package] = lic
+        if lic is None:
+            self._unlicensed_packages[package] = la_output['status']
+        else:
+            self._license_packages.setdefault(lic, OrderedDict())[package] = None
+            self._update_counts(lic, 1)
+        return la_output
+
+    def remove(self, package):
+        """Remove package from the stack.
+
+        :param package: package identifier
+        :return: True if the package was removed, False if it was not in the stack
+        """
+        if package not in self._package_licenses:
+            return False
+
+        lic = self._package_licenses.pop(package)
+        if lic is None:
+            del self._unlicensed_packages[package]
+        else:
+            list_packages = self._license_packages[lic]
+            del list_packages[package]
+            if not list_packages:
+                del self._license_packages[lic]
+            self._update_counts(lic, -1)
+        return True
+
+    def get_license_packages(self):
+        """Get map of representative license -> list of its packages."""
+        return {lic: list(pkgs.keys()) for lic, pkgs in self._license_packages.items()}
+
+    def get_unlicensed_packages(self):
+        """Get map of package -> analysis status for packages without representative license."""
+        return dict(self._unlicensed_packages)
+
+    def compute_stack_license(self, majority_threshold=None):
+        """Compute representative license for the stack in its current state.
+
+        :param majority_threshold: share of licenses that makes majority when looking for
+                                   outliers, None for MAJORITY_THRESHOLD
+        :return: representative license with supporting information
+        """
+        output = {
+            'status': 'Failure',
+            'reason': 'Input is invalid',
+            'representative_license': None,
+            'conflict_licenses': [],
+            'outlier_licenses': []
+        }
+        if not self._package_licenses:
+            return output
+
+        if self._unlicensed_packages:
+            output['reason'] = 'Some packages have no representative license'
+            return output
+
+        g = self.license_analyzer.g
+        num_packages = len(self._package_licenses)
+        licenses = self._get_licenses_in_stack_order()
+        # common reachable vertices in the same order as they would be found
+        # by DirectedGraph.find_common_reachable_vertices()
+        reachable_vertices = [
+            v for v in g.find_vertex('license', licenses[0]).get_reachable_vertices()
+            if self._reach_counts.get(v.get_prop_value('license')) == num_packages
+        ]
+        license_vertices = [g.find_vertex('license', lic) for lic in licenses]
+
+        if len(reachable_vertices) == 0:  # i.e. conflict
+            output['status'] = 'Conflict'
+            output['reason'] = 'Some licenses are in conflict'
+            output['conflict_licenses'] = \
+                self.license_analyzer._find_conflict_licenses(license_vertices)
+            return output
+
+        license_vertex_ids = [x.id for x in license_vertices]
+        representative_license = self.license_analyzer._select_representative_license(
+            reachable_vertices, license_vertex_ids)
+        if representative_license is None:
+            output['reason'] = 'Something unexpected happened!'
+            return output
+
+        output['status'] = 'Successful'
+        output['reason'] = 'Representative license found'
+        output['representative_license'] = representative_license
+
+        rep_lic_type = self.license_analyzer.dict_license_types[representative_license]
+        output['outlier_licenses'] = \
+            self.license_analyzer._find_outliers_in_type_compatibility_classes(
+                self._get_tcc_counts(licenses), num_packages, rep_lic_type, majority_threshold)
+        return output
+
+    def _get_licenses_in_stack_order(self):
+        """Get distinct representative licenses in the order of their first packages."""
+        licenses = OrderedDict()
+        for lic in self._package_licenses.values():
+            licenses[lic] = None
+            if len(licenses) == len(self._license_packages):
+                break
+        return list(licenses)
+
+    def _get_tcc_counts(self, licenses):
+        """Get counts of type-compatibility-classes as _count_type_compatibility_classes() does.
+
+        The first class with majority is taken for the outliers, so the classes
+        must come in the same order as the full analysis finds them, i.e. by
+        the first occurrence of their licenses in the stack, no matter in what
+        order the packages were added and removed.
+
+        :param licenses: distinct representative licenses in the stack order
+        :return: tuple of dicts keyed by class representative license: count of
+                 licenses, license type and list of licenses in the class
+        """
+        license_order = {lic: i for i, lic in enumerate(licenses)}
+        tcc_count = OrderedDict()
+        tcc_type = OrderedDict()
+        tcc_licenses = {}
+        for lic in licenses:
+            for tcc_lic, _ in self.license_analyzer._get_type_compatibility_classes(lic):
+                if tcc_lic in tcc_count:
+                    continue
+                tcc_count[tcc_lic] = self._tcc_count[tcc_lic]
+                tcc_type[tcc_lic] = self._tcc_type[tcc_lic]
+                dict_licenses = self._tcc_licenses[tcc_lic]
+                tcc_licenses[tcc_lic] = [x for x in sorted(dict_licenses, key=license_order.get)
+                                         for _ in range(dict_licenses[x])]
+        return tcc_count, tcc_type, tcc_licenses
@@ -0,0 +1,62 @@
+"""Registry of license synonym tables shared within the process."""
+
+import hashlib
+import logging
+import threading
+from types import MappingProxyType
+
+_logger = logging.getLogger(__name__)
+
+
+class SynonymRegistry(object):
+    """Registry of license synonym tables shared within the process.
+
+    Each data store with synonyms is read once and its table is shared by
+    all the analyzers built from it, e.g. the snapshots swapped in when only
+    the license graph changes. The table is read again only when the
+    fingerprint of the data store changes. Tables are read-only mappings, so
+    they can be shared by concurrent requests safely.
+    """
+
+    def __init__(self):
+        """Initialize empty registry."""
+        # data store name -> ( fingerprint, version, synonyms )
+        self._tables = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _read_synonyms(synonyms_store):
+        # currently only one synonym json is supported
+        for synonym_json in synonyms_store.list_files():
+            return synonyms_store.read_json_file(synonym_json)
+        return {}
+
+    def get_synonyms(self, synonyms_store):
+        """Get synonym table held by given data store.
+
+        :param synonyms_store: data store with the license synonyms
+        :return: tuple ( version of the table, read-only mapping synonym -> license )
+        """
+        key = synonyms_store.get_name()
+        fingerprint = synonyms_store.get_fingerprint()
+        with self._lock:
+            item = self._tables.get(key)
+        if item is not None and item[0] == fingerprint:
+            return item[1], item[2]
+
+        synonyms = MappingProxyType(self._read_synonyms(synonyms_store))
+        version = hashlib.sha1(fingerprint.encode("utf-8")).hexdigest()[:12]
+        with self._lock:
+            self._tables[key] = (fingerprint, version, synonyms)
+        _logger.info("Loaded {} license synonyms from {}, version {}"
+                     .format(len(synonyms), key, version))
+        return version, synonyms
+
+    def get_versions(self):
+        """Get map of data store name -> version of its synonym table."""
+        with self._lock:
+            return {key: item[1] for key, item in self._tables.items()}
+
+
+# the registry shared by all the analyzers in the process
+synonym_registry = SynonymRegistry()
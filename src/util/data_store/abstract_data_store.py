@@ -14,6 +14,10 @@ class AbstractDataStore(object):
     def list_files(self, _prefix=None, _max_count=None):
         """List all the files in the source directory."""
 
+    @abc.abstractmethod
+    def get_fingerprint(self):
+        """Return a value that changes whenever the stored files change."""
+
     @abc.abstractmethod
     def read_json_file(self, _filename):
         """Read JSON file from the data source."""
@@ -1,6 +1,7 @@
 """Class representing the data store that uses local file system."""
 
 import fnmatch
+import hashlib
 import json
 import os
 
@@ -40,6 +41,15 @@ class LocalFileSystem(AbstractDataStore):
         list_filenames.sort()
         return list_filenames
 
+    def get_fingerprint(self):
+        """Return fingerprint of all JSON files based on their names, mtimes and sizes."""
+        digest = hashlib.sha1()
+        for filename in self.list_files():
+            stat = os.stat(os.path.join(self.src_dir, filename))
+            line = "{}:{}:{}\n".format(filename, stat.st_mtime_ns, stat.st_size)
+            digest.update(line.encode("utf-8"))
+        return digest.hexdigest()
+
     def read_json_file(self, filename):
         """Read JSON file from the data_input source."""
         return json.load(open(os.path.join(self.src_dir, filename)))
@@ -1,5 +1,6 @@
 """Class representing the data store that uses AWS S3."""
 
+import hashlib
 import json
 
 import boto3
@@ -65,6 +66,18 @@ class S3DataStore(AbstractDataStore):
 
         return list_filenames
 
+    def get_fingerprint(self, prefix=None):
+        """Return fingerprint of the objects in the S3 bucket based on their keys and ETags."""
+        if prefix is None:
+            objects = self.bucket.objects.all()
+        else:
+            objects = self.bucket.objects.filter(Prefix=prefix)
+
+        digest = hashlib.sha1()
+        for obj in objects:
+            digest.update("{}:{}\n".format(obj.key, obj.e_tag).encode("utf-8"))
+        return digest.hexdigest()
+
     def read_all_json_files(self):
         """Read all the files from the S3 bucket."""
         list_filenames = self.list_files(prefix=None)
@@ -0,0 +1,228 @@
+"""Differential test harness comparing license analysis engines.
+
+Random license graphs, synonym tables and stacks are generated and every
+analysis is run by both the tested engine and the reference one. Outputs
+must be the same; lists whose order carries no meaning are compared
+sorted and conflicting pairs are compared as sets. When both engines fail,
+they must fail with the same exception type.
+
+It can be run on its own to get bigger samples and timing ratios:
+
+    PYTHONPATH=. MAJORITY_THRESHOLD=0.6 python tests/differential_harness.py --seeds 50
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+from src.license_analysis import LicenseAnalyzer
+from src.util.data_store.local_filesystem import LocalFileSystem
+from src.config import LIC_DATA_DIR
+from tests.reference_engine import ReferenceLicenseAnalyzer
+
+LICENSE_TYPES = ('P', 'WP', 'SP', 'NP')
+JUNK_LICENSES = ('some junk', 'proprietary', 'unknown license')
+
+_known_licenses = []
+
+
+def get_known_licenses():
+    """Get licenses known to the reference engine, only these can appear in the graph."""
+    if not _known_licenses:
+        reference = ReferenceLicenseAnalyzer(
+            LocalFileSystem(src_dir=os.path.join(LIC_DATA_DIR, 'license_graph')),
+            LocalFileSystem(src_dir=os.path.join(LIC_DATA_DIR, 'synonyms')))
+        _known_licenses.extend(reference.known_licenses)
+    return _known_licenses
+
+
+def generate_license_data(rnd, data_dir, num_licenses=10, edge_probability=0.3):
+    """Generate random license graph and synonyms into given directory.
+
+    The graph is a DAG over 'public domain' and a random sample of known
+    licenses, vertices are written into 'license_graph' and synonyms into
+    'synonyms' subdirectory.
+
+    :param rnd: random generator
+    :param data_dir: directory to write the data into
+    :param num_licenses: number of licenses in the graph apart from 'public domain'
+    :param edge_probability: probability of edge between two vertices
+    :return: tuple (graph store, synonyms store, graph licenses, synonyms)
+    """
+    known_licenses = [x for x in get_known_licenses() if x != 'public domain']
+    licenses = ['public domain'] + rnd.sample(known_licenses, num_licenses)
+
+    graph_dir = os.path.join(data_dir, 'license_graph')
+    synonyms_dir = os.path.join(data_dir, 'synonyms')
+    os.makedirs(graph_dir)
+    os.makedirs(synonyms_dir)
+
+    for i, lic in enumerate(licenses):
+        # edges go forward only, so there are no cycles
+        neighbours = ['v{}'.format(j) for j in range(i + 1, len(licenses))
+                      if rnd.random() < edge_probability]
+        if i == 0 and not neighbours:
+            neighbours = ['v{}'.format(rnd.randrange(1, len(licenses)))]
+        vertex = {
+            'license': lic,
+            'type': 'P' if i == 0 else rnd.choice(LICENSE_TYPES),
+            'neighbours': neighbours
+        }
+        with open(os.path.join(graph_dir, 'v{}.json'.format(i)), 'w') as f:
+            json.dump(vertex, f)
+
+    synonyms = {}
+    for lic in licenses:
+        for k in range(rnd.randrange(3)):
+            synonyms['{} alias {}'.format(lic, k)] = lic
+    with open(os.path.join(synonyms_dir, 'license_synonyms.json'), 'w') as f:
+        json.dump(synonyms, f)
+
+    return (LocalFileSystem(src_dir=graph_dir), LocalFileSystem(src_dir=synonyms_dir),
+            licenses, synonyms)
+
+
+def generate_stack(rnd, licenses, synonyms, max_packages=8, max_licenses=3):
+    """Generate random stack i.e. list of license lists of its packages.
+
+    Licenses are mostly the graph ones, sometimes written differently or
+    replaced by a synonym, a known license missing in the graph or junk.
+    """
+    aliases = sorted(synonyms.keys())
+    missing_licenses = [x for x in get_known_licenses() if x not in licenses]
+    stack = []
+    for _ in range(rnd.randint(1, max_packages)):
+        package_licenses = []
+        for _ in range(rnd.randint(1, max_licenses)):
+            p = rnd.random()
+            if p < 0.6:
+                package_licenses.append(rnd.choice(licenses))
+            elif p < 0.75:
+                package_licenses.append(' {} '.format(rnd.choice(licenses).upper()))
+            elif p < 0.93 and aliases:
+                package_licenses.append(rnd.choice(aliases))
+            elif p < 0.98:
+                package_licenses.append(rnd.choice(JUNK_LICENSES))
+            else:
+                package_licenses.append(rnd.choice(missing_licenses))
+        stack.append(package_licenses)
+    return stack
+
+
+def normalize_output(output):
+    """Normalize analysis output so that outputs of two engines can be compared.
+
+    Only pairs of conflicting licenses are compared as sets, all the other
+    lists must come in the same order as the reference engine gives them.
+    """
+    output = dict(output)
+    if output.get('conflict_licenses') and isinstance(output['conflict_licenses'][0], tuple):
+        output['conflict_licenses'] = set(output['conflict_licenses'])
+    return output
+
+
+def _call(timings, engine_name, method, *args):
+    started = time.perf_counter()
+    try:
+        result = normalize_output(method(*args))
+    except Exception as e:
+        result = ('exception', type(e).__name__)
+    timings[engine_name] += time.perf_counter() - started
+    return result
+
+
+def compare_on_stacks(engine, reference, stacks, timings=None):
+    """Run the analyses of given stacks by both engines and compare their outputs.
+
+    For each stack, every package is analyzed, then the representative
+    licenses of the packages are analyzed together and checked for
+    compatibility with the first one.
+
+    :param engine: tested engine
+    :param reference: reference engine
+    :param stacks: list of stacks as generated by generate_stack()
+    :param timings: dict engine name -> seconds, updated by the analysis times
+    :return: list of mismatches ( call description, engine output, reference output )
+    """
+    if timings is None:
+        timings = {'engine': 0.0, 'reference': 0.0}
+    mismatches = []
+
+    def compare(name, *args):
+        result = _call(timings, 'engine', getattr(engine, name), *args)
+        expected = _call(timings, 'reference', getattr(reference, name), *args)
+        if result != expected:
+            mismatches.append(('{}{}'.format(name, args), result, expected))
+        return expected
+
+    for stack in stacks:
+        rep_licenses = []
+        for package_licenses in stack:
+            output = compare('compute_representative_license', package_licenses)
+            if isinstance(output, dict) and output['status'] == 'Successful':
+                rep_licenses.append(output['representative_license'])
+        if rep_licenses:
+            compare('compute_representative_license', rep_licenses)
+            compare('check_compatibility', rep_licenses[0], rep_licenses[1:] or rep_licenses)
+    return mismatches
+
+
+def run_differential(seed, engine_cls=LicenseAnalyzer, reference_cls=ReferenceLicenseAnalyzer,
+                     num_stacks=50, num_licenses=10):
+    """Compare engines on random license data and stacks generated from given seed.
+
+    :return: dict with 'mismatches', 'timings' of loading and analysis, and
+             'speedup' i.e. ratio of the reference analysis time to the engine one
+    """
+    rnd = random.Random(seed)
+    with tempfile.TemporaryDirectory() as data_dir:
+        graph_store, synonyms_store, licenses, synonyms = generate_license_data(
+            rnd, data_dir, num_licenses=num_licenses)
+
+        load_timings = {}
+        started = time.perf_counter()
+        engine = engine_cls(graph_store, synonyms_store)
+        load_timings['engine'] = time.perf_counter() - started
+        started = time.perf_counter()
+        reference = reference_cls(graph_store, synonyms_store)
+        load_timings['reference'] = time.perf_counter() - started
+
+    stacks = [generate_stack(rnd, licenses, synonyms) for _ in range(num_stacks)]
+    timings = {'engine': 0.0, 'reference': 0.0}
+    mismatches = compare_on_stacks(engine, reference, stacks, timings)
+    return {
+        'seed': seed,
+        'mismatches': mismatches,
+        'load_timings': load_timings,
+        'timings': timings,
+        'speedup': timings['reference'] / timings['engine'] if timings['engine'] else None
+    }
+
+
+def main():
+    """Run the harness from the command line and print the report."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seeds', type=int, default=20, help='number of random data sets')
+    parser.add_argument('--stacks', type=int, default=200, help='number of stacks per data set')
+    parser.add_argument('--licenses', type=int, default=12, help='number of graph licenses')
+    args = parser.parse_args()
+
+    total = {'engine': 0.0, 'reference': 0.0}
+    num_mismatches = 0
+    for seed in range(args.seeds):
+        report = run_differential(seed, num_stacks=args.stacks, num_licenses=args.licenses)
+        num_mismatches += len(report['mismatches'])
+        for mismatch in report['mismatches']:
+            print('seed {}: {}\n  engine:    {}\n  reference: {}'.format(seed, *mismatch))
+        for name in total:
+            total[name] += report['timings'][name]
+    print('mismatches: {}'.format(num_mismatches))
+    print('analysis time: engine {:.3f}s, reference {:.3f}s, speedup {:.2f}x'.format(
+        total['engine'], total['reference'], total['reference'] / total['engine']))
+
+
+if __name__ == '__main__':
+    main()
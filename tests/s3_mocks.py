@@ -19,7 +19,7 @@ class MockedS3Object:
     def __init__(self, key=None):
         """Initialize the object."""
         self.key = key
-        pass
+        self.e_tag = '"etag-{}"'.format(key)
 
     def get(self):
         """Fake the behaviour of get method."""
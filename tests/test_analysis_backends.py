@@ -0,0 +1,56 @@
+"""Unit tests for the analysis backends."""
+
+import os
+import pytest
+
+from src.analysis_backends import BACKENDS, get_backend_class, PythonBackend
+from src.license_analysis import LicenseAnalyzer
+from src.util.data_store.local_filesystem import LocalFileSystem
+from src.config import LIC_DATA_DIR
+from tests.differential_harness import run_differential
+
+src_dir = os.path.join(LIC_DATA_DIR, "license_graph")
+graph_store = LocalFileSystem(src_dir=src_dir)
+synonyms_dir = os.path.join(LIC_DATA_DIR, "synonyms")
+synonyms_store = LocalFileSystem(src_dir=synonyms_dir)
+
+
+def test_get_backend_class():
+    """Test the function get_backend_class()."""
+    assert get_backend_class('python') is PythonBackend
+    with pytest.raises(ValueError):
+        get_backend_class('quantum')
+
+
+@pytest.mark.parametrize('backend', sorted(BACKENDS))
+def test_backend_queries(backend):
+    """Test that all the backends answer the queries in the same way as the default one."""
+    license_analyzer = LicenseAnalyzer(graph_store, synonyms_store, backend=backend)
+    default_analyzer = LicenseAnalyzer(graph_store, synonyms_store, backend='python')
+    assert license_analyzer.backend.name == backend
+    assert license_analyzer.dict_reachable_licenses == default_analyzer.dict_reachable_licenses
+
+    g = license_analyzer.g
+    vertices = g.get_vertices()
+    for i in range(len(vertices)):
+        license_vertices = [vertices[i], vertices[(i * 7) % len(vertices)]]
+        assert license_analyzer.backend.find_common_reachable_vertices(license_vertices) == \
+            default_analyzer.backend.find_common_reachable_vertices(license_vertices)
+
+    for lic in license_analyzer.known_licenses:
+        assert license_analyzer.backend.get_compatibility_classes(lic) == \
+            default_analyzer.backend.get_compatibility_classes(lic)
+
+    license_vertices = [g.find_vertex('license', x) for x in ('gplv2', 'gplv3+', 'mit')]
+    assert set(license_analyzer.backend.find_conflict_licenses(license_vertices)) == \
+        {('gplv2', 'gplv3+')}
+
+
+@pytest.mark.parametrize('backend', sorted(BACKENDS))
+def test_backend_against_reference(backend):
+    """Test that all the backends agree with the reference engine on random license data."""
+    def engine_cls(graph_store, synonyms_store):
+        return LicenseAnalyzer(graph_store, synonyms_store, backend=backend)
+
+    for seed in range(5):
+        assert run_differential(seed, engine_cls=engine_cls, num_stacks=30)['mismatches'] == []
@@ -46,6 +46,15 @@ def test_stack_license_endpoint(client):
     assert json_data['stack_license'] == 'gplv2'
 
 
+def test_metrics_endpoint(client):
+    """Test the endpont /api/v1/metrics."""
+    response = client.get(api_route_for("metrics"))
+    assert response.status_code == 200
+    json_data = get_json_from_response(response)
+    assert "license_data_version" in json_data
+    assert set(json_data["analysis_paths"]) == {'single', 'identical', 'type_class', 'full'}
+
+
 def test_license_recommender_endpoint_empty_payload(client):
     """Test the endpont /api/v1/license_recommender."""
     payload = {}
@@ -0,0 +1,48 @@
+"""Unit tests for the CircuitBreaker class."""
+
+from unittest.mock import patch
+
+from src.circuit_breaker import CircuitBreaker
+
+
+def test_open_after_consecutive_failures():
+    """Test that the breaker opens after consecutive failures only."""
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+    assert breaker.get_stats() == {'failures': 3, 'rejections': 1, 'openings': 1,
+                                   'state': CircuitBreaker.OPEN}
+
+
+def test_half_open():
+    """Test that one trial request is let through after the reset timeout."""
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10)
+    with patch('src.circuit_breaker.time.monotonic', return_value=100.0):
+        breaker.record_failure()
+    with patch('src.circuit_breaker.time.monotonic', return_value=110.0):
+        assert breaker.allow_request()
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        assert not breaker.allow_request()
+        # failed trial opens the breaker again
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+    with patch('src.circuit_breaker.time.monotonic', return_value=120.0):
+        assert breaker.allow_request()
+        breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED
+        assert breaker.allow_request()
+    assert breaker.get_stats()['openings'] == 2
+
+
+def test_disabled():
+    """Test that the breaker with zero threshold never opens."""
+    breaker = CircuitBreaker(failure_threshold=0, reset_timeout=10)
+    for _ in range(10):
+        breaker.record_failure()
+    assert breaker.allow_request()
+    assert breaker.state == CircuitBreaker.CLOSED
@@ -0,0 +1,34 @@
+"""Differential tests of the license analysis against the frozen reference engine."""
+
+import os
+import random
+
+from src.license_analysis import LicenseAnalyzer
+from src.util.data_store.local_filesystem import LocalFileSystem
+from src.config import LIC_DATA_DIR
+from tests.differential_harness import compare_on_stacks, generate_stack, run_differential
+from tests.reference_engine import ReferenceLicenseAnalyzer
+
+src_dir = os.path.join(LIC_DATA_DIR, "license_graph")
+graph_store = LocalFileSystem(src_dir=src_dir)
+synonyms_dir = os.path.join(LIC_DATA_DIR, "synonyms")
+synonyms_store = LocalFileSystem(src_dir=synonyms_dir)
+
+
+def test_random_license_data():
+    """Test that the analyzer agrees with the reference engine on random license data."""
+    for seed in range(20):
+        report = run_differential(seed, num_stacks=30)
+        assert report['mismatches'] == [], "seed {}".format(seed)
+
+
+def test_real_license_data():
+    """Test that the analyzer agrees with the reference engine on the real license data."""
+    engine = LicenseAnalyzer(graph_store, synonyms_store)
+    reference = ReferenceLicenseAnalyzer(graph_store, synonyms_store)
+
+    rnd = random.Random(0)
+    licenses = [x for x in reference.known_licenses if x != 'cddlv1.1+']
+    synonyms = {k: v for k, v in reference.syn.items() if v in licenses}
+    stacks = [generate_stack(rnd, licenses, synonyms) for _ in range(200)]
+    assert compare_on_stacks(engine, reference, stacks) == []
@@ -0,0 +1,26 @@
+"""Unit tests for the LatencyTracker class."""
+
+from src.latency_tracker import LatencyTracker
+
+
+def test_get_percentile():
+    """Test the method LatencyTracker.get_percentile()."""
+    tracker = LatencyTracker(window=100, min_samples=10)
+    for i in range(1, 10):
+        tracker.record(i / 100.0)
+    assert tracker.get_percentile(95) is None
+
+    tracker.record(0.1)
+    assert tracker.get_percentile(50) == 0.05
+    assert tracker.get_percentile(95) == 0.1
+    assert tracker.get_percentile(100) == 0.1
+
+
+def test_window():
+    """Test that only the latest latencies are kept."""
+    tracker = LatencyTracker(window=10, min_samples=1)
+    for _ in range(10):
+        tracker.record(5.0)
+    for _ in range(10):
+        tracker.record(0.1)
+    assert tracker.get_percentile(100) == 0.1
@@ -7,6 +7,7 @@ from src.license_analysis import LicenseAnalyzer
 from src.util.data_store.local_filesystem import LocalFileSystem
 from src.config import LIC_DATA_DIR
 import os
+import threading
 
 src_dir = os.path.join(LIC_DATA_DIR, "license_graph")
 graph_store = LocalFileSystem(src_dir=src_dir)
@@ -34,13 +35,14 @@ class MockedVertice:
         return None
 
 
-@patch('src.directed_graph.DirectedGraph.find_common_reachable_vertices',
-       return_value=[MockedVertice(), MockedVertice()])
-def test_compute_representative_error_checking(_mocking_object):
+def test_compute_representative_error_checking():
     """Test the method LicenseAnalyzer.compute_representative_license() for correct behaviour."""
     license_analyzer = LicenseAnalyzer(graph_store, synonyms_store)
-    list_licenses = ['gplv2', 'gplv2', 'gplv2']
-    output = license_analyzer.compute_representative_license(list_licenses)
+    # licenses of different types so the fast paths do not apply
+    list_licenses = ['gplv2', 'mit', 'apache 2.0']
+    with patch.object(license_analyzer.backend, 'find_common_reachable_vertices',
+                      return_value=[MockedVertice(), MockedVertice()]):
+        output = license_analyzer.compute_representative_license(list_licenses)
     assert output['status'] == 'Failure'
     assert output['reason'] == 'Something unexpected happened!'
     assert output['representative_license'] is None
@@ -180,6 +182,138 @@ def test_check_compatibility_conflicting_licenses_2():
     assert output['conflict_licenses'] == ['gplv3+']
 
 
+def test_find_blocking_licenses():
+    """Test the method LicenseAnalyzer.find_blocking_licenses()."""
+    license_analyzer = LicenseAnalyzer(graph_store, synonyms_store)
+
+    output = license_analyzer.find_blocking_licenses(['mit', 'bsd-new'], 'apache 2.0')
+    assert output == []
+
+    output = license_analyzer.find_blocking_licenses(
+        ['mit', 'gplv2', 'apache 2.0', 'gplv3+', 'unknown'], 'apache 2.0')
+    assert output == ['gplv2', 'gplv3+', 'unknown']
+
+
+def test_select_license_choices():
+    """Test the method LicenseAnalyzer.select_license_choices()."""
+    license_analyzer = LicenseAnalyzer(graph_store, synonyms_store)
+
+    output = license_analyzer.select_license_choices([['MIT', 'GPL V2'], ['GPL V3+', 'APACHE']])
+    assert output == ['MIT', 'APACHE']
+
+    # unknown alternatives are ignored, packages w/o known licenses get nothing
+    output = license_analyzer.select_license_choices([['SOME_JUNK', 'GPL V2'], [], ['XYZ']])
+    assert output == ['GPL V2', None, None]
+
+    # no stack license possible, the least restrictive alternatives are selected
+    output = license_analyzer.select_license_choices([['GPL V2'], ['GPL V3+', 'AGPL V3']])
+    assert output == ['GPL V2', 'GPL V3+']
+
+    # a lot of dual licensed packages
+    list_choices = [['GPL V2', 'MIT'], ['BSD', 'GPL V3+'], ['LGPL V2.1', 'EPL 1.0']] * 200
+    output = license_analyzer.select_license_choices(list_choices)
+    assert output == ['MIT', 'BSD', 'LGPL V2.1'] * 200
+
+
+def test_find_minimal_conflict_removal():
+    """Test the method LicenseAnalyzer.find_minimal_conflict_removal()."""
+    license_analyzer = LicenseAnalyzer(graph_store, synonyms_store)
+
+    # no conflict, nothing needs to be removed
+    output = license_analyzer.find_minimal_conflict_removal({'mit': 1, 'apache 2.0': 3})
+    assert output['removed_licenses'] == []
+    assert output['weight'] == 0
+    assert output['complete']
+
+    # the cheapest option is to remove the only gplv3+ package
+    output = license_analyzer.find_minimal_conflict_removal({'gplv2': 3, 'gplv3+': 1})
+    assert output['removed_licenses'] == ['gplv3+']
+    assert output['weight'] == 1
+    assert output['complete']
+
+    # two licenses with one package each are cheaper than one license with three packages
+    output = license_analyzer.find_minimal_conflict_removal(
+        {'gplv2': 1, 'epl 1.0': 1, 'gplv3+': 3, 'mit': 1})
+    assert output['removed_licenses'] == ['epl 1.0', 'gplv2']
+    assert output['weight'] == 2
+
+    # nothing is found when there is no time left
+    output = license_analyzer.find_minimal_conflict_removal({'gplv2': 3, 'gplv3+': 1},
+                                                            time_budget=-1)
+    assert output['removed_licenses'] == []
+    assert not output['complete']
+
+
+def test_compute_representative_license_fast_paths():
+    """Test that the fast paths give the same output as the full analysis."""
+    license_analyzer = LicenseAnalyzer(graph_store, synonyms_store)
+    list_inputs = [
+        ['MIT'],
+        ['gplv2', 'GPL V2', 'gplv2'],
+        ['mit', 'bsd-new', 'apache 2.0', 'mit'],
+        ['lgplv2.1+', 'lgplv2.1', 'epl 1.0'],
+        ['lgplv2.1', 'lgplv3+'],
+        ['gplv2', 'gplv3+'],
+        ['mit', 'gplv2'],
+        ['public domain', 'mit', 'affero gplv3']
+    ]
+    for list_licenses in list_inputs:
+        output = license_analyzer.compute_representative_license(list_licenses)
+        with patch.object(LicenseAnalyzer, '_find_fast_path_license',
+                          return_value=(None, None)):
+            expected_output = license_analyzer.compute_representative_license(list_licenses)
+        assert output == expected_output
+
+    assert license_analyzer.get_path_counts() == {
+        'single': 1,
+        'identical': 1,
+        'type_class': 2,
+        # patched analyses are counted as full ones too
+        'full': 4 + len(list_inputs)
+    }
+
+
+def test_path_counts_threads():
+    """Test that the analyses made by several threads are all counted."""
+    license_analyzer = LicenseAnalyzer(graph_store, synonyms_store)
+
+    def analyze():
+        for _ in range(50):
+            license_analyzer.compute_representative_license(['MIT'])
+
+    threads = [threading.Thread(target=analyze) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert license_analyzer.get_path_counts()['single'] == 200
+
+
+def test_lazy_type_compatibility_classes():
+    """Test that type-compatibility-classes are computed just once, on their first use."""
+    license_analyzer = LicenseAnalyzer(graph_store, synonyms_store)
+    assert license_analyzer._dict_type_compatibility_classes is None
+
+    with patch.object(LicenseAnalyzer, '_find_type_compatibility_classes', autospec=True,
+                      side_effect=LicenseAnalyzer._find_type_compatibility_classes) as mocked:
+        threads = [threading.Thread(target=license_analyzer.compute_representative_license,
+                                    args=(['MIT', 'BSD', 'MPL 2.0'],))
+                   for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert mocked.call_count == 1
+
+    dict_tcc = license_analyzer.dict_type_compatibility_classes
+    assert set(dict_tcc.keys()) == {'P', 'WP', 'SP', 'NP'}
+    for lic in license_analyzer.known_licenses:
+        expected_classes = [(tcc_lic, t) for t, dict_compatibles in dict_tcc.items()
+                            for tcc_lic, list_compatibles in dict_compatibles.items()
+                            if lic in list_compatibles]
+        assert license_analyzer._get_type_compatibility_classes(lic) == expected_classes
+
+
 def test_create_graph():
     """Test the method _create_graph()."""
     # this is quite dummy test, because the method _create_graph is not used ATM
@@ -1,5 +1,7 @@
 """Unit tests for the LicenseAnalyzer module."""
 
+import pytest
+
 from src.license_analysis import LicenseAnalyzer
 from src.util.data_store.local_filesystem import LocalFileSystem
 from src.config import LIC_DATA_DIR
@@ -89,6 +91,58 @@ def test_compute_representative_license_outlier_licenses():
     assert set(output['outlier_licenses']) == set(['lgplv2.1', 'lgplv3+'])
 
 
+def test_compute_representative_license_skip_outliers():
+    """Test the method LicenseAnalyzer.compute_representative_license() w/o outliers."""
+    license_analyzer = LicenseAnalyzer(graph_store, synonyms_store)
+
+    list_licenses = ['MIT', 'BSD', 'MPL 2.0']
+    output = license_analyzer.compute_representative_license(list_licenses, find_outliers=False)
+    assert output['status'] == 'Successful'
+    assert output['representative_license'] == 'mpl 2.0'
+    assert output['outlier_licenses'] == []
+    # type-compatibility-classes are not needed, so they are not computed at all
+    assert license_analyzer._dict_type_compatibility_classes is None
+
+
+def test_compute_representative_license_majority_threshold():
+    """Test the method LicenseAnalyzer.compute_representative_license() with given threshold."""
+    license_analyzer = LicenseAnalyzer(graph_store, synonyms_store)
+
+    list_licenses = ['MIT', 'BSD', 'PD', 'MPL 2.0']
+    output = license_analyzer.compute_representative_license(list_licenses,
+                                                             majority_threshold=0.6)
+    assert output['outlier_licenses'] == ['mpl 2.0']
+    # permissive licenses are not in majority anymore
+    output = license_analyzer.compute_representative_license(list_licenses,
+                                                             majority_threshold=0.8)
+    assert output['representative_license'] == 'mpl 2.0'
+    assert output['outlier_licenses'] == []
+
+    with pytest.raises(ValueError):
+        license_analyzer.compute_representative_license(list_licenses, majority_threshold=1.5)
+    with pytest.raises(ValueError):
+        license_analyzer.compute_representative_license(list_licenses, majority_threshold='x')
+
+
+def test_sweep_outlier_licenses():
+    """Test the method LicenseAnalyzer.sweep_outlier_licenses()."""
+    license_analyzer = LicenseAnalyzer(graph_store, synonyms_store)
+
+    thresholds = [0.1 * x for x in range(1, 11)]
+    for list_licenses in (['MIT', 'BSD', 'PD', 'lgplv2.1', 'lgplv3+'],
+                          ['MIT', 'MPL 2.0', 'MPL 2.0'],
+                          ['MIT']):
+        output = license_analyzer.sweep_outlier_licenses(list_licenses, thresholds)
+        assert sorted(output.keys()) == thresholds
+        for t in thresholds:
+            la_output = license_analyzer.compute_representative_license(list_licenses,
+                                                                        majority_threshold=t)
+            assert output[t] == la_output['outlier_licenses']
+
+    # no representative license, no outliers
+    assert license_analyzer.sweep_outlier_licenses(['gplv2', 'gplv3+'], thresholds) == {}
+
+
 def test_compute_representative_license_unknown():
     """Test the method LicenseAnalyzer.compute_representative_license() for unknown license."""
     license_analyzer = LicenseAnalyzer(graph_store, synonyms_store)
@@ -0,0 +1,149 @@
+"""Tests for the class LicenseAnalyzerRegistry."""
+
+import json
+import os
+import shutil
+
+from src.license_analyzer_registry import LicenseAnalyzerRegistry, _estimate_size
+from src.license_data_reloader import LicenseDataReloader
+from src.stack_license import StackLicenseAnalyzer
+from src.config import LIC_DATA_DIR
+
+
+# analyzer for the latest license data is shared by all tests
+data_reloader = LicenseDataReloader(poll_interval=0)
+
+
+def _prepare_versions(tmpdir, versions):
+    """Create releases of license data, each one with one extra synonym."""
+    versions_dir = tmpdir.join("versions")
+    for version in versions:
+        for subdir in ("license_graph", "synonyms"):
+            shutil.copytree(os.path.join(LIC_DATA_DIR, subdir),
+                            str(versions_dir.join(version, subdir)))
+        path = str(versions_dir.join(version, "synonyms", "license_synonyms.json"))
+        with open(path) as fin:
+            synonyms = json.load(fin)
+        synonyms["license of " + version] = "mit"
+        with open(path, "w") as fout:
+            json.dump(synonyms, fout)
+    # this one is not a release of license data
+    versions_dir.mkdir("garbage")
+    return str(versions_dir)
+
+
+def test_latest_version():
+    """Check that the latest analyzer is returned when no version is pinned."""
+    registry = LicenseAnalyzerRegistry(data_reloader, versions_dir="nonexistent")
+    assert registry.list_versions() == []
+    assert registry.get_analyzer() is data_reloader.analyzer
+    assert registry.get_analyzer(data_reloader.analyzer.data_version) is data_reloader.analyzer
+    assert registry.get_analyzer("v1") is None
+
+
+def test_pinned_versions_are_loaded_lazily(tmpdir):
+    """Check that the analyzers for pinned versions are loaded on first use only."""
+    versions_dir = _prepare_versions(tmpdir, ["v1", "v2"])
+    registry = LicenseAnalyzerRegistry(data_reloader, versions_dir=versions_dir)
+    assert registry.list_versions() == ["v1", "v2"]
+    assert registry.get_used_memory() == 0
+
+    analyzer1 = registry.get_analyzer("v1")
+    assert analyzer1 is not None
+    assert analyzer1.find_synonym("license of v1") == "mit"
+    assert analyzer1.find_synonym("license of v2") == "license of v2"
+    assert registry.get_used_memory() > 0
+
+    # the same analyzer is returned for the next request
+    assert registry.get_analyzer("v1") is analyzer1
+
+    analyzer2 = registry.get_analyzer("v2")
+    assert analyzer2.find_synonym("license of v2") == "mit"
+
+    # only known releases can be loaded
+    assert registry.get_analyzer("garbage") is None
+    assert registry.get_analyzer("../versions/v1") is None
+
+
+def test_lru_eviction(tmpdir):
+    """Check that the least recently used analyzers are evicted to fit the memory budget."""
+    versions_dir = _prepare_versions(tmpdir, ["v1", "v2", "v3"])
+    analyzer_size = _estimate_size(data_reloader.analyzer)
+    registry = LicenseAnalyzerRegistry(data_reloader, versions_dir=versions_dir,
+                                       memory_budget=int(analyzer_size * 2.5))
+
+    analyzer1 = registry.get_analyzer("v1")
+    registry.get_analyzer("v2")
+    # v1 becomes the most recently used one
+    assert registry.get_analyzer("v1") is analyzer1
+    registry.get_analyzer("v3")
+
+    assert list(registry._analyzers.keys()) == ["v1", "v3"]
+    assert registry.get_used_memory() <= registry.memory_budget
+    assert registry.get_analyzer("v1") is analyzer1
+
+
+def test_stack_license_pinned_version(tmpdir):
+    """Check that the stack license can be computed against pinned version of license data."""
+    versions_dir = _prepare_versions(tmpdir, ["v1"])
+    registry = LicenseAnalyzerRegistry(data_reloader, versions_dir=versions_dir)
+    stack_license_analyzer = StackLicenseAnalyzer(data_reloader, registry)
+
+    payload = {
+        'license_data_version': 'v1',
+        'packages': [
+            {
+                'package': 'p1',
+                'version': '1.1',
+                'licenses': ['license of v1']
+            }
+        ]
+    }
+    output = stack_license_analyzer.compute_stack_license(payload=payload)
+    assert output['status'] == 'Successful'
+    assert output['stack_license'] == 'mit'
+    assert output['license_data_version'] == 'v1'
+
+    payload['license_data_version'] = 'v2'
+    output = stack_license_analyzer.compute_stack_license(payload=payload)
+    assert output['status'] == 'Failure'
+    assert output['message'] == 'Unknown license data version v2'
+
+    del payload['license_data_version']
+    output = stack_license_analyzer.compute_stack_license(payload=payload)
+    assert output['status'] == 'Unknown'
+    assert output['license_data_version'] == data_reloader.analyzer.data_version
+
+
+def test_pinned_data_versions(tmpdir):
+    """Check that the releases and replaced latest data can be pinned by their data version."""
+    versions_dir = _prepare_versions(tmpdir, ["v1"])
+    reloader = LicenseDataReloader(poll_interval=0)
+    registry = LicenseAnalyzerRegistry(reloader, versions_dir=versions_dir)
+
+    analyzer1 = registry.get_analyzer("v1")
+    assert registry.get_analyzer(analyzer1.data_version) is analyzer1
+    assert registry.get_analyzer("0123456789ab") is None
+
+    # the latest data gets reloaded
+    replaced_analyzer = reloader.analyzer
+    reloader._analyzer = registry.get_analyzer("v1")
+    assert registry.get_analyzer() is analyzer1
+    assert registry.get_analyzer(replaced_analyzer.data_version) is replaced_analyzer
+
+
+def test_stack_license_broken_version(tmpdir):
+    """Check that a release which cannot be loaded gives failure."""
+    versions_dir = _prepare_versions(tmpdir, ["v1"])
+    with open(os.path.join(versions_dir, "v1", "synonyms", "license_synonyms.json"), "w") as fout:
+        fout.write("{")
+    registry = LicenseAnalyzerRegistry(data_reloader, versions_dir=versions_dir)
+    stack_license_analyzer = StackLicenseAnalyzer(data_reloader, registry)
+
+    payload = {
+        'license_data_version': 'v1',
+        'packages': [{'package': 'p1', 'version': '1.1', 'licenses': ['MIT']}]
+    }
+    output = stack_license_analyzer.compute_stack_license(payload=payload)
+    assert output['status'] == 'Failure'
+    assert output['message'] == 'Cannot load license data version v1'
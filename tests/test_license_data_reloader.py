@@ -0,0 +1,89 @@
+"""Tests for the class LicenseDataReloader."""
+
+import json
+import os
+import shutil
+
+from src.license_data_reloader import LicenseDataReloader
+from src.util.data_store.local_filesystem import LocalFileSystem
+from src.config import LIC_DATA_DIR
+
+
+def _prepare_license_data(tmpdir):
+    """Copy the license graph and synonyms into a temporary directory."""
+    for subdir in ("license_graph", "synonyms"):
+        shutil.copytree(os.path.join(LIC_DATA_DIR, subdir), str(tmpdir.join(subdir)))
+    graph_store = LocalFileSystem(src_dir=str(tmpdir.join("license_graph")))
+    synonyms_store = LocalFileSystem(src_dir=str(tmpdir.join("synonyms")))
+    return graph_store, synonyms_store
+
+
+def _add_synonym(tmpdir, name, synonym):
+    """Add new synonym into the synonyms file and make sure its mtime changes."""
+    path = str(tmpdir.join("synonyms", "license_synonyms.json"))
+    with open(path) as fin:
+        synonyms = json.load(fin)
+    synonyms[name] = synonym
+    with open(path, "w") as fout:
+        json.dump(synonyms, fout)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+
+
+def test_no_reload_without_changes(tmpdir):
+    """Check that the snapshot is kept when the license data did not change."""
+    graph_store, synonyms_store = _prepare_license_data(tmpdir)
+    reloader = LicenseDataReloader(graph_store, synonyms_store, poll_interval=0)
+    analyzer = reloader.analyzer
+    assert analyzer.data_version
+
+    assert reloader.reload_if_changed() is False
+    assert reloader.analyzer is analyzer
+
+
+def test_reload_on_synonyms_change(tmpdir):
+    """Check that a new snapshot is swapped in when the synonyms change."""
+    graph_store, synonyms_store = _prepare_license_data(tmpdir)
+    reloader = LicenseDataReloader(graph_store, synonyms_store, poll_interval=0)
+    old_analyzer = reloader.analyzer
+    assert old_analyzer.find_synonym("my mit") == "my mit"
+
+    _add_synonym(tmpdir, "my mit", "mit")
+    assert reloader.reload_if_changed() is True
+
+    new_analyzer = reloader.analyzer
+    assert new_analyzer is not old_analyzer
+    assert new_analyzer.data_version != old_analyzer.data_version
+    assert new_analyzer.find_synonym("my mit") == "mit"
+
+    # in-flight requests keep using the old snapshot unchanged
+    assert old_analyzer.find_synonym("my mit") == "my mit"
+    output = old_analyzer.compute_representative_license(['MIT', 'APACHE'])
+    assert output['representative_license'] == 'apache 2.0'
+
+
+def test_broken_data_keeps_snapshot(tmpdir):
+    """Check that the current snapshot is kept when the new data cannot be loaded."""
+    graph_store, synonyms_store = _prepare_license_data(tmpdir)
+    reloader = LicenseDataReloader(graph_store, synonyms_store, poll_interval=0)
+    analyzer = reloader.analyzer
+
+    tmpdir.join("license_graph", "mit.json").write("{ this is not JSON")
+    assert reloader.reload_if_changed() is False
+    assert reloader.analyzer is analyzer
+
+
+def test_start_stop(tmpdir):
+    """Check that the background polling can be started and stopped."""
+    graph_store, synonyms_store = _prepare_license_data(tmpdir)
+
+    reloader = LicenseDataReloader(graph_store, synonyms_store, poll_interval=0)
+    reloader.start()
+    # polling is disabled
+    assert reloader._thread is None
+
+    reloader = LicenseDataReloader(graph_store, synonyms_store, poll_interval=60)
+    reloader.start()
+    assert reloader._thread.is_alive()
+    reloader.stop()
+    assert reloader._thread is None
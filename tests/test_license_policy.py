@@ -0,0 +1,135 @@
+"""Tests for the class LicensePolicy."""
+
+import os
+import pytest
+
+from src.license_analysis import LicenseAnalyzer
+from src.license_data_reloader import LicenseDataReloader
+from src.license_policy import LicensePolicy
+from src.stack_license import StackLicenseAnalyzer
+from src.util.data_store.local_filesystem import LocalFileSystem
+from src.config import LIC_DATA_DIR
+
+src_dir = os.path.join(LIC_DATA_DIR, "license_graph")
+graph_store = LocalFileSystem(src_dir=src_dir)
+synonyms_dir = os.path.join(LIC_DATA_DIR, "synonyms")
+synonyms_store = LocalFileSystem(src_dir=synonyms_dir)
+
+license_analyzer = LicenseAnalyzer(graph_store, synonyms_store)
+
+
+def _mask(*licenses):
+    """Compute bitmask for given licenses."""
+    mask = 0
+    for lic in licenses:
+        mask |= license_analyzer.dict_license_masks[lic]
+    return mask
+
+
+def test_license_masks():
+    """Check that each license has its own bit."""
+    masks = license_analyzer.dict_license_masks
+    assert len(set(masks.values())) == len(license_analyzer.dict_license_types)
+    assert license_analyzer.get_licenses_from_mask(_mask('mit', 'gplv2')) == ['gplv2', 'mit']
+    reachable_mask = license_analyzer.dict_reachable_masks['gplv3+']
+    assert license_analyzer.get_licenses_from_mask(reachable_mask) == ['affero gplv3', 'gplv3+']
+
+
+def test_compile_and_evaluate():
+    """Check the compilation and evaluation of policy rules."""
+    policy = LicensePolicy.compile(license_analyzer, {
+        'name': 'product',
+        'allow': [{'type': 'P'}, 'LGPL V2.1'],
+        'deny': [{'reachable_from': 'GPL V3+'}],
+        'review': ['MPL 2.0', 'gplv3+']
+    })
+    assert policy.name == 'product'
+
+    denied, review, not_allowed = policy.evaluate(_mask('mit', 'apache 2.0', 'lgplv2.1'))
+    assert not denied and not review and not not_allowed
+
+    denied, review, not_allowed = policy.evaluate(_mask('mit', 'gplv3+', 'mpl 2.0', 'gplv2'))
+    # deny takes precedence over review
+    assert denied == _mask('gplv3+')
+    assert review == _mask('mpl 2.0')
+    assert not_allowed == _mask('gplv2')
+
+    # no allow list means that all licenses are allowed
+    policy = LicensePolicy.compile(license_analyzer, {'deny': ['affero gplv3']})
+    assert policy.name == 'unnamed'
+    assert policy.evaluate(_mask('gplv2', 'affero gplv3')) == (_mask('affero gplv3'), 0, 0)
+
+
+def test_compile_errors():
+    """Check that invalid policies are rejected."""
+    with pytest.raises(ValueError):
+        LicensePolicy.compile(license_analyzer, {'deny': ['SOME_JUNK']})
+    with pytest.raises(ValueError):
+        LicensePolicy.compile(license_analyzer, {'deny': [{'reachable_from': 'SOME_JUNK'}]})
+    with pytest.raises(ValueError):
+        LicensePolicy.compile(license_analyzer, {'deny': [{'type': 'XP'}]})
+    with pytest.raises(ValueError):
+        LicensePolicy.compile(license_analyzer, {'deny': [{'something': 'else'}]})
+    with pytest.raises(ValueError):
+        LicensePolicy.compile(license_analyzer, {'deny': [42]})
+
+
+def test_stack_license_policy(tmpdir):
+    """Check that the policy violations are reported for the stack."""
+    policies_store = LocalFileSystem(src_dir=str(tmpdir))
+    policies_store.write_json_file("product.json", {
+        'name': 'product',
+        'allow': [{'type': 'P'}, {'type': 'WP'}],
+        'deny': [{'reachable_from': 'GPL V3+'}],
+        'review': ['LGPL V2.1']
+    })
+    data_reloader = LicenseDataReloader(graph_store, synonyms_store, policies_store,
+                                        poll_interval=0)
+    assert 'product' in data_reloader.analyzer.policies
+    stack_license_analyzer = StackLicenseAnalyzer(data_reloader)
+
+    payload = {
+        'license_policy': 'product',
+        'packages': [
+            {
+                'package': 'p1',
+                'version': '1.1',
+                'licenses': ['MIT', 'GPL V3+']
+            },
+            {
+                'package': 'p2',
+                'version': '1.1',
+                'licenses': ['LGPL V2.1', 'BSD']
+            },
+            {
+                'package': 'p3',
+                'version': '1.1',
+                'licenses': ['GPL V2']
+            }
+        ]
+    }
+    output = stack_license_analyzer.compute_stack_license(payload=payload)
+    violations = output['policy_violations']
+    assert violations['status'] == 'Violation'
+    assert violations['policy'] == 'product'
+    assert violations['denied'] == {'gplv3+': ['p1']}
+    assert violations['review'] == {'lgplv2.1': ['p2']}
+    assert violations['not_allowed'] == {'gplv2': ['p3']}
+
+    payload['license_policy'] = {'name': 'inline', 'review': ['MIT']}
+    output = stack_license_analyzer.compute_stack_license(payload=payload)
+    assert output['policy_violations']['status'] == 'Review'
+    assert output['policy_violations']['review'] == {'mit': ['p1']}
+
+    payload['license_policy'] = {'allow': [{'type': 'P'}, {'type': 'WP'}, {'type': 'SP'}]}
+    output = stack_license_analyzer.compute_stack_license(payload=payload)
+    assert output['policy_violations']['status'] == 'Compliant'
+
+    payload['license_policy'] = 'nonexistent'
+    output = stack_license_analyzer.compute_stack_license(payload=payload)
+    assert output['policy_violations']['status'] == 'Failure'
+    assert output['policy_violations']['message'] == 'Unknown license policy'
+
+    payload['license_policy'] = {'deny': ['SOME_JUNK']}
+    output = stack_license_analyzer.compute_stack_license(payload=payload)
+    assert output['policy_violations']['status'] == 'Failure'
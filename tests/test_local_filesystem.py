@@ -114,6 +114,21 @@ def test_write_json_file():
     assert data["t2"] == 2
 
 
+def test_get_fingerprint(tmpdir):
+    """Check the method get_fingerprint()."""
+    localFileSystem = LocalFileSystem(str(tmpdir))
+    empty_fingerprint = localFileSystem.get_fingerprint()
+    assert empty_fingerprint == localFileSystem.get_fingerprint()
+
+    localFileSystem.write_json_file("test.json", {"t1": 1})
+    fingerprint = localFileSystem.get_fingerprint()
+    assert fingerprint != empty_fingerprint
+
+    # the fingerprint must change when the file is modified
+    localFileSystem.write_json_file("test.json", {"t1": 1, "t2": 2})
+    assert localFileSystem.get_fingerprint() != fingerprint
+
+
 def test_upload_file():
     """Check the method upload_file()."""
     localFileSystem = LocalFileSystem("")
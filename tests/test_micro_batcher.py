@@ -0,0 +1,103 @@
+"""Unit tests for the MicroBatcher class."""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.micro_batcher import MicroBatcher
+
+
+def _batch_fn(batches, deadlines=None):
+    def fn(keys, deadline):
+        batches.append(keys)
+        if deadlines is not None:
+            deadlines.append(deadline)
+        return [key * 10 for key in keys]
+    return fn
+
+
+def test_window():
+    """Test that keys submitted within the window are looked up as one batch."""
+    batches = []
+    batcher = MicroBatcher(_batch_fn(batches), window=0.05, max_size=100)
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        futures = list(executor.map(batcher.submit, [1, 2, 1]))
+    assert [f.result(1) for f in futures] == [10, 20, 10]
+    assert batches == [[1, 2]]
+    assert batcher.get_stats() == {'batches': 1, 'keys': 2, 'dropped_keys': 0}
+
+
+def test_max_size():
+    """Test that the full batch runs without waiting for the window."""
+    batches = []
+    batcher = MicroBatcher(_batch_fn(batches), window=10, max_size=2)
+    started = time.monotonic()
+    futures = [batcher.submit(k) for k in (1, 2, 3)]
+    assert futures[0].result(1) == 10
+    assert futures[1].result(1) == 20
+    assert time.monotonic() - started < 1
+    assert batches == [[1, 2]]
+    assert not futures[2].done()
+
+
+def test_exception():
+    """Test that the exception of the batch function is set to all its futures."""
+    def fn(keys, deadline):
+        raise ValueError('graph DB is down')
+
+    batcher = MicroBatcher(fn, window=0.01, max_size=100)
+    futures = [batcher.submit(k) for k in (1, 2)]
+    for future in futures:
+        with pytest.raises(ValueError):
+            future.result(1)
+
+
+def test_deadline():
+    """Test that the batch runs with the latest deadline of its submitters."""
+    batches, deadlines = [], []
+    batcher = MicroBatcher(_batch_fn(batches, deadlines), window=0.05, max_size=100)
+    now = time.monotonic()
+    futures = [batcher.submit(1, now + 10), batcher.submit(2, now + 5), batcher.submit(1, now + 20)]
+    assert [f.result(1) for f in futures] == [10, 20, 10]
+    # submitter with no deadline waits for the key as long as it takes
+    futures = [batcher.submit(3, now + 10), batcher.submit(3)]
+    assert [f.result(1) for f in futures] == [30, 30]
+    assert batches == [[1, 2], [3]]
+    assert deadlines == [now + 20, None]
+
+
+def test_expired_keys_dropped():
+    """Test that keys whose submitters are all past their deadlines are not looked up."""
+    batches = []
+    batcher = MicroBatcher(_batch_fn(batches), window=0.05, max_size=100)
+    now = time.monotonic()
+    expired, alive = batcher.submit(1, now + 0.01), batcher.submit(2, now + 10)
+    shared = batcher.submit(3, now + 0.01)
+    batcher.submit(3, now + 10)
+    assert alive.result(1) == 20
+    assert shared.result(1) == 30
+    assert expired.cancelled()
+    assert batches == [[2, 3]]
+    assert batcher.get_stats() == {'batches': 1, 'keys': 2, 'dropped_keys': 1}
+
+
+def test_max_queued():
+    """Test that batches finding too many batches waiting for the pool are dropped."""
+    started, released = threading.Event(), threading.Event()
+
+    def fn(keys, deadline):
+        started.set()
+        released.wait(5)
+        return keys
+
+    batcher = MicroBatcher(fn, window=10, max_size=1, max_workers=1, max_queued=1)
+    running = batcher.submit(1)
+    started.wait(1)
+    queued, dropped = batcher.submit(2), batcher.submit(3)
+    assert dropped.cancelled()
+    released.set()
+    assert running.result(1) == 1
+    assert queued.result(1) == 2
+    assert batcher.get_stats()['dropped_keys'] == 1
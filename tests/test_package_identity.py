@@ -0,0 +1,28 @@
+"""Unit tests for the package identity module."""
+
+from src.package_identity import normalize_package_name, get_package_identity
+
+
+def test_normalize_package_name():
+    """Test that the names are normalized per ecosystem."""
+    assert normalize_package_name('maven', ' io.vertx:vertx-core ') == 'io.vertx:vertx-core'
+    assert normalize_package_name('Maven', 'io.vertx:vertx-core:jar') == 'io.vertx:vertx-core'
+    assert normalize_package_name('maven', 'IO.Vertx:Vertx-Core') == 'IO.Vertx:Vertx-Core'
+    assert normalize_package_name('npm', 'Express') == 'express'
+    assert normalize_package_name('npm', '%40Babel%2Fcore') == '@babel/core'
+    assert normalize_package_name('npm', '@babel/core') == '@babel/core'
+    assert normalize_package_name('pypi', 'Flask_SQLAlchemy') == 'flask-sqlalchemy'
+    assert normalize_package_name('pypi', 'zope..interface') == 'zope-interface'
+    assert normalize_package_name('go', 'github.com/Foo/bar') == 'github.com/Foo/bar'
+    assert normalize_package_name('pypi', None) is None
+
+
+def test_get_package_identity():
+    """Test that the identity includes ecosystem and version."""
+    assert get_package_identity('PyPI', 'Flask', ' 1.0 ') == \
+        get_package_identity('pypi', 'flask', '1.0')
+    assert get_package_identity('pypi', 'flask', '1.0') != \
+        get_package_identity('pypi', 'flask', '1.1')
+    assert get_package_identity('pypi', 'flask', '1.0') != \
+        get_package_identity('npm', 'flask', '1.0')
+    assert get_package_identity(None, 'p1', None) == ('', 'p1', None)
@@ -0,0 +1,84 @@
+"""Unit tests for the PackageLicenseCache class."""
+
+import os
+from unittest.mock import patch
+
+from src.package_license_cache import PackageLicenseCache
+
+DATA = {'data': [{'package': {'name': ['p1']}, 'version': {'licenses': ['MIT']}}]}
+
+
+def test_get_put(tmpdir):
+    """Test that package data and negative entries are served from the cache."""
+    cache = PackageLicenseCache(str(tmpdir.join('cache', 'packages.sqlite')))
+    assert cache.get('maven', 'p1', '1.0') == (False, None)
+
+    cache.put('maven', 'p1', '1.0', DATA)
+    cache.put('maven', 'p2', '1.0', None)
+    assert cache.get('maven', 'p1', '1.0') == (True, DATA)
+    assert cache.get('maven', 'p2', '1.0') == (True, None)
+    assert cache.get('npm', 'p1', '1.0') == (False, None)
+    assert cache.get_stats() == {'hits': 1, 'negative_hits': 1, 'misses': 2, 'errors': 0}
+
+
+def test_persistence(tmpdir):
+    """Test that the cached data is shared by cache instances using the same file."""
+    path = str(tmpdir.join('packages.sqlite'))
+    PackageLicenseCache(path).put('maven', 'p1', '1.0', DATA)
+    assert PackageLicenseCache(path).get('maven', 'p1', '1.0') == (True, DATA)
+
+
+def test_ttl(tmpdir):
+    """Test that expired entries are not served, negative ones expire sooner."""
+    cache = PackageLicenseCache(str(tmpdir.join('packages.sqlite')), ttl=100, negative_ttl=10)
+    with patch('src.package_license_cache.time.time', return_value=1000.0):
+        cache.put('maven', 'p1', '1.0', DATA)
+        cache.put('maven', 'p2', '1.0', None)
+    with patch('src.package_license_cache.time.time', return_value=1050.0):
+        assert cache.get('maven', 'p1', '1.0') == (True, DATA)
+        assert cache.get('maven', 'p2', '1.0') == (False, None)
+    with patch('src.package_license_cache.time.time', return_value=1100.0):
+        assert cache.get('maven', 'p1', '1.0') == (False, None)
+
+
+def test_size_bound(tmpdir):
+    """Test that the oldest entries are removed above the size bound."""
+    cache = PackageLicenseCache(str(tmpdir.join('packages.sqlite')), max_entries=2)
+    for i in range(3):
+        with patch('src.package_license_cache.time.time', return_value=1000.0 + i):
+            cache.put('maven', 'p{}'.format(i), '1.0', DATA)
+    with patch('src.package_license_cache.time.time', return_value=1010.0):
+        cache.cleanup()
+        assert cache.get('maven', 'p0', '1.0') == (False, None)
+        assert cache.get('maven', 'p1', '1.0') == (True, DATA)
+        assert cache.get('maven', 'p2', '1.0') == (True, DATA)
+
+
+def test_disabled(tmpdir):
+    """Test that the cache with empty path stores nothing."""
+    cache = PackageLicenseCache('')
+    assert not cache.enabled
+    cache.put('maven', 'p1', '1.0', DATA)
+    cache.cleanup()
+    assert cache.get('maven', 'p1', '1.0') == (False, None)
+    assert cache.get_stats() == {'hits': 0, 'negative_hits': 0, 'misses': 0, 'errors': 0}
+
+
+def test_errors(tmpdir):
+    """Test that database errors are counted and not raised."""
+    path = str(tmpdir.join('packages.sqlite'))
+    os.makedirs(path)
+    cache = PackageLicenseCache(path)
+    cache.put('maven', 'p1', '1.0', DATA)
+    assert cache.get('maven', 'p1', '1.0') == (False, None)
+    assert cache.get_stats()['errors'] == 2
+
+
+def test_unwritable_directory(tmpdir):
+    """Test that the cache in a directory that cannot be created reports errors only."""
+    tmpdir.join('file').write('')
+    cache = PackageLicenseCache(str(tmpdir.join('file', 'packages.sqlite')))
+    cache.put('maven', 'p1', '1.0', DATA)
+    cache.cleanup()
+    assert cache.get('maven', 'p1', '1.0') == (False, None)
+    assert cache.get_stats()['errors'] == 3
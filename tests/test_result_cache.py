@@ -0,0 +1,68 @@
+"""Unit tests for the ResultCache class."""
+
+from unittest.mock import patch
+
+from src.result_cache import ResultCache
+
+
+def test_compute_key():
+    """Test the method ResultCache.compute_key()."""
+    key = ResultCache.compute_key('v1', {'a': 1, 'b': [1, 2]})
+    assert key == ResultCache.compute_key('v1', {'b': [1, 2], 'a': 1})
+    assert key != ResultCache.compute_key('v2', {'a': 1, 'b': [1, 2]})
+    assert key != ResultCache.compute_key('v1', {'a': 1, 'b': [2, 1]})
+
+
+def test_get_put_copies():
+    """Test that the cached results cannot be modified by the callers."""
+    cache = ResultCache(max_entries=10, ttl=0)
+    result = {'status': 'Successful', 'packages': [{'package': 'p1'}]}
+    cache.put('k', result)
+    result['packages'].append({'package': 'p2'})
+
+    cached = cache.get('k')
+    assert cached == {'status': 'Successful', 'packages': [{'package': 'p1'}]}
+    cached['status'] = 'Modified'
+    assert cache.get('k')['status'] == 'Successful'
+    assert cache.get('unknown') is None
+    assert cache.get_stats() == {'hits': 2, 'misses': 1, 'evictions': 0, 'expirations': 0,
+                                 'entries': 1}
+
+
+def test_get_put_without_copies():
+    """Test that the results are kept by reference when copying is turned off."""
+    cache = ResultCache(max_entries=10, ttl=0, copy_results=False)
+    result = {'status': 'Successful'}
+    cache.put('k', result)
+    assert cache.get('k') is result
+
+
+def test_lru_eviction():
+    """Test that the least recently used results are evicted."""
+    cache = ResultCache(max_entries=2, ttl=0)
+    cache.put('k1', 1)
+    cache.put('k2', 2)
+    assert cache.get('k1') == 1
+    cache.put('k3', 3)
+    assert cache.get('k2') is None
+    assert cache.get('k1') == 1
+    assert cache.get('k3') == 3
+    assert cache.get_stats()['evictions'] == 1
+
+    # zero size disables the cache
+    cache = ResultCache(max_entries=0, ttl=0)
+    cache.put('k1', 1)
+    assert cache.get('k1') is None
+
+
+def test_ttl_expiration():
+    """Test that the results older than TTL are not served."""
+    cache = ResultCache(max_entries=10, ttl=60)
+    with patch('src.result_cache.time.monotonic', return_value=1000.0):
+        cache.put('k1', 1)
+    with patch('src.result_cache.time.monotonic', return_value=1059.0):
+        assert cache.get('k1') == 1
+    with patch('src.result_cache.time.monotonic', return_value=1060.0):
+        assert cache.get('k1') is None
+    assert cache.get_stats()['expirations'] == 1
+    assert cache.get_stats()['entries'] == 0
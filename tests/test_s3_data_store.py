@@ -88,6 +88,19 @@ def test_list_files_mocked_s3():
     assert len(files) == 1
 
 
+def test_get_fingerprint_mocked_s3():
+    """Check the method get_fingerprint()."""
+    s3DataStore = S3DataStore("bucket", "access_key", "secret_key")
+    s3DataStore.bucket = MockedS3Bucket()
+
+    fingerprint = s3DataStore.get_fingerprint()
+    assert fingerprint
+    assert fingerprint == s3DataStore.get_fingerprint()
+
+    # fingerprint of the filtered objects must differ
+    assert fingerprint != s3DataStore.get_fingerprint(prefix="file")
+
+
 @patch('src.util.data_store.s3_data_store.S3DataStore.list_files', return_value=['file1', 'file2'])
 def test_read_all_json_files_positive(_mocked_object):
     """Check the method read_all_json_files()."""
@@ -0,0 +1,94 @@
+"""Unit tests for the SingleFlight class."""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+import pytest
+
+from src.single_flight import SingleFlight
+
+
+def _slow_call(calls, result, seconds=0.2):
+    def call():
+        calls.append(1)
+        time.sleep(seconds)
+        if isinstance(result, Exception):
+            raise result
+        return result
+    return call
+
+
+def test_concurrent_calls_are_coalesced():
+    """Test that concurrent calls of the same key share one call."""
+    single_flight = SingleFlight()
+    calls = []
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [executor.submit(single_flight.do, 'k', _slow_call(calls, 42))
+                   for _ in range(4)]
+        outputs = [f.result() for f in futures]
+    assert len(calls) == 1
+    assert sorted(outputs) == [(42, False), (42, True), (42, True), (42, True)]
+
+    # nothing is remembered once the call finishes
+    assert single_flight.do('k', _slow_call(calls, 43, 0)) == (43, False)
+    assert len(calls) == 2
+
+
+def test_different_keys():
+    """Test that calls of different keys are not coalesced."""
+    single_flight = SingleFlight()
+    calls = []
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futures = [executor.submit(single_flight.do, k, _slow_call(calls, k))
+                   for k in ('k1', 'k2')]
+        assert [f.result() for f in futures] == [('k1', False), ('k2', False)]
+    assert len(calls) == 2
+
+
+def test_shared_exception():
+    """Test that the exception of the call is raised to all the callers."""
+    single_flight = SingleFlight()
+    calls = []
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futures = [executor.submit(single_flight.do, 'k', _slow_call(calls, ValueError('x')))
+                   for _ in range(2)]
+        for f in futures:
+            with pytest.raises(ValueError):
+                f.result()
+    assert len(calls) == 1
+
+
+def test_timeout():
+    """Test that the callers wait for the call in flight no longer than given timeout."""
+    single_flight = SingleFlight()
+    started = threading.Event()
+
+    def call():
+        started.set()
+        time.sleep(0.5)
+        return 1
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        executor.submit(single_flight.do, 'k', call)
+        started.wait()
+        with pytest.raises(TimeoutError):
+            single_flight.do('k', call, timeout=0.05)
+
+
+def test_join():
+    """Test that the callers joining a call in flight get the result its leader finished it with."""
+    single_flight = SingleFlight()
+    future, is_leader = single_flight.join('k')
+    assert is_leader
+    follower_future, is_leader = single_flight.join('k')
+    assert not is_leader and follower_future is future
+    single_flight.finish('k', 42)
+    assert follower_future.result(0) == 42
+
+    # the next caller leads a new call
+    future, is_leader = single_flight.join('k')
+    assert is_leader
+    single_flight.finish('k', exception=ValueError('x'))
+    with pytest.raises(ValueError):
+        future.result(0)
@@ -1,13 +1,24 @@
 """Unit tests for the StackLicenseAnalyzer module."""
 
+import copy
+import json
+import random
+import requests
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import patch
-from src.stack_license import StackLicenseAnalyzer
+from src.circuit_breaker import CircuitBreaker
+from src.config import GREMLIN_POOL_SIZE
+from src.package_license_cache import PackageLicenseCache
+from src.stack_license import StackLicenseAnalyzer, get_graph_session, get_graph_call_stats, \
+    PACKAGE_QUERY, PACKAGES_QUERY
 from src.stack_license import convert_version_to_proper_semantic, select_latest_version,\
     filter_incorrect_splitting
 
 
-# single instance of stack license analyzer
-stack_license_analyzer = StackLicenseAnalyzer()
+# single instance of stack license analyzer, graph DB is mocked so its data must not be cached
+stack_license_analyzer = StackLicenseAnalyzer(package_cache=PackageLicenseCache(''))
 
 
 def test_component_license_conflict():
@@ -58,6 +69,146 @@ def test_stack_license_conflict():
     assert output['stack_license'] is None
 
 
+def test_stack_license_conflict_minimal_removal():
+    """Check that the smallest set of packages to remove is found for stack conflict."""
+    payload = {
+        'packages': [
+            {
+                'package': 'p1',
+                'version': '1.1',
+                'licenses': ['GPL V2']
+            },
+            {
+                'package': 'p2',
+                'version': '1.1',
+                'licenses': ['GPL V2']
+            },
+            {
+                'package': 'p3',
+                'version': '1.1',
+                'licenses': ['GPL V3+']
+            },
+            {
+                'package': 'p4',
+                'version': '1.1',
+                'licenses': ['MIT']
+            }
+        ]
+    }
+
+    output = stack_license_analyzer.compute_stack_license(payload=payload)
+    assert output['status'] == 'StackConflict'
+    assert len(output['conflict_packages']) == 2
+    removal = output['minimal_conflict_removal']
+    assert removal['packages'] == ['p3']
+    assert removal['licenses'] == ['gplv3+']
+    assert removal['stack_license'] == 'gplv2'
+    assert removal['complete']
+
+
+def test_stack_license_remediation():
+    """Check that the substitutions leading to the target stack license are found."""
+    payload = {
+        'target_stack_license': 'Apache License, Version 2.0',
+        'packages': [
+            {
+                'package': 'p1',
+                'version': '1.1',
+                'licenses': ['MIT']
+            },
+            {
+                'package': 'p2',
+                'version': '1.1',
+                'licenses': ['GPL V2']
+            },
+            {
+                'package': 'p3',
+                'version': '1.1',
+                'licenses': ['GPL V3+']
+            },
+            {
+                'package': 'p4',
+                'version': '1.1',
+                'licenses': ['SOME_JUNK']
+            }
+        ],
+        'alternate_packages': [
+            {
+                'package': 'a1',
+                'version': '1.0',
+                'licenses': ['BSD'],
+                'replaces': [{'package': 'p2'}, {'package': 'p3'}]
+            },
+            {
+                'package': 'a2',
+                'version': '1.0',
+                'licenses': ['MIT'],
+                'replaces': ['p3']
+            },
+            {
+                'package': 'a3',
+                'version': '1.0',
+                'licenses': ['GPL V3+'],
+                'replaces': ['p2']
+            },
+            {
+                'package': 'a4',
+                'version': '1.0',
+                'licenses': ['MIT'],
+                'replaces': ['p1']
+            }
+        ]
+    }
+
+    output = stack_license_analyzer.compute_stack_license(payload=payload)
+    assert output['status'] == 'Unknown'
+    remediation = output['remediation']
+    assert remediation['status'] == 'Successful'
+    assert remediation['target_license'] == 'apache 2.0'
+    assert remediation['blocking_packages'] == {'p2': 'gplv2', 'p3': 'gplv3+', 'p4': None}
+    assert [x['package'] for x in remediation['substitutions']] == ['a1', 'a2']
+    assert remediation['substitutions'][0]['resolves'] == ['p2', 'p3']
+    assert remediation['substitutions'][0]['license'] == 'bsd-new'
+    assert remediation['unresolved_packages'] == ['p4']
+
+    payload['target_stack_license'] = 'SOME_JUNK'
+    output = stack_license_analyzer.compute_stack_license(payload=payload)
+    assert output['remediation']['status'] == 'Unknown'
+
+
+def test_stack_license_dual_licensing():
+    """Check that the licenses of packages can be treated as alternatives."""
+    payload = {
+        'packages': [
+            {
+                'package': 'p1',
+                'version': '1.1',
+                'licenses': ['MIT', 'GPL V2']
+            },
+            {
+                'package': 'p2',
+                'version': '1.1',
+                'licenses': ['GPL V3+', 'APACHE']
+            },
+            {
+                'package': 'p3',
+                'version': '1.1',
+                'licenses': ['SOME_JUNK', 'BSD']
+            }
+        ]
+    }
+
+    output = stack_license_analyzer.compute_stack_license(payload=copy.deepcopy(payload))
+    assert output['status'] == 'Unknown'
+
+    payload['license_semantics'] = 'or'
+    output = stack_license_analyzer.compute_stack_license(payload=payload)
+    assert output['status'] == 'Successful'
+    assert output['stack_license'] == 'apache 2.0'
+    selected = [x['license_analysis']['selected_license'] for x in output['packages']]
+    assert selected == ['MIT', 'APACHE', 'BSD']
+
+
 def test_stack_license_successful():
     """Test if the representative license can be found."""
     payload = {
@@ -82,6 +233,228 @@ def test_stack_license_successful():
     assert output['stack_license'] == 'gplv2'
 
 
+def test_stack_license_majority_threshold():
+    """Test the outlier packages under the majority threshold given by the payload."""
+    payload = {
+        'packages': [
+            {'package': 'p1', 'version': '1.1', 'licenses': ['MIT']},
+            {'package': 'p2', 'version': '1.1', 'licenses': ['BSD']},
+            {'package': 'p3', 'version': '1.1', 'licenses': ['PD']},
+            {'package': 'p4', 'version': '1.1', 'licenses': ['MPL 2.0']}
+        ]
+    }
+
+    output = stack_license_analyzer.compute_stack_license(payload=copy.deepcopy(payload))
+    assert output['stack_license'] == 'mpl 2.0'
+    assert output['outlier_packages'] == {'p4': 'mpl 2.0'}
+
+    payload['majority_threshold'] = 0.8
+    payload['majority_threshold_sweep'] = [0.5, 0.8]
+    output = stack_license_analyzer.compute_stack_license(payload=copy.deepcopy(payload))
+    assert output['status'] == 'Successful'
+    assert output['outlier_packages'] == {}
+    assert output['outlier_sweep'] == {'0.5': {'p4': 'mpl 2.0'}, '0.8': {}}
+
+    payload['majority_threshold'] = 0
+    output = stack_license_analyzer.compute_stack_license(payload=copy.deepcopy(payload))
+    assert output['status'] == 'Failure'
+    assert output['message'] == 'Majority threshold must be a number in (0, 1]'
+
+
+def test_stack_license_result_cache():
+    """Test that the repeated stacks are served from the result cache."""
+    payload = {
+        'packages': [
+            {'package': 'p1', 'version': '1.1', 'licenses': ['MIT', 'PD']},
+            {'package': 'p2', 'version': '1.1', 'licenses': ['BSD', 'GPL V2']}
+        ],
+        'majority_threshold': 0.5
+    }
+    stack_license_analyzer.result_cache.clear()
+    stats = stack_license_analyzer.result_cache.get_stats()
+
+    output = stack_license_analyzer.compute_stack_license(payload=copy.deepcopy(payload))
+    assert output['stack_license'] == 'gplv2'
+    output['stack_license'] = 'modified'
+
+    with patch.object(StackLicenseAnalyzer, '_compute_stack_license') as mocked:
+        cached_output = stack_license_analyzer.compute_stack_license(
+            payload=copy.deepcopy(payload))
+        assert not mocked.called
+    assert cached_output['stack_license'] == 'gplv2'
+    assert cached_output['license_data_version'] == \
+        stack_license_analyzer.license_analyzer.data_version
+
+    new_stats = stack_license_analyzer.result_cache.get_stats()
+    assert new_stats['hits'] == stats['hits'] + 1
+    assert new_stats['misses'] == stats['misses'] + 1
+
+
+def _assert_same_analysis(output, expected):
+    for key in ('status', 'stack_license', 'conflict_packages', 'outlier_packages'):
+        assert output[key] == expected[key]
+    assert sorted(output['distinct_licenses']) == sorted(expected['distinct_licenses'])
+    assert output['packages'] == expected['packages']
+
+
+def test_stack_license_delta():
+    """Test that the delta analysis gives the same output as the full analysis."""
+    payload = {
+        'packages': [
+            {'package': 'p1', 'version': '1.1', 'licenses': ['PD', 'APACHE', 'CDDL 1.0']},
+            {'package': 'p2', 'version': '1.1', 'licenses': ['MIT']},
+            {'package': 'p3', 'version': '1.1', 'licenses': ['BSD']}
+        ],
+        'keep_analysis_state': True
+    }
+    output = stack_license_analyzer.compute_stack_license(payload=copy.deepcopy(payload))
+    assert output['stack_license'] == 'epl 1.0'
+    fingerprint = output['analysis_fingerprint']
+    assert fingerprint
+
+    delta = {
+        'previous_analysis_fingerprint': fingerprint,
+        'removed': [{'package': 'p1'}],
+        'changed': [{'package': 'p2', 'version': '1.2', 'licenses': ['GPL V2']}],
+        'added': [{'package': 'p4', 'version': '1.0', 'licenses': ['MIT']}],
+        'keep_analysis_state': True
+    }
+    with patch.object(StackLicenseAnalyzer, '_compute_stack_license',
+                      wraps=stack_license_analyzer._compute_stack_license) as mocked:
+        output = stack_license_analyzer.compute_stack_license(payload=copy.deepcopy(delta))
+        # the delta is not analyzed in full
+        assert mocked.call_count == 1
+    expected = stack_license_analyzer._compute_stack_license({
+        'packages': [
+            {'package': 'p3', 'version': '1.1', 'licenses': ['BSD']},
+            {'package': 'p2', 'version': '1.2', 'licenses': ['GPL V2']},
+            {'package': 'p4', 'version': '1.0', 'licenses': ['MIT']}
+        ],
+        'keep_analysis_state': True
+    })
+    assert output['stack_license'] == 'gplv2'
+    _assert_same_analysis(output, expected)
+    assert output['analysis_fingerprint'] == expected['analysis_fingerprint']
+
+    # delta of delta ending in stack conflict
+    delta = {
+        'previous_analysis_fingerprint': output['analysis_fingerprint'],
+        'added': [{'package': 'p5', 'version': '1.0', 'licenses': ['GPL V3+']}]
+    }
+    output = stack_license_analyzer.compute_stack_license(payload=copy.deepcopy(delta))
+    expected = stack_license_analyzer._compute_stack_license({
+        'packages': expected['packages'] + [delta['added'][0]]
+    })
+    assert output['status'] == 'StackConflict'
+    _assert_same_analysis(output, expected)
+    assert output['minimal_conflict_removal'] == expected['minimal_conflict_removal']
+
+    # the previous state is kept unchanged
+    delta = {'previous_analysis_fingerprint': fingerprint}
+    output = stack_license_analyzer.compute_stack_license(payload=copy.deepcopy(delta))
+    assert output['stack_license'] == 'epl 1.0'
+    assert output['outlier_packages'] == {'p1': 'epl 1.0'}
+
+
+def _random_delta(rnd, packages, licenses, step):
+    """Make random delta of the stack and the stack it leads to."""
+    names = [pkg['package'] for pkg in packages]
+    removed = rnd.sample(names, rnd.randint(0, min(2, len(names))))
+    changed = [{'package': name, 'version': '2.{}'.format(step),
+                'licenses': rnd.sample(licenses, rnd.randint(1, 2))}
+               for name in rnd.sample([x for x in names if x not in removed],
+                                      rnd.randint(0, min(2, len(names) - len(removed))))]
+    added = [{'package': 'n{}_{}'.format(step, i), 'version': '1.0',
+              'licenses': rnd.sample(licenses, rnd.randint(1, 2))}
+             for i in range(rnd.randint(0, 3))]
+    delta = {'removed': [{'package': name} for name in removed], 'changed': changed,
+             'added': added}
+    gone = set(removed) | set(pkg['package'] for pkg in changed)
+    new_packages = [pkg for pkg in packages if pkg['package'] not in gone] + changed + added
+    return delta, new_packages
+
+
+def test_stack_license_delta_random():
+    """Test that random delta analyses give the same output as the full analyses."""
+    rnd = random.Random(0)
+    licenses = ['MIT', 'BSD', 'APACHE', 'PD', 'GPL V2', 'GPL V3+', 'LGPL V2.1+', 'LGPL V3+',
+                'MPL 1.1', 'EPL 1.0', 'AFFERO GPLV3']
+    for threshold in (0.3, 0.5, 0.6, 0.8, 1):
+        for _ in range(30):
+            packages = [{'package': 'p{}'.format(i), 'version': '1.0',
+                         'licenses': rnd.sample(licenses, rnd.randint(1, 2))}
+                        for i in range(rnd.randint(1, 8))]
+            output = stack_license_analyzer.compute_stack_license(payload={
+                'packages': copy.deepcopy(packages), 'majority_threshold': threshold,
+                'keep_analysis_state': True})
+            for step in range(4):
+                delta, packages = _random_delta(rnd, packages, licenses, step)
+                if not packages or not output.get('analysis_fingerprint'):
+                    break
+                delta.update(previous_analysis_fingerprint=output['analysis_fingerprint'],
+                             majority_threshold=threshold)
+                output = stack_license_analyzer.compute_stack_license(
+                    payload=copy.deepcopy(delta))
+                expected = stack_license_analyzer._compute_stack_license({
+                    'packages': copy.deepcopy(packages), 'majority_threshold': threshold})
+                _assert_same_analysis(output, expected)
+
+
+def test_stack_license_delta_result_cache():
+    """Test that the requests keeping analysis state are not served from the result cache."""
+    payload = {
+        'packages': [{'package': 'p1', 'version': '1.1', 'licenses': ['MIT']}],
+        'keep_analysis_state': True
+    }
+    output = stack_license_analyzer.compute_stack_license(payload=copy.deepcopy(payload))
+    stack_license_analyzer.analysis_states.clear()
+
+    output = stack_license_analyzer.compute_stack_license(payload=copy.deepcopy(payload))
+    delta = {
+        'previous_analysis_fingerprint': output['analysis_fingerprint'],
+        'added': [{'package': 'p2', 'version': '1.1', 'licenses': ['MIT']}]
+    }
+    output = stack_license_analyzer.compute_stack_license(payload=delta)
+    assert output['status'] == 'Successful'
+    assert output['stack_license'] == 'mit'
+
+
+def test_stack_license_delta_full_analysis():
+    """Test the delta analysis of unknown stacks and of changed analysis options."""
+    output = stack_license_analyzer.compute_stack_license(
+        payload={'previous_analysis_fingerprint': 'unknown', 'added': []})
+    assert output['status'] == 'Failure'
+    assert output['message'] == 'Unknown previous analysis, full analysis is needed'
+
+    payload = {
+        'packages': [
+            {'package': 'p1', 'version': '1.1', 'licenses': ['MIT', 'PD']},
+            {'package': 'p2', 'version': '1.1', 'licenses': ['BSD', 'GPL V2']}
+        ],
+        'keep_analysis_state': True
+    }
+    output = stack_license_analyzer.compute_stack_license(payload=copy.deepcopy(payload))
+    delta = {
+        'previous_analysis_fingerprint': output['analysis_fingerprint'],
+        'added': [{'package': 'p3', 'licenses': ['MIT']}]
+    }
+    output = stack_license_analyzer.compute_stack_license(payload=copy.deepcopy(delta))
+    assert output['status'] == 'Failure'
+    assert output['message'] == 'Either component name or component version is missing'
+
+    # other majority threshold needs analysis of all the packages
+    delta['added'][0]['version'] = '1.1'
+    delta['majority_threshold'] = 0.5
+    with patch.object(StackLicenseAnalyzer, '_analyze_package',
+                      wraps=StackLicenseAnalyzer._analyze_package) as mocked:
+        output = stack_license_analyzer.compute_stack_license(payload=copy.deepcopy(delta))
+        assert mocked.call_count == 3
+    assert output['status'] == 'Successful'
+    assert output['stack_license'] == 'gplv2'
+    assert output['majority_threshold'] == 0.5
+    assert [pkg['package'] for pkg in output['packages']] == ['p1', 'p2', 'p3']
+
+
 def test_stack_license_filter():
     """Test if the representative licenses are computed correctly."""
     payload = {
@@ -381,9 +754,10 @@ class _gremlin_response:
         self.ok = ok
         self._json = json
 
-    def post(self, url, data):
+    def post(self, url, data, timeout=None):
         assert url
-        assert data
+        assert json.loads(data)['gremlin'] == PACKAGE_QUERY
+        assert timeout
         return self
 
     def json(self):
@@ -405,7 +779,7 @@ RESOLVED_PACKAGES = [
 ]
 
 
-@patch('src.stack_license.get_session_retry', side_effect=mocked_get_session_retry)
+@patch('src.stack_license.get_graph_session', side_effect=mocked_get_session_retry)
 def test_get_depencency_data(_mock_get_session_retry):
     """Test the get_dependency_data method."""
     resolved = RESOLVED_PACKAGES
@@ -420,7 +794,7 @@ def mocked_get_session_retry2():
     return _gremlin_response(404, False, "")
 
 
-@patch('src.stack_license.get_session_retry', side_effect=mocked_get_session_retry2)
+@patch('src.stack_license.get_graph_session', side_effect=mocked_get_session_retry2)
 def test_get_depencency_data2(_mock_get_session_retry):
     """Test the get_dependency_data method."""
     resolved = RESOLVED_PACKAGES
@@ -440,7 +814,7 @@ def mocked_get_session_retry3():
     return _gremlin_response(200, True, result)
 
 
-@patch('src.stack_license.get_session_retry', side_effect=mocked_get_session_retry3)
+@patch('src.stack_license.get_graph_session', side_effect=mocked_get_session_retry3)
 def test_get_depencency_data3(_mock_get_session_retry):
     """Test the get_dependency_data method."""
     resolved = RESOLVED_PACKAGES
@@ -460,7 +834,7 @@ def mocked_get_session_retry4():
     return _gremlin_response(200, True, result)
 
 
-@patch('src.stack_license.get_session_retry', side_effect=mocked_get_session_retry4)
+@patch('src.stack_license.get_graph_session', side_effect=mocked_get_session_retry4)
 def test_get_depencency_data4(_mock_get_session_retry):
     """Test the get_dependency_data method."""
     resolved = RESOLVED_PACKAGES
@@ -475,7 +849,7 @@ def mocked_get_session_retry5():
     raise Exception("something wrong happened")
 
 
-@patch('src.stack_license.get_session_retry', side_effect=mocked_get_session_retry5)
+@patch('src.stack_license.get_graph_session', side_effect=mocked_get_session_retry5)
 def test_get_depencency_data5(_mock_get_session_retry):
     """Test the get_dependency_data method."""
     resolved = RESOLVED_PACKAGES
@@ -486,6 +860,270 @@ def test_get_depencency_data5(_mock_get_session_retry):
     assert depencency_data["result"] == []
 
 
+def test_get_depencency_data_package_cache(tmpdir):
+    """Test that the packages found in the package cache are not looked up in graph DB."""
+    analyzer = StackLicenseAnalyzer(
+        package_cache=PackageLicenseCache(str(tmpdir.join('packages.sqlite'))))
+    with patch('src.stack_license.get_graph_session',
+               side_effect=mocked_get_session_retry4) as mock:
+        depencency_data = analyzer.get_dependency_data(RESOLVED_PACKAGES, "Maven")
+        assert mock.call_count == 1
+    with patch('src.stack_license.get_graph_session',
+               side_effect=mocked_get_session_retry5) as mock:
+        assert analyzer.get_dependency_data(RESOLVED_PACKAGES, "Maven") == depencency_data
+        assert mock.call_count == 0
+    assert analyzer.get_metrics()['package_cache']['hits'] == 1
+
+
+@patch('src.stack_license.get_graph_session', side_effect=mocked_get_session_retry4)
+def test_get_depencency_data_broken_package_cache(_mock_get_graph_session, tmpdir):
+    """Test that the packages are looked up in graph DB when the package cache is broken."""
+    tmpdir.join('file').write('')
+    analyzer = StackLicenseAnalyzer(
+        package_cache=PackageLicenseCache(str(tmpdir.join('file', 'packages.sqlite'))))
+    depencency_data = analyzer.get_dependency_data(RESOLVED_PACKAGES, "Maven")
+    assert len(depencency_data["result"]) == 1
+    with patch('src.stack_license.GREMLIN_BATCH_SIZE', 10), \
+            patch('src.stack_license.get_graph_session', side_effect=_batch_gremlin_response):
+        depencency_data = analyzer.get_dependency_data(
+            [{"package": "p1", "version": "1.0"}, {"package": "p2", "version": "1.0"}], "Maven")
+    # results of the graph DB are kept even though they cannot be cached
+    assert [len(r["data"]) for r in depencency_data["result"]] == [1, 1]
+    assert analyzer.get_metrics()['package_cache']['errors'] > 0
+
+
+class _concurrent_gremlin_response:
+
+    # all the lookups in flight meet here, so they must run concurrently
+    barrier = None
+
+    def __init__(self):
+        self.status_code = 200
+
+    def post(self, url, data, timeout=None):
+        assert url
+        self._package = json.loads(data)['bindings']['name']
+        if self._package == 'failing':
+            raise Exception("something wrong happened")
+        _concurrent_gremlin_response.barrier.wait()
+        return self
+
+    def json(self):
+        return {"result": {"data": [{"package": self._package}]}}
+
+
+@patch('src.stack_license.GREMLIN_MAX_IN_FLIGHT', 4)
+@patch('src.stack_license.get_graph_session', side_effect=_concurrent_gremlin_response)
+def test_get_depencency_data_concurrent(_mock_get_session_retry):
+    """Test that the packages are looked up concurrently and returned in the input order."""
+    _concurrent_gremlin_response.barrier = threading.Barrier(4, timeout=5)
+    resolved = [{"package": "p{}".format(i), "version": "1.0.0"} for i in range(8)]
+    resolved.insert(5, {"package": "failing", "version": "1.0.0"})
+    depencency_data = stack_license_analyzer.get_dependency_data(resolved, "Maven")
+    assert [x["data"][0]["package"] for x in depencency_data["result"]] == \
+        ["p{}".format(i) for i in range(8)]
+    assert not _concurrent_gremlin_response.barrier.broken
+
+
+class _slow_gremlin_response:
+
+    def __init__(self):
+        self.status_code = 200
+
+    def post(self, url, data, timeout=None):
+        self._package = json.loads(data)['bindings']['name']
+        if self._package == 'p2':
+            # the time budget runs out during this lookup
+            time.sleep(timeout[1])
+            raise requests.exceptions.ReadTimeout("read timed out")
+        return self
+
+    def json(self):
+        return {"result": {"data": [{"package": self._package}]}}
+
+
+@patch('src.stack_license.GREMLIN_MAX_IN_FLIGHT', 1)
+@patch('src.stack_license.get_graph_session', side_effect=_slow_gremlin_response)
+def test_get_depencency_data_deadline(_mock_get_graph_session):
+    """Test that no lookups are started once the time budget runs out."""
+    analyzer = StackLicenseAnalyzer(package_cache=PackageLicenseCache(''))
+    resolved = [{"package": "p{}".format(i), "version": "1.0.0"} for i in range(10)]
+    depencency_data = analyzer.get_dependency_data(resolved, "Maven", budget=0.25)
+    looked_up = [x["data"][0]["package"] for x in depencency_data["result"]]
+    assert looked_up == ["p0", "p1"]
+    # the timed out lookup is not retried past the deadline
+    assert depencency_data["not_looked_up"] == resolved[2:]
+    assert analyzer.graph_circuit_breaker.get_stats()['failures'] == 1
+
+
+@patch('src.stack_license.get_graph_session', side_effect=mocked_get_session_retry5)
+def test_get_depencency_data_circuit_breaker(_mock_get_graph_session):
+    """Test that the lookups fail fast once the circuit breaker opens."""
+    analyzer = StackLicenseAnalyzer(package_cache=PackageLicenseCache(''),
+                                    graph_circuit_breaker=CircuitBreaker(2, 60))
+    resolved = [{"package": "p{}".format(i), "version": "1.0.0"} for i in range(5)]
+    with patch('src.stack_license.GREMLIN_MAX_IN_FLIGHT', 1):
+        depencency_data = analyzer.get_dependency_data(resolved, "Maven")
+    assert _mock_get_graph_session.call_count == 2
+    assert depencency_data["result"] == []
+    assert depencency_data["not_looked_up"] == resolved[2:]
+    assert analyzer.get_metrics()['graph_circuit_breaker']['state'] == CircuitBreaker.OPEN
+
+
+@patch('src.stack_license.get_graph_session', side_effect=_slow_gremlin_response)
+def test_get_depencency_data_bindings(_mock_get_graph_session):
+    """Test that the package values are passed as bindings, not in the script."""
+    name = "p1').drop();g.V().has('pname', 'p2"
+    depencency_data = stack_license_analyzer.get_dependency_data(
+        [{"package": name, "version": "1.0.0"}], "Maven")
+    assert depencency_data["result"] == [{"data": [{"package": name}]}]
+
+
+class _coalesced_gremlin_response:
+
+    def __init__(self):
+        self.status_code = 200
+
+    def post(self, url, data, timeout=None):
+        self._package = json.loads(data)['bindings']['name']
+        # the call is in flight while the concurrent requests arrive
+        time.sleep(0.2)
+        return self
+
+    def json(self):
+        return {"result": {"data": [{"package": self._package}]}}
+
+
+@patch('src.stack_license.get_graph_session', side_effect=_coalesced_gremlin_response)
+def test_get_depencency_data_coalesced(_mock_get_graph_session):
+    """Test that concurrent lookups of the same package share one graph DB call."""
+    resolved = [{"package": "p1", "version": "1.0.0"}]
+    coalesced = get_graph_call_stats()['coalesced']
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        futures = [executor.submit(stack_license_analyzer.get_dependency_data, resolved, "Maven")
+                   for _ in range(3)]
+        outputs = [f.result() for f in futures]
+    assert _mock_get_graph_session.call_count == 1
+    assert get_graph_call_stats()['coalesced'] == coalesced + 2
+    assert outputs[0] == outputs[1] == outputs[2]
+    assert outputs[0]["result"] == [{"data": [{"package": "p1"}]}]
+    assert outputs[0]["result"][0] is not outputs[1]["result"][0]
+
+
+class _batch_gremlin_response:
+
+    # packages known to the mocked graph DB
+    known = {('p1', '1.0'), ('p1', '2.0'), ('p2', '1.0'), ('p3', '2.0')}
+
+    def __init__(self):
+        self.status_code = 200
+
+    def post(self, url, data, timeout=None):
+        assert url
+        payload = json.loads(data)
+        assert payload['gremlin'] == PACKAGES_QUERY
+        names, versions = payload['bindings']['names'], payload['bindings']['versions']
+        self._rows = [{"version": {"pname": [n], "version": [v]}, "package": {"name": [n]}}
+                      for n, v in sorted(self.known) if n in names and v in versions]
+        return self
+
+    def json(self):
+        return {"result": {"data": self._rows, "meta": {}}}
+
+
+def test_get_depencency_data_batched(tmpdir):
+    """Test that the packages are looked up in chunks and the rows are assigned to them."""
+    analyzer = StackLicenseAnalyzer(
+        package_cache=PackageLicenseCache(str(tmpdir.join('packages.sqlite'))))
+    resolved = [{"package": "p1", "version": "1.0"}, {"package": "p2", "version": "1.0"},
+                {"package": "p3", "version": "1.0"}, {"package": "p1", "version": "2.0"},
+                {"package": "p3", "version": "2.0"}]
+    with patch('src.stack_license.GREMLIN_BATCH_SIZE', 2), \
+            patch('src.stack_license.get_graph_session',
+                  side_effect=_batch_gremlin_response) as mock:
+        depencency_data = analyzer.get_dependency_data(resolved, "Maven")
+        assert mock.call_count == 3
+    assert [[(x["version"]["pname"][0], x["version"]["version"][0]) for x in r["data"]]
+            for r in depencency_data["result"]] == \
+        [[("p1", "1.0")], [("p2", "1.0")], [("p1", "2.0")], [("p3", "2.0")]]
+    # unknown package is cached as negative entry
+    assert analyzer.package_cache.get("Maven", "p3", "1.0") == (True, None)
+
+
+class _coalesced_batch_gremlin_response(_batch_gremlin_response):
+
+    # names of the packages sent to the mocked graph DB
+    looked_up = []
+
+    def post(self, url, data, timeout=None):
+        _coalesced_batch_gremlin_response.looked_up.extend(
+            json.loads(data)['bindings']['names'])
+        # the call is in flight while the concurrent request arrives
+        time.sleep(0.2)
+        return super().post(url, data, timeout)
+
+
+@patch('src.stack_license.GREMLIN_BATCH_SIZE', 10)
+@patch('src.stack_license.get_graph_session', side_effect=_coalesced_batch_gremlin_response)
+def test_get_depencency_data_batched_coalesced(_mock_get_graph_session):
+    """Test that packages shared by concurrent batched lookups are looked up once."""
+    _coalesced_batch_gremlin_response.looked_up = []
+    analyzer = StackLicenseAnalyzer(package_cache=PackageLicenseCache(''))
+    stacks = [[{"package": "p1", "version": "1.0"}, {"package": "p2", "version": "1.0"}],
+              [{"package": "p2", "version": "1.0"}, {"package": "p3", "version": "2.0"}]]
+    coalesced = get_graph_call_stats()['coalesced']
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futures = [executor.submit(analyzer.get_dependency_data, resolved, "Maven")
+                   for resolved in stacks]
+        outputs = [f.result() for f in futures]
+    assert _mock_get_graph_session.call_count == 2
+    assert sorted(_coalesced_batch_gremlin_response.looked_up) == ["p1", "p2", "p3"]
+    assert get_graph_call_stats()['coalesced'] == coalesced + 1
+    assert [[x["data"][0]["version"]["pname"][0] for x in output["result"]]
+            for output in outputs] == [["p1", "p2"], ["p2", "p3"]]
+
+
+@patch('src.stack_license.GREMLIN_MICRO_BATCH_WINDOW', 0.05)
+@patch('src.stack_license.get_graph_session', side_effect=_batch_gremlin_response)
+def test_get_depencency_data_micro_batched(_mock_get_graph_session):
+    """Test that the lookups of concurrent requests are sent as one batch."""
+    analyzer = StackLicenseAnalyzer(package_cache=PackageLicenseCache(''))
+    stacks = [[{"package": "p1", "version": "1.0"}, {"package": "p2", "version": "1.0"}],
+              [{"package": "p1", "version": "2.0"}],
+              [{"package": "p3", "version": "2.0"}, {"package": "p3", "version": "1.0"}]]
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        outputs = list(executor.map(lambda x: analyzer.get_dependency_data(x, "Maven"), stacks))
+    assert _mock_get_graph_session.call_count == 1
+    assert [[x["data"][0]["version"]["pname"][0] + ":" + x["data"][0]["version"]["version"][0]
+             for x in output["result"]] for output in outputs] == \
+        [["p1:1.0", "p2:1.0"], ["p1:2.0"], ["p3:2.0"]]
+    assert analyzer.get_metrics()['graph_micro_batches'] == \
+        {'batches': 1, 'keys': 5, 'dropped_keys': 0}
+
+
+class _timed_batch_gremlin_response(_batch_gremlin_response):
+
+    # read timeouts of the calls to the mocked graph DB
+    read_timeouts = []
+
+    def post(self, url, data, timeout=None):
+        _timed_batch_gremlin_response.read_timeouts.append(timeout[1])
+        return super().post(url, data, timeout)
+
+
+@patch('src.stack_license.GREMLIN_MICRO_BATCH_WINDOW', 0.01)
+@patch('src.stack_license.get_graph_session', side_effect=_timed_batch_gremlin_response)
+def test_get_depencency_data_micro_batched_deadline(_mock_get_graph_session):
+    """Test that the micro-batch is looked up within the time budget of its requests."""
+    _timed_batch_gremlin_response.read_timeouts = []
+    analyzer = StackLicenseAnalyzer(package_cache=PackageLicenseCache(''))
+    depencency_data = analyzer.get_dependency_data(
+        [{"package": "p1", "version": "1.0"}], "Maven", budget=0.5)
+    assert len(depencency_data["result"]) == 1
+    assert len(_timed_batch_gremlin_response.read_timeouts) == 1
+    assert _timed_batch_gremlin_response.read_timeouts[0] <= 0.5
+
+
 def mocked_get_session_retry6():
     """Implement mocked function get_session_retry()."""
     result = {
@@ -502,7 +1140,7 @@ def mocked_get_session_retry6():
     return _gremlin_response(200, True, result)
 
 
-@patch('src.stack_license.get_session_retry', side_effect=mocked_get_session_retry6)
+@patch('src.stack_license.get_graph_session', side_effect=mocked_get_session_retry6)
 def test_extract_user_stack_package_licenses(_mock_get_session_retry):
     """Test the extract_user_stack_package_licenses method."""
     resolved = RESOLVED_PACKAGES
@@ -529,6 +1167,193 @@ def test_extract_user_stack_package_licenses(_mock_get_session_retry):
         assert d["licenses"][0] == "license1"
 
 
+def test_extract_package_licenses_identity():
+    """Test that the graph results are merged with the input by package identity."""
+    def graph_data(name, version, licenses):
+        return {'data': [{'version': {'pname': [name], 'version': [version],
+                                      'pecosystem': ['pypi'], 'declared_licenses': licenses}}]}
+
+    user_stack = {'result': [
+        graph_data('Flask', '1.0', ['BSD']),
+        graph_data('flask', '1.0', ['BSD']),
+        graph_data('six', '1.11', ['MIT']),
+        {'data': []}
+    ]}
+    resolved = [
+        {'package': 'Flask', 'version': '1.0'},
+        {'package': 'flask', 'version': '1.1'},
+        {'package': 'Six', 'version': '1.11'},
+        {'package': 'zope_interface', 'version': '4.0'},
+        {'package': 'zope.interface', 'version': '4.0'}
+    ]
+    packages = stack_license_analyzer._extract_package_licenses(user_stack, resolved, 'pypi')
+    assert packages == [
+        {'package': 'Flask', 'version': '1.0', 'licenses': ['BSD']},
+        {'package': 'six', 'version': '1.11', 'licenses': ['MIT']},
+        {'package': 'flask', 'version': '1.1', 'licenses': []},
+        {'package': 'zope_interface', 'version': '4.0', 'licenses': []}
+    ]
+
+
+def test_get_graph_session():
+    """Test that the graph DB calls share one pooled session."""
+    session = get_graph_session()
+    assert get_graph_session() is session
+    for prefix in ('http://', 'https://'):
+        adapter = session.get_adapter(prefix + 'localhost')
+        assert adapter._pool_maxsize == GREMLIN_POOL_SIZE
+        # the calls are retried within their time budget instead
+        assert adapter.max_retries.total == 0
+
+
+class _flaky_gremlin_response:
+
+    statuses = []
+
+    def __init__(self):
+        self.status_code = 200
+
+    def post(self, url, data, timeout=None):
+        status = _flaky_gremlin_response.statuses.pop(0)
+        if status is None:
+            raise requests.exceptions.ConnectionError("connection refused")
+        self.status_code = status
+        return self
+
+    def json(self):
+        return {"result": {"data": [{"package": "p1"}]}}
+
+
+@patch('src.stack_license.GREMLIN_RETRY_BACKOFF', 0)
+@patch('src.stack_license.get_graph_session', side_effect=_flaky_gremlin_response)
+def test_get_depencency_data_retries(_mock_get_graph_session):
+    """Test that only server and connection errors are retried and that the retries are counted."""
+    analyzer = StackLicenseAnalyzer(package_cache=PackageLicenseCache(''))
+    retries = get_graph_call_stats()['retries']
+    _flaky_gremlin_response.statuses = [500, None, 200]
+    depencency_data = analyzer.get_dependency_data(RESOLVED_PACKAGES, "Maven")
+    assert depencency_data["result"] == [{"data": [{"package": "p1"}]}]
+    assert get_graph_call_stats()['retries'] == retries + 2
+    assert analyzer.graph_circuit_breaker.get_stats()['failures'] == 2
+
+    _flaky_gremlin_response.statuses = [404]
+    depencency_data = analyzer.get_dependency_data(RESOLVED_PACKAGES, "Maven")
+    assert depencency_data == {"result": [], "not_looked_up": []}
+    assert get_graph_call_stats()['retries'] == retries + 2
+
+    # all the attempts fail
+    _flaky_gremlin_response.statuses = [500, 502, 503, 504]
+    depencency_data = analyzer.get_dependency_data(RESOLVED_PACKAGES, "Maven")
+    assert depencency_data == {"result": [], "not_looked_up": []}
+    assert get_graph_call_stats()['retries'] == retries + 5
+    assert _flaky_gremlin_response.statuses == []
+
+
+def test_get_depencency_data_not_found(tmpdir):
+    """Test that the packages not found by graph DB are cached as negative entries."""
+    analyzer = StackLicenseAnalyzer(
+        package_cache=PackageLicenseCache(str(tmpdir.join('packages.sqlite'))))
+    with patch('src.stack_license.get_graph_session', side_effect=mocked_get_session_retry2):
+        assert analyzer.get_dependency_data(RESOLVED_PACKAGES, "Maven")["result"] == []
+    assert analyzer.package_cache.get("Maven", "The package", "1.0.0") == (True, None)
+
+
+class _hedged_gremlin_response:
+
+    calls = 0
+    # the first call is slow, it answers only after the duplicate one
+    released = threading.Event()
+
+    def __init__(self):
+        self.status_code = 200
+
+    def post(self, url, data, timeout=None):
+        _hedged_gremlin_response.calls += 1
+        self._call = _hedged_gremlin_response.calls
+        if self._call == 1:
+            _hedged_gremlin_response.released.wait(5)
+        return self
+
+    def json(self):
+        return {"result": {"data": [{"call": self._call}]}}
+
+
+@patch('src.stack_license.GREMLIN_HEDGE_PERCENTILE', 95)
+@patch('src.stack_license.get_graph_session', side_effect=_hedged_gremlin_response)
+def test_get_depencency_data_hedged(_mock_get_graph_session):
+    """Test that a slow graph DB call is duplicated and the first response is used."""
+    _hedged_gremlin_response.calls = 0
+    _hedged_gremlin_response.released = threading.Event()
+    analyzer = StackLicenseAnalyzer(package_cache=PackageLicenseCache(''))
+    for _ in range(analyzer.graph_latency.min_samples):
+        analyzer.graph_latency.record(0.01)
+    stats = get_graph_call_stats()
+    depencency_data = analyzer.get_dependency_data(RESOLVED_PACKAGES, "Maven")
+    _hedged_gremlin_response.released.set()
+    assert depencency_data["result"] == [{"data": [{"call": 2}]}]
+    assert get_graph_call_stats()['hedges'] == stats['hedges'] + 1
+    assert get_graph_call_stats()['hedge_wins'] == stats['hedge_wins'] + 1
+
+
+class _suppressed_hedge_gremlin_response:
+
+    suppressed = 0
+
+    def __init__(self):
+        self.status_code = 200
+
+    def post(self, url, data, timeout=None):
+        # the call answers only once its duplicate is suppressed
+        for _ in range(500):
+            if get_graph_call_stats()['hedges_suppressed'] > \
+                    _suppressed_hedge_gremlin_response.suppressed:
+                break
+            time.sleep(0.01)
+        return self
+
+    def json(self):
+        return {"result": {"data": [{"call": 1}]}}
+
+
+@patch('src.stack_license.GREMLIN_HEDGE_PERCENTILE', 95)
+@patch('src.stack_license.GREMLIN_HEDGE_MAX_IN_FLIGHT', 0)
+@patch('src.stack_license.get_graph_session', side_effect=_suppressed_hedge_gremlin_response)
+def test_get_depencency_data_hedges_limited(_mock_get_graph_session):
+    """Test that no call is duplicated while the duplicate calls in flight are at their limit."""
+    analyzer = StackLicenseAnalyzer(package_cache=PackageLicenseCache(''))
+    for _ in range(analyzer.graph_latency.min_samples):
+        analyzer.graph_latency.record(0.01)
+    stats = get_graph_call_stats()
+    _suppressed_hedge_gremlin_response.suppressed = stats['hedges_suppressed']
+    depencency_data = analyzer.get_dependency_data(RESOLVED_PACKAGES, "Maven")
+    assert depencency_data["result"] == [{"data": [{"call": 1}]}]
+    assert _mock_get_graph_session.call_count == 1
+    assert get_graph_call_stats()['hedges'] == stats['hedges']
+    assert get_graph_call_stats()['hedges_suppressed'] == stats['hedges_suppressed'] + 1
+
+
+@patch('src.stack_license.GREMLIN_HEDGE_PERCENTILE', 95)
+@patch('src.stack_license.GREMLIN_POOL_SIZE', 1)
+@patch('src.stack_license.get_graph_session', side_effect=mocked_get_session_retry6)
+def test_get_depencency_data_hedge_pool_busy(_mock_get_graph_session):
+    """Test that a call is sent by the calling thread when no thread is free to send it."""
+    analyzer = StackLicenseAnalyzer(package_cache=PackageLicenseCache(''))
+    for _ in range(analyzer.graph_latency.min_samples):
+        analyzer.graph_latency.record(0.01)
+    stats = get_graph_call_stats()
+    # the only thread is busy for longer than the call may take
+    released = threading.Event()
+    analyzer._hedge_executor.submit(released.wait, 5)
+    started = time.monotonic()
+    depencency_data = analyzer.get_dependency_data(RESOLVED_PACKAGES, "Maven")
+    elapsed = time.monotonic() - started
+    released.set()
+    assert elapsed < 2
+    assert len(depencency_data["result"]) == 1
+    assert get_graph_call_stats()['hedges'] == stats['hedges']
+    assert _mock_get_graph_session.call_count == 1
+
+
 def test_convert_version_to_proper_semantic():
     """Test the convert_version_to_proper_semantic function."""
     versions = [
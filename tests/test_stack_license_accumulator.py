@@ -0,0 +1,146 @@
+"""Tests for the class StackLicenseAccumulator."""
+
+import random
+
+from src.license_analysis import LicenseAnalyzer
+from src.stack_license_accumulator import StackLicenseAccumulator
+from src.util.data_store.local_filesystem import LocalFileSystem
+from src.config import LIC_DATA_DIR
+import os
+
+src_dir = os.path.join(LIC_DATA_DIR, "license_graph")
+graph_store = LocalFileSystem(src_dir=src_dir)
+synonyms_dir = os.path.join(LIC_DATA_DIR, "synonyms")
+synonyms_store = LocalFileSystem(src_dir=synonyms_dir)
+
+license_analyzer = LicenseAnalyzer(graph_store, synonyms_store)
+
+
+def _recompute(stack):
+    """Compute the stack license from scratch for comparison."""
+    list_rep_licenses = []
+    for licenses in stack.values():
+        la_output = license_analyzer.compute_representative_license(licenses)
+        if la_output['representative_license'] is None:
+            return None
+        list_rep_licenses.append(la_output['representative_license'])
+    return license_analyzer.compute_representative_license(list_rep_licenses)
+
+
+def _check_same_output(accumulator, stack):
+    """Check that accumulated output equals to the one computed from scratch."""
+    output = accumulator.compute_stack_license()
+    expected = _recompute(stack)
+    if expected is None:
+        # some package has no representative license
+        assert output['status'] == 'Failure'
+        assert accumulator.get_unlicensed_packages()
+        return
+    assert output['status'] == expected['status']
+    assert output['representative_license'] == expected['representative_license']
+    assert sorted(output['outlier_licenses']) == sorted(expected['outlier_licenses'])
+    assert set(output['conflict_licenses']) == set(expected['conflict_licenses'])
+
+
+def test_empty_stack():
+    """Check the output for empty stack."""
+    accumulator = StackLicenseAccumulator(license_analyzer)
+    assert len(accumulator) == 0
+    output = accumulator.compute_stack_license()
+    assert output['status'] == 'Failure'
+    assert output['reason'] == 'Input is invalid'
+    assert accumulator.remove('p1') is False
+
+
+def test_add_remove():
+    """Check that the stack license follows additions and removals of packages."""
+    accumulator = StackLicenseAccumulator(license_analyzer)
+
+    la_output = accumulator.add('p1', ['MIT', 'PD'])
+    assert la_output['representative_license'] == 'mit'
+    accumulator.add('p2', ['BSD', 'GPL V2'])
+    assert 'p1' in accumulator
+    output = accumulator.compute_stack_license()
+    assert output['status'] == 'Successful'
+    assert output['representative_license'] == 'gplv2'
+
+    accumulator.add('p3', ['GPL V3+'])
+    output = accumulator.compute_stack_license()
+    assert output['status'] == 'Conflict'
+    assert set(output['conflict_licenses']) == set([('gplv2', 'gplv3+')])
+    assert accumulator.get_license_packages() == {
+        'mit': ['p1'], 'gplv2': ['p2'], 'gplv3+': ['p3']}
+
+    assert accumulator.remove('p2') is True
+    output = accumulator.compute_stack_license()
+    assert output['status'] == 'Successful'
+    assert output['representative_license'] == 'gplv3+'
+
+    # package is replaced when added again
+    accumulator.add('p3', ['APACHE'])
+    assert len(accumulator) == 2
+    output = accumulator.compute_stack_license()
+    assert output['representative_license'] == 'apache 2.0'
+
+    accumulator.add('p4', ['SOME_JUNK'])
+    output = accumulator.compute_stack_license()
+    assert output['status'] == 'Failure'
+    assert accumulator.get_unlicensed_packages() == {'p4': 'Unknown'}
+    accumulator.remove('p4')
+    assert accumulator.compute_stack_license()['status'] == 'Successful'
+
+
+def test_copy():
+    """Check that copy of the stack is updated independently of the original."""
+    accumulator = StackLicenseAccumulator(license_analyzer)
+    accumulator.add('p1', ['MIT', 'PD'])
+    accumulator.add('p2', ['BSD', 'GPL V2'])
+
+    other = accumulator.copy()
+    other.add('p3', ['GPL V3+'])
+    other.remove('p1')
+    assert other.compute_stack_license()['status'] == 'Conflict'
+    assert other.get_license_packages() == {'gplv2': ['p2'], 'gplv3+': ['p3']}
+
+    output = accumulator.compute_stack_license()
+    assert output['representative_license'] == 'gplv2'
+    assert accumulator.get_license_packages() == {'mit': ['p1'], 'gplv2': ['p2']}
+    _check_same_output(accumulator, {'p1': ['MIT', 'PD'], 'p2': ['BSD', 'GPL V2']})
+
+
+def test_outliers():
+    """Check that the outliers are found for the accumulated stack."""
+    accumulator = StackLicenseAccumulator(license_analyzer)
+    stack = {
+        'p1': ['PD', 'APACHE', 'CDDL 1.0'],
+        'p2': ['MIT'],
+        'p3': ['BSD']
+    }
+    for package, licenses in stack.items():
+        accumulator.add(package, licenses)
+    output = accumulator.compute_stack_license()
+    assert output['representative_license'] == 'epl 1.0'
+    assert output['outlier_licenses'] == ['epl 1.0']
+    _check_same_output(accumulator, stack)
+
+
+def test_random_updates():
+    """Check random sequences of updates against analysis computed from scratch."""
+    rnd = random.Random(42)
+    licenses = ['MIT', 'PD', 'BSD', 'APACHE', 'GPL V2', 'GPL V3+', 'LGPL V2.1', 'MPL 2.0',
+                'EPL 1.0', 'AGPL V3', 'W3C']
+    accumulator = StackLicenseAccumulator(license_analyzer)
+    stack = {}
+    for i in range(300):
+        package = 'p{}'.format(rnd.randrange(20))
+        if package in stack and rnd.random() < 0.4:
+            accumulator.remove(package)
+            del stack[package]
+        else:
+            package_licenses = rnd.sample(licenses, rnd.randint(1, 2))
+            accumulator.add(package, package_licenses)
+            # re-added package goes to the end, as it does in the accumulator
+            stack.pop(package, None)
+            stack[package] = package_licenses
+        if stack:
+            _check_same_output(accumulator, stack)
@@ -0,0 +1,55 @@
+"""Unit tests for the SynonymRegistry class."""
+
+import os
+import pytest
+from unittest.mock import patch
+
+from src.license_analysis import LicenseAnalyzer
+from src.synonym_registry import SynonymRegistry
+from src.util.data_store.local_filesystem import LocalFileSystem
+from src.config import LIC_DATA_DIR
+
+graph_store = LocalFileSystem(src_dir=os.path.join(LIC_DATA_DIR, "license_graph"))
+synonyms_store = LocalFileSystem(src_dir=os.path.join(LIC_DATA_DIR, "synonyms"))
+
+
+def test_get_synonyms(tmpdir):
+    """Test that the synonyms are read once and again when they change only."""
+    store = LocalFileSystem(str(tmpdir))
+    store.write_json_file("license_synonyms.json", {"mit license": "mit"})
+    registry = SynonymRegistry()
+
+    with patch.object(LocalFileSystem, 'read_json_file',
+                      side_effect=LocalFileSystem.read_json_file, autospec=True) as mocked:
+        version, synonyms = registry.get_synonyms(store)
+        assert synonyms == {"mit license": "mit"}
+        assert registry.get_synonyms(store) == (version, synonyms)
+        assert mocked.call_count == 1
+
+        store.write_json_file("license_synonyms.json", {"mit license": "mit", "bsd": "bsd-new"})
+        new_version, synonyms = registry.get_synonyms(store)
+        assert new_version != version
+        assert synonyms["bsd"] == "bsd-new"
+        assert mocked.call_count == 2
+
+    assert registry.get_versions() == {store.get_name(): new_version}
+
+    # the shared table cannot be modified
+    with pytest.raises(TypeError):
+        synonyms["gpl"] = "gplv2"
+
+
+def test_get_synonyms_no_data(tmpdir):
+    """Test the registry for data store without synonyms."""
+    version, synonyms = SynonymRegistry().get_synonyms(LocalFileSystem(str(tmpdir)))
+    assert version
+    assert synonyms == {}
+
+
+def test_shared_by_analyzers():
+    """Test that the analyzers built from the same data share the synonym table."""
+    analyzer = LicenseAnalyzer(graph_store, synonyms_store)
+    other_analyzer = LicenseAnalyzer(graph_store, synonyms_store)
+    assert analyzer.syn is other_analyzer.syn
+    assert analyzer.synonyms_version == other_analyzer.synonyms_version
+    assert analyzer.find_synonym('GPL V2') == 'gplv2'